@@ -0,0 +1,164 @@
+# bench/fake_neo4j.py – v0.1  (ASCII-only)
+"""
+Recording stand-in for the neo4j driver (offline benchmarks).
+
+Implements the part of the driver API the ETL uses – ``session()`` with
+``run`` / ``execute_write`` / ``execute_read`` / ``begin_transaction``,
+``execute_query``, ``verify_connectivity``, ``close`` – and records every
+statement instead of sending it:
+
+    drv = RecordingDriver(latency=0.005,     # optional simulated round trip
+                          names={CYPHER: "org upsert"})
+    Neo4jWriter(drv).write(CYPHER, rows)
+    drv.summary()   # per statement: calls, rows, parameter MiB
+
+Statements are labelled through *names*, else by a short hash and their
+first line that is not the UNWIND.
+
+``rows`` is the length of the largest list parameter (the UNWIND batch);
+parameter volume is the JSON size of the parameters – close to what the
+driver would serialise.  Results are empty: reads return no records.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class Call:
+    statement: str                      # label (see above)
+    rows: int
+    param_bytes: int
+    seconds: float
+
+
+def _label(cypher) -> str:
+    text = str(cypher).strip()
+    lines = [" ".join(l.split()) for l in text.splitlines() if l.strip()]
+    first = next((l for l in lines if not l.startswith("UNWIND")), "")
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=3).hexdigest()
+    return f"{digest} {first[:60]}"
+
+
+class _Summary:
+    counters = None
+
+
+class _Result:
+    def consume(self) -> _Summary:
+        return _Summary()
+
+    def single(self):
+        return {"deleted": 0}
+
+    def data(self) -> list:
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+
+class _Tx:
+    def __init__(self, driver: "RecordingDriver"):
+        self._driver = driver
+
+    def run(self, cypher, parameters=None, **kw) -> _Result:
+        self._driver._record(cypher, {**(parameters or {}), **kw})
+        return _Result()
+
+    def __enter__(self) -> "_Tx":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class _Session:
+    def __init__(self, driver: "RecordingDriver"):
+        self._driver = driver
+
+    def __enter__(self) -> "_Session":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def run(self, cypher, parameters=None, **kw) -> _Result:
+        return _Tx(self._driver).run(cypher, parameters, **kw)
+
+    def execute_write(self, work, *args, **kw):
+        return work(_Tx(self._driver), *args, **kw)
+
+    execute_read = execute_write
+
+    def begin_transaction(self, **kw) -> _Tx:
+        return _Tx(self._driver)
+
+
+class RecordingDriver:
+    def __init__(self, *, latency: float = 0.0, per_row: float = 0.0,
+                 measure_bytes: bool = True, names: dict | None = None):
+        self.latency = latency          # seconds per statement
+        self.per_row = per_row          # extra seconds per UNWIND row
+        self.measure_bytes = measure_bytes
+        self.names = {k.strip(): v for k, v in (names or {}).items()}
+        self.calls: list[Call] = []
+        self._lock = threading.Lock()
+
+    def _record(self, cypher, params: dict) -> None:
+        t0 = time.perf_counter()
+        rows = max((len(v) for v in params.values() if isinstance(v, list)),
+                   default=0)
+        size = len(json.dumps(params, default=str)) if self.measure_bytes else 0
+        delay = self.latency + self.per_row * rows
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            label = self.names.get(str(cypher).strip()) or _label(cypher)
+            self.calls.append(Call(label, rows, size,
+                                   time.perf_counter() - t0))
+
+    # ── driver API ───────────────────────────────────────────────────
+    def session(self, **kw) -> _Session:
+        return _Session(self)
+
+    def execute_query(self, query, parameters=None, **kw):
+        params = {k: v for k, v in kw.items() if not k.endswith("_")}
+        self._record(query, {**(parameters or {}), **params})
+        return [], _Summary(), []
+
+    def verify_connectivity(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    # ── report ───────────────────────────────────────────────────────
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def summary(self) -> dict[str, dict]:
+        out: dict[str, dict] = defaultdict(lambda: dict(calls=0, rows=0,
+                                                        param_mib=0.0))
+        for c in self.calls:
+            s = out[c.statement]
+            s["calls"] += 1
+            s["rows"] += c.rows
+            s["param_mib"] += c.param_bytes / 2**20
+        return {k: {**v, "param_mib": round(v["param_mib"], 2)}
+                for k, v in out.items()}
@@ -0,0 +1,267 @@
+# bench/run_bench.py – v0.1
+"""
+Offline benchmarks: synthetic register + ads, no network, no Neo4j.
+
+Stages, all on the same deterministic data (bench/synthetic.py):
+
+  register_clean  register_clean.read_raw + clean_register      (raw rows)
+  row_iter        etl_neo4j_load.read_register + row_iter       (register rows)
+  neo4j_load      write_shared_nodes + load_full via Neo4jWriter into the
+                  recording driver (bench/fake_neo4j.py)         (register rows)
+  adzuna_loader   adzuna_job_loader.main over synthetic pages    (ads)
+  matching        SponsorMatcher build + match_many per page     (ads)
+
+Per stage: rows/s (best of --repeat), peak traced memory (one extra run
+under tracemalloc, so timings stay clean), p50 / p95 batch latency where
+the stage has batches, plus stage details (Cypher calls and parameter
+volume, matcher build time, ...).
+
+    python bench/run_bench.py                     # compare with the baseline
+    python bench/run_bench.py --record            # record a new baseline
+    python bench/run_bench.py --orgs 20000 --ads 5000 --only matching
+
+Results are compared with --baseline (only when it was recorded at the
+same sizes): a stage whose rows/s drops, or whose peak memory grows, by
+more than --tolerance is a regression and the exit code is 1.  Baselines
+are machine-specific, so bench/baseline.json is not versioned: create it
+with --record on the reference machine (and one per other machine).
+"""
+import argparse, contextlib, io, json, logging, math, os, platform, sys, tempfile, time, tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+import adzuna_job_loader  # noqa: E402
+from adzuna_client import PAGE_SIZE, AdzunaClient  # noqa: E402
+from etl_neo4j_load import (ADDED_CYPHER, SHARED_NODES_CYPHER, UNWIND_CYPHER,  # noqa: E402
+                            build_rows, load_full, read_register, row_iter,
+                            write_shared_nodes)
+from neo4j_writer import Neo4jWriter  # noqa: E402
+from register_clean import clean_register, read_raw  # noqa: E402
+from register_store import export_frame  # noqa: E402
+from sponsor_matcher import SponsorMatcher  # noqa: E402
+
+from fake_neo4j import RecordingDriver  # noqa: E402
+from synthetic import TITLES, synthetic_ads, synthetic_register  # noqa: E402
+
+log = logging.getLogger("bench")
+
+BASELINE = Path(__file__).with_name("baseline.json")
+CYPHER_NAMES = {SHARED_NODES_CYPHER: "shared nodes", UNWIND_CYPHER: "org upsert",
+                ADDED_CYPHER: "org added"}
+CITIES = ["London", "Manchester", "Birmingham", "Leeds", "Remote"]
+
+
+@dataclass
+class Measure:
+    rows: int
+    latencies: list = field(default_factory=list)       # seconds per batch
+    extra: dict = field(default_factory=dict)
+
+
+@dataclass
+class Context:
+    workdir: Path
+    raw_csv: Path
+    raw_rows: int
+    clean_csv: Path
+    rows: list                                          # build_rows output
+    ads: list
+
+
+# ─── Stages ─────────────────────────────────────────────────────────────────────
+def bench_register_clean(ctx):
+    clean_register(read_raw(ctx.raw_csv))
+    return Measure(ctx.raw_rows)
+
+
+def bench_row_iter(ctx):
+    return Measure(sum(1 for _ in row_iter(read_register(ctx.clean_csv))))
+
+
+def bench_neo4j_load(ctx):
+    drv = RecordingDriver(names=CYPHER_NAMES)
+    lat = []
+    writer = Neo4jWriter(drv, workers=4,
+                         on_batch=lambda b: lat.append(b.seconds))
+    write_shared_nodes(writer, ctx.rows)
+    stats = load_full(writer, ctx.rows)
+    return Measure(stats.rows, lat, dict(cypher=drv.summary()))
+
+
+class SyntheticClient(AdzunaClient):
+    """AdzunaClient whose pages come from ``PAGES`` instead of the API."""
+    PAGES: dict = {}
+
+    def fetch_page(self, term, city, page):
+        jobs = self.PAGES.get((term, city), [])
+        return jobs[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+
+
+def bench_adzuna_loader(ctx):
+    terms = TITLES[:4]
+    pairs = [(t, c) for t in terms for c in CITIES]
+    SyntheticClient.PAGES = {p: ctx.ads[i::len(pairs)]
+                             for i, p in enumerate(pairs)}
+    pages = math.ceil(len(ctx.ads) / len(pairs) / PAGE_SIZE) + 1
+    os.environ.setdefault("ADZUNA_APP_ID", "bench")
+    os.environ.setdefault("ADZUNA_APP_KEY", "bench")
+    with mock.patch.object(adzuna_job_loader, "AdzunaClient", SyntheticClient), \
+            tempfile.TemporaryDirectory(dir=ctx.workdir) as out, \
+            contextlib.redirect_stdout(io.StringIO()):
+        adzuna_job_loader.main(["-s", ",".join(terms), "-c", ",".join(CITIES),
+                                "--pages", str(pages), "--rate", "1e6",
+                                "--formats", "json,csv,jsonl", "--outdir", out])
+        written = sum(f.stat().st_size for f in Path(out).iterdir())
+    return Measure(len(ctx.ads), extra=dict(output_mib=round(written / 2**20, 1)))
+
+
+def bench_matching(ctx):
+    t0 = time.perf_counter()
+    m = SponsorMatcher.from_register_csv(ctx.clean_csv)
+    build = time.perf_counter() - t0
+    companies = [a["company"]["display_name"] for a in ctx.ads]
+    lat, matched = [], 0
+    for i in range(0, len(companies), PAGE_SIZE):
+        t = time.perf_counter()
+        matched += sum(r is not None
+                       for r in m.match_many(companies[i:i + PAGE_SIZE]))
+        lat.append(time.perf_counter() - t)
+    return Measure(len(companies), lat,
+                   dict(build_s=round(build, 2), sponsors=len(m),
+                        matched=round(matched / max(len(companies), 1), 3)))
+
+
+STAGES = {"register_clean": bench_register_clean, "row_iter": bench_row_iter,
+          "neo4j_load": bench_neo4j_load, "adzuna_loader": bench_adzuna_loader,
+          "matching": bench_matching}
+
+
+# ─── Harness ────────────────────────────────────────────────────────────────────
+def prepare(workdir, n_orgs, n_ads):
+    t0 = time.perf_counter()
+    raw = synthetic_register(n_orgs)
+    raw_csv = workdir / "sponsor_register_raw.csv"
+    raw.to_csv(raw_csv, index=False)
+    clean_csv = export_frame(clean_register(raw), "csv",
+                             workdir / "sponsor_register_clean.csv")
+    rows = build_rows(read_register(clean_csv))
+    ads = synthetic_ads(n_ads, raw["Organisation Name"].unique().tolist())
+    log.info("Synthetic data: %d register rows, %d ads in %.1fs",
+             len(raw), len(ads), time.perf_counter() - t0)
+    return Context(workdir, raw_csv, len(raw), clean_csv, rows, ads)
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    v = sorted(values)
+    return round(v[min(len(v) - 1, int(q * len(v)))] * 1000, 2)
+
+
+def measure(fn, ctx, repeat, memory):
+    best, m = None, None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        m = fn(ctx)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    result = dict(rows=m.rows, seconds=round(best, 3),
+                  rows_per_s=round(m.rows / max(best, 1e-9)),
+                  p50_ms=_pct(m.latencies, 0.5), p95_ms=_pct(m.latencies, 0.95),
+                  **m.extra)
+    if memory:
+        tracemalloc.start()
+        fn(ctx)
+        result["peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages vs *baseline* (rows/s down, peak memory up)."""
+    out = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        if r["rows_per_s"] < b["rows_per_s"] * (1 - tolerance):
+            out.append(f"{name}: {r['rows_per_s']:,} rows/s vs "
+                       f"{b['rows_per_s']:,} baseline")
+        if r.get("peak_mib") and b.get("peak_mib") \
+                and r["peak_mib"] > b["peak_mib"] * (1 + tolerance):
+            out.append(f"{name}: peak {r['peak_mib']} MiB vs "
+                       f"{b['peak_mib']} MiB baseline")
+    return out
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    p.add_argument("--orgs", type=int, default=120_000)
+    p.add_argument("--ads", type=int, default=20_000)
+    p.add_argument("--only", default="", help="comma-separated stage names: "
+                                              + ",".join(STAGES))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no_memory", action="store_true",
+                   help="skip the tracemalloc pass")
+    p.add_argument("--baseline", default=str(BASELINE))
+    p.add_argument("--tolerance", type=float, default=0.2)
+    p.add_argument("--record", "--save", dest="record", action="store_true",
+                   help="write these results as the new baseline")
+    p.add_argument("--json", default="", help="also write results here")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    log.setLevel(logging.INFO)   # the loader's per-page INFO lines stay quiet
+
+    names = [s.strip() for s in args.only.split(",") if s.strip()] or list(STAGES)
+    unknown = set(names) - set(STAGES)
+    if unknown:
+        sys.exit(f"  Unknown stages: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="visapath_bench_") as tmp:
+        ctx = prepare(Path(tmp), args.orgs, args.ads)
+        results = {}
+        for name in names:
+            results[name] = measure(STAGES[name], ctx, args.repeat,
+                                    not args.no_memory)
+            r = results[name]
+            print(f"{name:<15} {r['rows']:>8,} rows  {r['seconds']:>7.2f}s  "
+                  f"{r['rows_per_s']:>10,} rows/s  "
+                  f"peak {r.get('peak_mib', '-')} MiB  "
+                  f"p50/p95 {r['p50_ms']}/{r['p95_ms']} ms")
+
+    report = dict(sizes=dict(orgs=args.orgs, ads=args.ads),
+                  machine=dict(python=platform.python_version(),
+                               platform=platform.platform(),
+                               cpus=os.cpu_count()),
+                  stages=results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    base_path = Path(args.baseline)
+    if args.record:
+        if base_path.exists():          # keep stages not re-run this time
+            old = json.loads(base_path.read_text(encoding="utf-8"))
+            if old.get("sizes") == report["sizes"]:
+                report["stages"] = {**old["stages"], **results}
+        base_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"  Baseline saved: {base_path}")
+        return 0
+    if not base_path.exists():
+        print(f"  No baseline at {base_path} (run with --record)")
+        return 0
+    baseline = json.loads(base_path.read_text(encoding="utf-8"))
+    if baseline.get("sizes") != report["sizes"]:
+        print(f"  Baseline sizes {baseline.get('sizes')} differ – not compared")
+        return 0
+    regressions = compare(results, baseline["stages"], args.tolerance)
+    for msg in regressions:
+        print(f"  REGRESSION {msg}")
+    if not regressions:
+        print(f"  No regression beyond {args.tolerance:.0%} of the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+# bench/synthetic.py – v0.1  (ASCII-only)
+"""
+Deterministic synthetic inputs for the offline benchmarks.
+
+• ``synthetic_register(n_orgs)`` – raw GOV.UK register layout
+  (Organisation Name, Town/City, County, Type & Rating, Route).  Names
+  follow the register's mix: surname / partnership / descriptive / care
+  home / initials / numeric-leading / "T/A" trading names, a few accents,
+  suffixes Ltd / Limited / LLP / PLC; towns are Zipf-distributed (London
+  heavy), ~15 % of organisations hold more than one route.
+• ``synthetic_ads(n, register_names)`` – Adzuna ads in the shape of
+  etl/data/*.json; about a third are posted by register sponsors under
+  the usual variations (case, suffix dropped or changed, "UK", trading
+  name), the rest by agencies and non-sponsors.  Descriptions carry
+  positive / negative sponsorship phrases at realistic rates.
+
+Same seed, same data – results stay comparable across runs.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+SEED = 20250725
+
+SURNAMES = """Smith Jones Taylor Brown Williams Wilson Johnson Davies Patel Robinson
+Wright Thompson Evans Walker White Roberts Green Hall Thomas Clarke Jackson Wood
+Harris Edwards Turner Martin Cooper Hill Ward Hughes Moore Clark King Harrison
+Lewis Baker Lee Allen Morris Khan Scott Watson Davis Parker James Bennett Young
+Phillips Richardson Mitchell Bailey Carter Cook Singh Shaw Bell Collins Morgan
+Kelly Begum Miller Cox Marshall Ahmed Simpson Anderson Ali Hussain Chapman Mason
+Hunt Palmer Murphy Campbell Holmes Chen Wang Nguyen Okafor Adeyemi Kowalski Novak
+Rossi Fernandes Silva Sharma Gupta Shah Mensah Osei Murray Reid Stewart Graham""".split()
+
+ADJECTIVES = """Royal Bright Global Premier United Northern Southern Eastern Western
+Central Golden Green Blue Silver New Modern Smart Prime Elite First Advanced
+Applied Integrated Digital Quantum Coastal Highland Riverside Oak Cedar Apex
+Summit Harbour Meridian Crown Phoenix Horizon Evergreen Sterling Vertex""".split()
+
+NOUNS = """Bridge Gate Point Field Stone Park Hill Valley Star Tree Lake Wave Peak
+Light Path Vision Solutions Partners Systems Networks Labs Works Studio Ventures
+Dynamics Logic Analytics Capital Health Care Foods Homes Estates Engineering
+Logistics Consulting Technologies Software Data Media Energy Pharma""".split()
+
+INDUSTRIES = """Care Services|Healthcare|Consulting|Technologies|Solutions|Restaurant|
+Engineering|Construction|Logistics|Recruitment|Software|Catering|Medical|Dental|
+Pharmacy|Properties|Trading|Manufacturing|Foods|Textiles|Education|Academy|
+Security Services|Cleaning Services|Transport|Digital|IT Services|Accountants|
+Solicitors|Architects|Design|Hospitality|Nursing Home|Home Care|Retail""".replace(
+    "\n", "").split("|")
+
+SUFFIXES = (["Ltd"] * 55 + ["Limited"] * 35 + ["LLP"] * 4 + ["PLC"] * 2
+            + ["Ltd."] * 2 + ["UK Ltd"] * 2)
+
+ACCENTED = ["Caf\u00e9", "Cr\u00eaperie", "P\u00e2tisserie", "Brasserie Zo\u00eb",
+            "Soci\u00e9t\u00e9", "M\u00fcller", "Jos\u00e9", "Sm\u00f6rg\u00e5s",
+            "Fran\u00e7oise", "\u0141\u00f3d\u017a"]
+
+TOWNS = ("London, London, London, Birmingham, Manchester, Leeds, Glasgow, "
+         "Liverpool, Bristol, Sheffield, Edinburgh, Leicester, Coventry, "
+         "Bradford, Cardiff, Belfast, Nottingham, Newcastle upon Tyne, "
+         "Southampton, Reading, Derby, Plymouth, Wolverhampton, Stoke-on-Trent, "
+         "Milton Keynes, Northampton, Luton, Portsmouth, Aberdeen, Norwich, "
+         "Swansea, Bournemouth, Southend-on-Sea, Swindon, Dundee, Huddersfield, "
+         "Oxford, Cambridge, Middlesbrough, Blackpool, Bolton, Ipswich, York, "
+         "Peterborough, Slough, Gloucester, Watford, Exeter, Chelmsford, "
+         "Crawley, Warrington, Brighton, Hull, Preston, Sunderland, Croydon, "
+         "Harrow, Ilford, Wembley, Hounslow, Romford, Uxbridge, Guildford, "
+         "Maidstone, Basildon, Colchester, Lincoln, Worcester, Chester, Bath, "
+         "Canterbury, Stockport, Wigan, Oldham, Rochdale, Salford, Walsall, "
+         "Dudley, Solihull, Telford").split(", ")
+
+COUNTIES = ["Greater London", "West Midlands", "Greater Manchester",
+            "West Yorkshire", "Lanarkshire", "Merseyside", "Avon",
+            "South Yorkshire", "Midlothian", "Leicestershire", "Kent", "Essex",
+            "Surrey", "Hampshire", "Berkshire", "Oxfordshire",
+            "Cambridgeshire", "Lancashire", "Tyne and Wear", "Devon"]
+
+TYPE_RATINGS = [("Worker (A rating)", 0.82), ("Worker (A (Premium))", 0.02),
+                ("Worker (A (SME+))", 0.03), ("Worker (B rating)", 0.03),
+                ("Temporary Worker (A rating)", 0.09),
+                ("Temporary Worker (B rating)", 0.01)]
+
+WORKER_ROUTES = [("Skilled Worker", 0.88),
+                 ("Global Business Mobility: Senior or Specialist Worker", 0.05),
+                 ("Scale-up", 0.01), ("Minister of Religion", 0.02),
+                 ("Global Business Mobility: Graduate Trainee", 0.01),
+                 ("Global Business Mobility: UK Expansion Worker", 0.01),
+                 ("International Sportsperson", 0.02)]
+
+TEMP_ROUTES = [("Creative Worker", 0.35), ("Charity Worker", 0.15),
+               ("Religious Worker", 0.2), ("Government Authorised Exchange", 0.15),
+               ("International Agreement", 0.1), ("Seasonal Worker", 0.05)]
+
+AGENCY_WORDS = ["Recruitment", "Staffing", "Talent", "Resourcing", "People",
+                "Search", "Selection", "Appointments", "Careers", "Personnel"]
+
+TITLES = ["Data Analyst", "Senior Data Analyst", "Software Engineer",
+          "Registered Nurse", "Care Assistant", "Project Manager", "Chef de Partie",
+          "Mechanical Engineer", "Accountant", "Business Analyst",
+          "Healthcare Assistant", "DevOps Engineer", "Teacher", "Pharmacist",
+          "Support Worker", "Data Engineer", "Marketing Executive",
+          "Solicitor", "Dentist", "Warehouse Operative"]
+
+SENTENCES = [
+    "We are looking for a motivated {title} to join our growing team.",
+    "You will work closely with stakeholders across the business.",
+    "The successful candidate will have strong communication skills.",
+    "This is a fantastic opportunity to develop your career.",
+    "We offer a competitive salary of \u00a3{salary:,} plus benefits.",
+    "Hybrid working with two days a week in our {town} office.",
+    "Experience with SQL, Python or Excel is desirable.",
+    "Full training will be provided for the right applicant.",
+    "Our client is a leading organisation in the {industry} sector.",
+    "Join a friendly and supportive environment with real progression.",
+]
+POSITIVE = ["Visa sponsorship is available for this role.",
+            "We are a licensed sponsor and can offer Skilled Worker visa sponsorship.",
+            "Certificate of sponsorship provided for suitable candidates.",
+            "Health and Care Worker visa applicants welcome."]
+NEGATIVE = ["Unfortunately we cannot offer visa sponsorship.",
+            "Applicants must have the right to work in the UK.",
+            "Visa sponsorship is not available for this position.",
+            "No sponsorship - UK nationals only."]
+
+
+def _pick(rng, pairs, size):
+    values, weights = zip(*pairs)
+    p = np.asarray(weights) / sum(weights)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size, p=p)]
+
+
+def _zipf_choice(rng, items, size, a=1.2):
+    ranks = np.arange(1, len(items) + 1)
+    p = ranks ** -a
+    return np.asarray(items, dtype=object)[rng.choice(len(items), size,
+                                                      p=p / p.sum())]
+
+
+def _org_name(rng) -> str:
+    r = rng.random()
+    sur = SURNAMES[min(int(rng.zipf(1.3)) - 1, len(SURNAMES) - 1)]
+    ind = INDUSTRIES[rng.integers(len(INDUSTRIES))]
+    adj = ADJECTIVES[rng.integers(len(ADJECTIVES))]
+    noun = NOUNS[rng.integers(len(NOUNS))]
+    suffix = SUFFIXES[rng.integers(len(SUFFIXES))]
+    if r < 0.28:
+        name = f"{sur} {ind} {suffix}"
+    elif r < 0.40:
+        name = f"{sur} & {SURNAMES[rng.integers(len(SURNAMES))]} {suffix}"
+    elif r < 0.68:
+        name = f"{adj} {noun} {ind} {suffix}"
+    elif r < 0.76:
+        initials = "".join(chr(65 + i) for i in rng.integers(0, 26, 3))
+        name = f"{initials} {ind} {suffix}"
+    elif r < 0.84:
+        town = TOWNS[rng.integers(len(TOWNS))]
+        name = f"{town} {ind} {suffix}"
+    elif r < 0.88:
+        name = f"The {adj} {noun} {('Group', 'Partnership', 'Trust')[rng.integers(3)]}"
+    elif r < 0.91:
+        name = f"{rng.integers(1, 100)} {noun} {ind} {suffix}"
+    elif r < 0.93:
+        name = f"{ACCENTED[rng.integers(len(ACCENTED))]} {noun} {suffix}"
+    else:                                               # trading names
+        name = (f"{sur} {noun} {suffix} T/A {adj} {ind}" if rng.random() < 0.7
+                else f"{adj} {noun} {suffix} trading as {sur} {ind}")
+    return name
+
+
+def synthetic_register(n_orgs: int = 120_000, seed: int = SEED) -> pd.DataFrame:
+    """Raw register frame (GOV.UK column names), ~1.2 rows per organisation."""
+    rng = np.random.default_rng(seed)
+    names: list[str] = []
+    seen: set[str] = set()
+    while len(names) < n_orgs:
+        n = _org_name(rng)
+        if n in seen:                   # the register lists each org once
+            n = f"{n.rsplit(' ', 1)[0]} ({COUNTIES[rng.integers(len(COUNTIES))]}) " \
+                f"{n.rsplit(' ', 1)[-1]}"
+            if n in seen:
+                continue
+        seen.add(n)
+        names.append(n)
+
+    routes_per_org = rng.choice([1, 2, 3], n_orgs, p=[0.85, 0.13, 0.02])
+    org = np.repeat(np.arange(n_orgs), routes_per_org)
+    town = _zipf_choice(rng, TOWNS, n_orgs)
+    county = np.where(rng.random(n_orgs) < 0.6,
+                      np.asarray(COUNTIES, dtype=object)[
+                          rng.integers(0, len(COUNTIES), n_orgs)], "")
+    rating = _pick(rng, TYPE_RATINGS, len(org))
+    temp = np.char.startswith(rating.astype(str), "Temporary")
+    route = np.where(temp, _pick(rng, TEMP_ROUTES, len(org)),
+                     _pick(rng, WORKER_ROUTES, len(org)))
+    df = pd.DataFrame({
+        "Organisation Name": np.asarray(names, dtype=object)[org],
+        "Town/City": town[org],
+        "County": county[org],
+        "Type & Rating": rating,
+        "Route": route,
+    })
+    return df.drop_duplicates(ignore_index=True)
+
+
+def _variant(rng, name: str) -> str:
+    """How a sponsor's name shows up in an ad."""
+    legal = name.split(" T/A ")[0].split(" trading as ")[0]
+    r = rng.random()
+    if " T/A " in name and r < 0.5:
+        return name.split(" T/A ")[1]
+    if r < 0.30:
+        return legal
+    if r < 0.50:
+        return legal.rsplit(" ", 1)[0]                  # suffix dropped
+    if r < 0.62:
+        return legal.upper()
+    if r < 0.72:
+        return legal.rsplit(" ", 1)[0] + " UK"
+    if r < 0.80:
+        return legal.replace(" Ltd", " Limited")
+    if r < 0.88:                                        # typo
+        i = int(rng.integers(1, max(2, len(legal) - 1)))
+        return legal[:i] + legal[i + 1:]
+    return legal.replace("&", "and")
+
+
+def synthetic_ads(n: int = 20_000, register_names=(), *, sponsor_share: float = 0.35,
+                  seed: int = SEED) -> list[dict]:
+    """Adzuna-shaped raw ads (etl/data/*.json layout)."""
+    rng = np.random.default_rng(seed + 1)
+    register_names = list(register_names)
+    agencies = [f"{SURNAMES[i % len(SURNAMES)]} {AGENCY_WORDS[i % len(AGENCY_WORDS)]}"
+                for i in range(400)]
+    start = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    ads = []
+    for i in range(n):
+        if register_names and rng.random() < sponsor_share:
+            company = _variant(rng, register_names[
+                min(int(rng.zipf(1.1)) - 1, len(register_names) - 1)
+                if rng.random() < 0.3 else rng.integers(len(register_names))])
+        elif rng.random() < 0.6:
+            company = agencies[min(int(rng.zipf(1.4)) - 1, len(agencies) - 1)]
+        else:
+            company = _org_name(rng).rsplit(" ", 1)[0]  # non-sponsor employer
+        title = TITLES[rng.integers(len(TITLES))]
+        town = TOWNS[min(int(rng.zipf(1.3)) - 1, len(TOWNS) - 1)]
+        salary = int(rng.integers(22, 90)) * 1_000
+        text = [SENTENCES[j].format(title=title.lower(), salary=salary, town=town,
+                                    industry=INDUSTRIES[rng.integers(len(INDUSTRIES))].lower())
+                for j in rng.choice(len(SENTENCES), 5, replace=False)]
+        r = rng.random()
+        if r < 0.15:
+            text.insert(int(rng.integers(0, 5)), POSITIVE[rng.integers(len(POSITIVE))])
+        elif r < 0.25:
+            text.insert(int(rng.integers(0, 5)), NEGATIVE[rng.integers(len(NEGATIVE))])
+        predicted = rng.random() < 0.4
+        jid = str(5_300_000_000 + i)
+        ads.append({
+            "location": {"display_name": f"{town}, UK",
+                         "__CLASS__": "Adzuna::API::Response::Location",
+                         "area": ["UK", town]},
+            "salary_is_predicted": "1" if predicted else "0",
+            "id": jid,
+            "longitude": round(-3 + rng.random() * 4, 6),
+            "description": " ".join(text)[:500] + "\u2026",
+            "salary_max": salary + (0 if predicted else 5_000),
+            "adref": f"bench{jid}",
+            "redirect_url": f"https://www.adzuna.co.uk/jobs/land/ad/{jid}",
+            "salary_min": salary,
+            "company": {"__CLASS__": "Adzuna::API::Response::Company",
+                        "display_name": company},
+            "contract_type": ("permanent", "contract")[int(rng.random() < 0.2)],
+            "__CLASS__": "Adzuna::API::Response::Job",
+            "created": (start + timedelta(minutes=int(rng.integers(0, 40_000))))
+                       .strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "title": title,
+            "latitude": round(50.5 + rng.random() * 5, 6),
+            "category": {"tag": "it-jobs", "label": "IT Jobs",
+                         "__CLASS__": "Adzuna::API::Response::Category"},
+            "contract_time": "full_time",
+        })
+    return ads
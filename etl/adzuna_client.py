@@ -0,0 +1,260 @@
+# adzuna_client.py – v0.1  (ASCII-only)
+"""
+Importable Adzuna search client for VisaPath AI.
+
+• One pooled ``requests.Session`` per client (keep-alive + gzip), so pages
+  reuse TCP/TLS connections instead of handshaking per request.
+• Shared token-bucket ``RateLimiter``; a 429 pauses every worker.
+• ``iter_jobs(term, city, pages)`` streams ads for one search in-process.
+• ``stream_pages(pairs, pages, workers)`` runs many term/city searches on
+  a bounded thread pool and yields each page as it lands;
+  ``fetch_all`` groups the same stream per pair.
+• Optional ``http_cache.ResponseCache``: pages are served from disk when
+  fresh; in replay mode a miss ends the pair instead of calling the API.
+• Optional ``stop_early(jobs)`` predicate (e.g. ``SeenIndex.all_known``)
+  ends paging for a term/city once a page holds nothing new.
+• Request latency, status codes, retries / 429s, cache hits and time spent
+  in the rate limiter go to ``metrics.METRICS`` (service="adzuna").
+
+No argv parsing, logging setup or filesystem side effects at import time –
+see ``adzuna_job_loader.py`` for the CLI.
+
+    from adzuna_client import AdzunaClient
+    with AdzunaClient() as client:
+        for job in client.iter_jobs("data analyst", "London", pages=3):
+            ...
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import ResponseCache
+from metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+BASE_URL = "https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
+PAGE_SIZE = 100                         # Adzuna maximum
+RETRY_STATUS = {429, 500, 502, 503}
+
+StopFn = Callable[[list[dict]], bool]
+
+
+def _is_last(jobs: list[dict], stop_early: StopFn | None) -> bool:
+    """A short page, or a full page the caller already knows, ends paging."""
+    return len(jobs) < PAGE_SIZE or (stop_early is not None
+                                     and stop_early(jobs))
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every fetch worker.
+
+    ``pause()`` imposes a global back-off (e.g. after a 429) so that all
+    workers hold off, not only the one that was throttled.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = max(rate, 0.01)
+        self.capacity = burst or max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.resume_at:
+                    wait = self.resume_at - now
+                else:
+                    self.tokens = min(self.capacity,
+                                      self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+class AdzunaClient:
+    """Pooled, rate-limited client for the Adzuna job search endpoint."""
+
+    def __init__(self, app_id: str | None = None, app_key: str | None = None,
+                 *, country: str = "gb", radius_km: int = 25,
+                 rate: float = 2.0, pool_size: int = 16,
+                 timeout: float = 15, retries: int = 4,
+                 cache: ResponseCache | None = None):
+        self.app_id = app_id or os.getenv("ADZUNA_APP_ID")
+        self.app_key = app_key or os.getenv("ADZUNA_APP_KEY")
+        if not (self.app_id and self.app_key) \
+                and not (cache is not None and cache.replay):
+            raise RuntimeError("Set ADZUNA_APP_ID and ADZUNA_APP_KEY")
+        self.country = country
+        self.radius_km = radius_km
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    # ── lifecycle ────────────────────────────────────────────────────
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "AdzunaClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── single request ───────────────────────────────────────────────
+    def fetch_page(self, term: str, city: str, page: int) -> list[dict]:
+        url = BASE_URL.format(country=self.country, page=page)
+        params = {
+            "app_id": self.app_id,
+            "app_key": self.app_key,
+            "results_per_page": PAGE_SIZE,
+            "what": term,
+            "where": city,
+            "distance": self.radius_km,
+            "content-type": "application/json",
+        }
+        if self.cache is not None:
+            hit = self.cache.get("adzuna", "GET", url, params)
+            METRICS.inc("http_cache_total", service="adzuna",
+                        result="miss" if hit is None else "hit")
+            if hit is not None:
+                return hit.json().get("results", [])
+            if self.cache.replay:
+                log.warning("Replay miss: %s / %s page %d", term, city, page)
+                return []
+        for attempt in range(self.retries):
+            t0 = time.perf_counter()
+            self.limiter.acquire()
+            t1 = time.perf_counter()
+            METRICS.inc("http_rate_limit_wait_seconds_total", t1 - t0,
+                        service="adzuna")
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                METRICS.inc("http_requests_total", service="adzuna",
+                            code=type(e).__name__)
+                raise
+            METRICS.observe("http_request_seconds", time.perf_counter() - t1,
+                            service="adzuna")
+            METRICS.inc("http_requests_total", service="adzuna",
+                        code=resp.status_code)
+            METRICS.inc("http_bytes_total", len(resp.content), service="adzuna")
+            if resp.status_code == 200:
+                if self.cache is not None:
+                    self.cache.put("adzuna", "GET", url, params, 200,
+                                   resp.headers, resp.content)
+                return resp.json().get("results", [])
+            if resp.status_code in RETRY_STATUS:
+                wait = 2 ** attempt
+                log.warning("Retry %s in %ss (%s)", attempt + 1, wait,
+                            resp.status_code)
+                METRICS.inc("http_retries_total", service="adzuna",
+                            code=resp.status_code)
+                if resp.status_code == 429:
+                    self.limiter.pause(wait)    # throttle every worker
+                time.sleep(wait)
+                continue
+            resp.raise_for_status()
+        return []
+
+    # ── sequential paging ────────────────────────────────────────────
+    def iter_pages(self, term: str, city: str, pages: int,
+                   stop_early: StopFn | None = None
+                   ) -> Iterator[tuple[int, list[dict]]]:
+        """Yield ``(page, jobs)`` until *pages*, the first short page, or a
+        page for which *stop_early* returns True."""
+        for page in range(1, pages + 1):
+            jobs = self.fetch_page(term, city, page)
+            if jobs:
+                yield page, jobs
+            if _is_last(jobs, stop_early):
+                break
+
+    def iter_jobs(self, term: str, city: str, pages: int,
+                  stop_early: StopFn | None = None) -> Iterator[dict]:
+        """Yield individual ads for one term/city search."""
+        for _, jobs in self.iter_pages(term, city, pages, stop_early):
+            yield from jobs
+
+    # ── concurrent fan-out ───────────────────────────────────────────
+    def stream_pages(self, pairs: Iterable[tuple[str, str]], pages: int,
+                     workers: int = 8, stop_early: StopFn | None = None,
+                     start: dict[tuple[str, str], int] | None = None
+                     ) -> Iterator[tuple[str, str, int, list[dict], bool]]:
+        """Fetch many term/city searches concurrently, page by page.
+
+        Up to *workers* pairs are active at once; each pair walks its pages
+        in order and only requests page n+1 after page n came back full (and
+        not rejected by *stop_early*), so no request is wasted past a short
+        page.  Yields ``(term, city, page, jobs, last)`` as pages settle –
+        in page order per pair, interleaved across pairs; ``last`` marks
+        the final page of a pair.  *start* maps a pair to its first page
+        (a resumed run); pairs past *pages* are skipped.
+        """
+        start = start or {}
+        queue = deque(p for p in pairs if start.get(p, 1) <= pages)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            running: dict = {}
+
+            def submit(pair: tuple[str, str], page: int) -> None:
+                running[pool.submit(self.fetch_page, *pair, page)] = (pair, page)
+
+            def begin(pair: tuple[str, str]) -> None:
+                submit(pair, start.get(pair, 1))
+
+            while queue and len(running) < max(1, workers):
+                begin(queue.popleft())
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    pair, page = running.pop(fut)
+                    jobs = fut.result()
+                    last = page >= pages or _is_last(jobs, stop_early)
+                    if not last:
+                        submit(pair, page + 1)
+                    elif queue:
+                        begin(queue.popleft())
+                    yield (*pair, page, jobs, last)
+
+    def fetch_all(self, pairs: Iterable[tuple[str, str]], pages: int,
+                  workers: int = 8, stop_early: StopFn | None = None
+                  ) -> Iterator[tuple[str, str, list[tuple[int, list[dict]]]]]:
+        """Like ``stream_pages`` but yields ``(term, city, [(page, jobs),
+        ...])`` once per pair, after its last page."""
+        got: dict[tuple, list[tuple[int, list[dict]]]] = {}
+        for term, city, page, jobs, last in self.stream_pages(
+                pairs, pages, workers, stop_early):
+            done = got.setdefault((term, city), [])
+            if jobs:
+                done.append((page, jobs))
+            if last:
+                yield term, city, got.pop((term, city))
@@ -1,44 +1,60 @@
-# adzuna_job_loader.py – v0.6  (ASCII-only, future-proof)
+# adzuna_job_loader.py – v0.8  (ASCII-only, future-proof)
 """
-Dynamic Adzuna job fetcher for VisaPath AI.
+Dynamic Adzuna job fetcher for VisaPath AI (CLI around ``adzuna_client``).
 
 • Accepts comma-separated lists of job titles and cities.
 • Reads ADZUNA_APP_ID / ADZUNA_APP_KEY from .env or env vars.
 • Paginates (100 results / page), handles 429/5xx with exponential back-off.
-• Optional --visa_only keyword filter (visa|sponsor|skilled worker).
-• Saves raw JSON and flattened CSV to ./data/<slug>.*
+• Fetches term × city × page concurrently (--workers) behind one shared
+  token-bucket rate limiter (--rate); a 429 pauses every worker.
+• Optional on-disk response cache (--cache_dir, --cache_ttl_h) and an
+  offline --replay mode that serves pages only from that cache.
+• Optional --incremental mode: a persistent SQLite index of seen ad ids
+  (seen_index.py) keeps only new/changed ads and stops paging a term/city
+  once a whole page is already known; nothing is written for a slug
+  without fresh ads.
+• Every ad gets a ``sponsorship_score`` / ``sponsorship_signals`` from the
+  single-pass phrase scanner (sponsorship_signal.py, negations included);
+  --visa_only keeps ads scoring at least --min_signal.
+• Streams each page straight to ./data/<slug>.* – raw JSON and flattened
+  CSV by default, plus JSONL / typed Parquet via --formats (job_io.py).
+• Ads in / out of the fetch, filter and write stages, Adzuna latency,
+  retries and 429s are recorded by metrics.py (--metrics_dir for the
+  Prometheus textfile + JSON report, --profile / --trace_memory).
 
 Run, for example:
     python adzuna_job_loader.py -s "data analyst, project manager" \
-                                -c "London,Remote" --pages 5
+                                -c "London,Remote" --pages 5 --workers 8
 """
 from __future__ import annotations
 
 import argparse
-import csv
 import itertools
-import json
 import logging
-import os
 import re
 import sys
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 
-import requests
 from dotenv import load_dotenv
 
-# ─────────────────────────── ENV / CLI ────────────────────────────────
-load_dotenv()
+from adzuna_client import AdzunaClient
+from http_cache import ResponseCache
+from job_io import FORMATS, JobSink, parquet_schema
+from metrics import METRICS, add_cli
+from seen_index import SeenIndex
+from sponsorship_signal import annotate, sponsor_positive
+
+LOG_ARROW = "->"                                   # ASCII-only arrow
 
 
+# ─────────────────────────── CLI ──────────────────────────────────────
 def _parse_csv(arg: str) -> list[str]:
     """Split comma-separated CLI argument → trimmed list (no empties)."""
     return [t.strip() for t in arg.split(",") if t.strip()]
 
 
-def _cli() -> argparse.Namespace:
+def _cli(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("-s", "--search", default="software engineer",
                    help="Comma-separated list of job titles / keywords")
@@ -51,121 +67,146 @@ def _cli() -> argparse.Namespace:
     p.add_argument("--pages", type=int, default=3,
                    help="Max pages per term/location (100 results each)")
     p.add_argument("--visa_only", action="store_true",
-                   help="Keep ads mentioning visa/sponsor/skilled worker")
+                   help="Keep ads with a positive sponsorship signal score")
+    p.add_argument("--min_signal", type=int, default=1,
+                   help="Minimum sponsorship score kept by --visa_only")
+    p.add_argument("--workers", type=int, default=8,
+                   help="Concurrent HTTP requests in flight (1 = sequential)")
+    p.add_argument("--rate", type=float, default=2.0,
+                   help="Max requests per second shared by all workers")
+    p.add_argument("--cache_dir", default="",
+                   help="Cache raw API responses here (off when empty)")
+    p.add_argument("--cache_ttl_h", type=float, default=6.0,
+                   help="Hours a cached Adzuna page stays fresh")
+    p.add_argument("--cache_mb", type=int, default=512,
+                   help="Cache size cap; least-recently-used pages evicted")
+    p.add_argument("--replay", action="store_true",
+                   help="Offline: serve only from the cache, never call API")
+    p.add_argument("--incremental", action="store_true",
+                   help="Emit only new/changed ads; stop at known pages")
+    p.add_argument("--seen_db", default="",
+                   help="Seen-id index (default <outdir>/seen_jobs.sqlite)")
+    p.add_argument("--formats", default="json,csv",
+                   help="Comma-separated outputs: " + ",".join(FORMATS))
     p.add_argument("--outdir", default="data")
-    return p.parse_args()
-
-
-ARGS = _cli()
-TERMS = _parse_csv(ARGS.search)
-CITIES = _parse_csv(ARGS.city)
-
-APP_ID = os.getenv("ADZUNA_APP_ID")
-APP_KEY = os.getenv("ADZUNA_APP_KEY")
-if not (APP_ID and APP_KEY):
-    sys.exit("  Set ADZUNA_APP_ID and ADZUNA_APP_KEY in .env or env vars")
+    add_cli(p)
+    return p.parse_args(argv)
 
-OUT_DIR = Path(ARGS.outdir)
-OUT_DIR.mkdir(exist_ok=True)
-
-STAMP = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-LOG_ARROW = "->"                                   # ASCII-only arrow
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.StreamHandler(),                                   # console
-        logging.FileHandler(OUT_DIR / f"adzuna_{STAMP}.log",
-                            encoding="utf-8")                      # UTF-8 file
-    ],
-)
 
 # ─────────────────────────── HELPERS ──────────────────────────────────
-BASE_URL = "https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
-
-
 def _slugify(text: str, maxlen: int = 60) -> str:
     text = re.sub(r"[^A-Za-z0-9\-_. ]+", "", text)
     text = re.sub(r"\s+", "_", text).strip("_")
     return text[:maxlen] or "blank"
 
 
-def _fetch_page(term: str, city: str, page: int) -> list[dict]:
-    url = BASE_URL.format(country=ARGS.country, page=page)
-    params = {
-        "app_id": APP_ID,
-        "app_key": APP_KEY,
-        "results_per_page": 100,        # Adzuna maximum
-        "what": term,
-        "where": city,
-        "distance": ARGS.radius_km,
-        "content-type": "application/json",
-    }
-    for attempt in range(4):
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            return resp.json().get("results", [])
-        if resp.status_code in {429, 500, 502, 503}:
-            wait = 2 ** attempt
-            logging.warning("Retry %s in %ss (%s)", attempt + 1, wait,
-                            resp.status_code)
-            time.sleep(wait)
-            continue
-        resp.raise_for_status()
-    return []
-
-
-CSV_FIELDS = [
-    "id", "title", "company", "location", "created", "description",
-    "latitude", "longitude", "salary_min", "salary_max", "redirect_url",
-]
-
-# ─────────────────────────── MAIN LOOP ────────────────────────────────
-for term, city in itertools.product(TERMS, CITIES):
-    slug = f"{_slugify(term)}_{_slugify(city)}_{STAMP}"
-    json_path = OUT_DIR / f"{slug}.json"
-    csv_path = OUT_DIR / f"{slug}.csv"
-    all_jobs: list[dict] = []
-
-    for page in range(1, ARGS.pages + 1):
-        jobs = _fetch_page(term, city, page)
-        if not jobs:
-            break
-
-        if ARGS.visa_only:
-            jobs = [
-                j for j in jobs
-                if any(k in j.get("description", "").lower()
-                       for k in ("visa", "sponsor", "skilled worker"))
-            ]
-
-        all_jobs.extend(jobs)
-        logging.info("%s %s page %d %s %d jobs (total %d)",
-                     slug, LOG_ARROW, page, LOG_ARROW,
-                     len(jobs), len(all_jobs))
-
-    # --- JSON
-    with open(json_path, "w", encoding="utf-8") as f_json:
-        json.dump(all_jobs, f_json, indent=2, ensure_ascii=False)
-
-    # --- CSV
-    with open(csv_path, "w", encoding="utf-8", newline="") as f_csv:
-        writer = csv.writer(f_csv)
-        writer.writerow(CSV_FIELDS)
-        for j in all_jobs:
-            loc = j.get("location", {}).get("display_name", "")
-            writer.writerow([
-                j.get("id"), j.get("title"),
-                j.get("company", {}).get("display_name"),
-                loc, j.get("created"), j.get("description"),
-                j.get("latitude"), j.get("longitude"),
-                j.get("salary_min"), j.get("salary_max"),
-                j.get("redirect_url"),
-            ])
-
-    logging.info("Saved %d jobs %s %s / %s",
-                 len(all_jobs), LOG_ARROW,
-                 json_path.name, csv_path.name)
-
-print("  Completed every search/location combination.")
+# ─────────────────────────── MAIN ─────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    load_dotenv()
+    args = _cli(argv)
+    with METRICS.run("adzuna_job_loader", args):
+        _crawl(args)
+    print(METRICS.summary())
+
+
+def _crawl(args: argparse.Namespace) -> None:
+    terms = _parse_csv(args.search)
+    cities = _parse_csv(args.city)
+
+    out_dir = Path(args.outdir)
+    out_dir.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[
+            logging.StreamHandler(),                               # console
+            logging.FileHandler(out_dir / f"adzuna_{stamp}.log",
+                                encoding="utf-8")                  # UTF-8 file
+        ],
+    )
+
+    cache = None
+    if args.cache_dir or args.replay:
+        cache = ResponseCache(args.cache_dir or out_dir / "http_cache",
+                              max_bytes=args.cache_mb * 2**20,
+                              ttl={"adzuna": args.cache_ttl_h * 3600},
+                              replay=args.replay)
+
+    try:
+        client = AdzunaClient(country=args.country,
+                              radius_km=args.radius_km,
+                              rate=args.rate,
+                              pool_size=max(1, args.workers),
+                              cache=cache)
+    except RuntimeError:
+        sys.exit("  Set ADZUNA_APP_ID and ADZUNA_APP_KEY in .env or env vars")
+
+    seen = None
+    if args.incremental:
+        seen = SeenIndex(args.seen_db or out_dir / "seen_jobs.sqlite")
+        logging.info("Incremental mode %s %d ids already indexed",
+                     LOG_ARROW, len(seen))
+
+    formats = _parse_csv(args.formats)
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        sys.exit(f"  Unknown --formats: {', '.join(sorted(unknown))}")
+    if "parquet" in formats:
+        try:
+            parquet_schema()
+        except RuntimeError as e:
+            sys.exit(f"  {e}")
+
+    sinks: dict[str, JobSink] = {}
+    with client:
+        pages = client.stream_pages(
+            itertools.product(terms, cities), args.pages,
+            workers=args.workers,
+            stop_early=seen.all_known if seen is not None else None)
+        for term, city, page, jobs, last in pages:
+            slug = f"{_slugify(term)}_{_slugify(city)}_{stamp}"
+            METRICS.rows("fetch", rows_out=len(jobs))
+            with METRICS.stage("filter", rows_in=len(jobs)) as st:
+                if seen is not None:
+                    fetched = jobs
+                    jobs = seen.fresh(fetched)
+                jobs = annotate(jobs)
+                if args.visa_only:
+                    jobs = sponsor_positive(jobs, args.min_signal)
+                st.rows_out = len(jobs)
+
+            sink = sinks.get(slug)
+            if sink is None and (jobs or seen is None):
+                sink = sinks[slug] = JobSink(out_dir, slug, formats)
+            if sink is not None:
+                with METRICS.stage("write", rows_in=len(jobs)) as st:
+                    sink.write(jobs)
+                    st.rows_out = len(jobs)
+            if seen is not None:            # only once the page is on disk
+                seen.record(fetched)
+            if jobs:
+                logging.info("%s %s page %d %s %d jobs (total %d)",
+                             slug, LOG_ARROW, page, LOG_ARROW,
+                             len(jobs), sink.count)
+            if not last:
+                continue
+
+            sink = sinks.pop(slug, None)
+            if sink is None:
+                logging.info("%s %s nothing new, skipped", slug, LOG_ARROW)
+                continue
+            sink.close()
+            logging.info("Saved %d jobs %s %s",
+                         sink.count, LOG_ARROW,
+                         " / ".join(p.name for p in sink.paths))
+
+    if seen is not None:
+        seen.close()
+
+    print("  Completed every search/location combination.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# dedup_jobads.py – v0.1  (ASCII-only)
+"""
+Near-duplicate collapse between adzuna_job_loader.py and the Neo4j loaders.
+
+Reads the crawler's job files (json / jsonl / csv / parquet, oldest first),
+assigns every ad to a near-duplicate group (near_dupes.py, persistent across
+runs) and writes ONE ad per group to a JSONL file:
+
+• ``id`` is the group's canonical id (its first-seen ad); when the group was
+  seen again in this input, the newest ad's content is written under it;
+• ``alt_ids`` lists every other Adzuna id of the group, from all runs.
+
+Run, for example:
+    python dedup_jobads.py data/data_analyst_*.jsonl data/pm_*.jsonl
+    python ../pipeline/load_jobads.py data/jobads_dedup_<stamp>.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from job_io import iter_jobs
+from near_dupes import DupIndex
+
+
+def collapse(idx: DupIndex, paths) -> tuple[dict[str, dict], int]:
+    """canonical id → newest raw ad of its group in *paths*, ads read."""
+    groups: dict[str, dict] = {}
+    seen = 0
+    for path in paths:
+        for job in iter_jobs(path, flat=False):
+            if not job.get("id"):
+                continue
+            seen += 1
+            canonical, _ = idx.assign(job)
+            kept = groups.get(canonical)
+            if kept is None or (job.get("created") or "") >= \
+                    (kept.get("created") or ""):
+                groups[canonical] = job
+        idx.commit()
+    return groups, seen
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Collapse near-duplicate job ads")
+    p.add_argument("files", nargs="+", help="job files, oldest first")
+    p.add_argument("--index", default="data/near_dupes.sqlite",
+                   help="persistent MinHash / LSH index")
+    p.add_argument("--threshold", type=float, default=0.8,
+                   help="estimated Jaccard similarity for a duplicate")
+    p.add_argument("--out", default="",
+                   help="output JSONL (default data/jobads_dedup_<stamp>.jsonl)")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    out = Path(args.out or f"data/jobads_dedup_{stamp}.jsonl")
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    with DupIndex(args.index, threshold=args.threshold) as idx:
+        groups, seen = collapse(idx, args.files)
+        with open(out, "w", encoding="utf-8") as f:
+            for canonical, job in groups.items():
+                job = {**job, "id": canonical,
+                       "alt_ids": idx.alternates(canonical)}
+                f.write(json.dumps(job, ensure_ascii=False) + "\n")
+        logging.info("%d ads -> %d groups (%d indexed ads) -> %s",
+                     seen, len(groups), len(idx), out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
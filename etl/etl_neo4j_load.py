@@ -1,35 +1,68 @@
 """
-etl_neo4j_load.py – v1.13-inc
+etl_neo4j_load.py – v1.16-inc
 • Incremental loader: keeps existing data, updates/creates new orgs.
 • Auto-adds `date_added` (first sight) and `last_updated` (every load).
 • Reads EVERY CSV column as str; numeric-leading names preserved.
 • Stores all extra columns on Organisation via `SET o += row.props`.
+• Writes canonical `name_clean` + `trading_name_clean` (name_canon.py) in
+  the same UNWIND – replaces scripts/neo4j/init_name_clean.cypher.
+• `--delta`: per-organisation row hashes (row_hashes.py) are compared with
+  the previous load; only added / changed / removed orgs are sent, each
+  through its own Cypher path.  Removals are soft (`licence_revoked`), and
+  `last_updated` only moves on real changes.  Every load refreshes the
+  stored hashes, so a full load is also a valid delta baseline; it sends
+  every organisation but revokes the removed ones the same way.
+• Row dicts are built column-wise (no iterrows); the load is two-phase:
+    1. pre-MERGE the distinct Location / Route nodes (one session);
+    2. write Organisation batches on `--workers` concurrent sessions.
+  Phase-2 batches only MATCH the shared nodes and never split an
+  organisation, so parallel writers don't race to create them.  Creating
+  the LOCATED_IN / OFFERS_ROUTE edges still locks the Location / Route
+  node, so batches touching the same town or route serialise on it; a
+  deadlock between them is transient and retried by the writer.
+  Writes go through the shared neo4j_writer.Neo4jWriter (pooled driver,
+  adaptive batch size, jittered retry of transient errors, rows/s).
+• A CSV whose sha256 equals the one of the last committed load is skipped
+  before it is read (etl_sponsor_register.py leaves it untouched when the
+  register did not change); `--force` loads anyway.
+• Stages (read / build_rows / shared_nodes / write), Neo4j batch latency
+  and counters are recorded by metrics.py; `--metrics_dir` writes the
+  Prometheus textfile and JSON run report, `--profile` / `--trace_memory`
+  hook cProfile / tracemalloc into chosen stages.
+• After a committed load the dashboard aggregates (query_service.py) are
+  recomputed and stamped with LOAD_TS, which invalidates the dashboard
+  cache; `--aggregates ""` skips it.
 """
 
 from pathlib import Path
-import os, itertools, pandas as pd, time, re
+import argparse, pandas as pd, re
 from datetime import datetime, timezone
-from neo4j import GraphDatabase, exceptions
 from dotenv import load_dotenv
 
+from metrics import METRICS, add_cli
+from name_canon import canonicalize
+from neo4j_writer import Neo4jWriter, close_driver, get_driver, progress
+from query_service import after_load as refresh_aggregates
+from register_fetch import file_sha256
+from row_hashes import RowHashIndex, org_hashes
+
 # ── 0. Paths & env ────────────────────────────────────────────────────
 BASE = Path(r"C:\Users\victo\Documents\Data_Science_Projects\visapath-ai")
 CSV  = BASE / "data" / "sponsor_register_clean.csv"
-load_dotenv(BASE / ".env")
-
-URI  = os.getenv("NEO4J_URI")
-USER = os.getenv("NEO4J_USER", "neo4j")
-PASSWORD  = os.getenv("NEO4J_PASSWORD")
-if not (URI and PWD):
-    raise RuntimeError("Set NEO4J_URI & NEO4J_PASSWORD")
+HASHES = BASE / "data" / "sponsor_row_hashes.sqlite"
+AGGREGATES = BASE / "data" / "aggregates"
 
 # Current load timestamp (UTC ISO-8601)
 LOAD_TS = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 # ── 1. Read CSV (all cells as strings) ───────────────────────────────
-df = pd.read_csv(CSV, skiprows=1, encoding="utf-8-sig",
-                 dtype=str, na_filter=False)
-df.columns = df.columns.str.strip()
+def read_register(path) -> pd.DataFrame:
+    df = pd.read_csv(path, skiprows=1, encoding="utf-8-sig",
+                     dtype=str, na_filter=False)
+    df.columns = df.columns.str.strip()
+    if "name_clean" not in df.columns:      # register cleaned before v1.4.0
+        df = df.join(canonicalize(df["organisation_name"]))
+    return df
 
 # ── 2. Cypher helpers ────────────────────────────────────────────────
 CONSTRAINTS = [
@@ -41,8 +74,20 @@ CONSTRAINTS = [
     "FOR (r:Route) REQUIRE r.name IS UNIQUE"
 ]
 
+# phase 1 – shared nodes, written once before the parallel phase
+SHARED_NODES_CYPHER = """
+UNWIND $locations AS loc
+MERGE (:Location {town: loc.town, county: loc.county})
+WITH count(*) AS _
+UNWIND $routes AS route
+MERGE (:Route {name: route})
+"""
+
+# phase 2 – full load
 UNWIND_CYPHER = """
 UNWIND $rows AS row
+MATCH (l:Location {town: row.town, county: row.county})
+MATCH (r:Route {name: row.route})
 MERGE (o:Organisation {name: row.name})
   ON CREATE SET o.date_added  = row.load_ts,
                 o.type_rating = row.rating,
@@ -50,13 +95,51 @@ MERGE (o:Organisation {name: row.name})
                 o.county      = row.county
   ON MATCH  SET o.last_updated = row.load_ts,
                 o.type_rating  = row.rating
-SET  o += row.props                 // store all extra cols incl. load_ts
-MERGE (l:Location {town: row.town, county: row.county})
-MERGE (r:Route {name: row.route})
+SET  o += row.props,                // store all extra cols incl. load_ts
+     o.name_clean         = row.name_clean,
+     o.trading_name_clean = row.trading_name_clean,
+     o.licence_revoked    = false
+MERGE (o)-[:LOCATED_IN]->(l)
+MERGE (o)-[:OFFERS_ROUTE]->(r)
+"""
+
+# ── delta paths (--delta) ────────────────────────────────────────────
+# added: first sight, or a previously revoked org re-appearing
+ADDED_CYPHER = """
+UNWIND $rows AS row
+MATCH (l:Location {town: row.town, county: row.county})
+MATCH (r:Route {name: row.route})
+MERGE (o:Organisation {name: row.name})
+  ON CREATE SET o.date_added = row.load_ts
+SET  o += row.props,
+     o.type_rating        = row.rating,
+     o.town               = row.town,
+     o.county             = row.county,
+     o.name_clean         = row.name_clean,
+     o.trading_name_clean = row.trading_name_clean,
+     o.licence_revoked    = false,
+     o.last_updated       = row.load_ts
 MERGE (o)-[:LOCATED_IN]->(l)
 MERGE (o)-[:OFFERS_ROUTE]->(r)
 """
 
+# changed: drop the old location / route edges, then re-add via ADDED
+DETACH_EDGES_CYPHER = """
+UNWIND $names AS name
+MATCH (o:Organisation {name: name})-[e:LOCATED_IN|OFFERS_ROUTE]->()
+DELETE e
+"""
+
+# removed: soft delete – node, edges and history are kept
+REMOVED_CYPHER = """
+UNWIND $names AS name
+MATCH (o:Organisation {name: name})
+WHERE coalesce(o.licence_revoked, false) = false
+SET  o.licence_revoked = true,
+     o.revoked_ts      = $load_ts,
+     o.last_updated    = $load_ts
+"""
+
 DELETE_TMPL = (
     "{match} WITH n LIMIT $limit "
     "DETACH DELETE n RETURN count(n) AS deleted"
@@ -87,51 +170,158 @@ def camel_to_snake(col: str) -> str:
     s1 = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", col)
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
 
-# ── 3. Row generator (all columns) ────────────────────────────────────
-def row_iter():
-    for _, r in df.iterrows():
-        name = safe(r["organisation_name"])
-        if not name:
-            continue
-        town   = safe(r["town_city"]) or "<UnknownTown>"
-        county = safe(r["county"])    or "<UnknownCounty>"
-        rating = safe(r["type_rating"])
-        route  = safe(r["route"])     or "<UnknownRoute>"
-
-        props = {camel_to_snake(k): safe(v) for k, v in r.items()}
-        props.update(dict(town=town, county=county,
-                          type_rating=rating,
-                          load_ts=LOAD_TS))
-
-        yield dict(name=name, town=town, county=county,
-                   rating=rating, route=route,
-                   load_ts=LOAD_TS, props=props)
-
-# ── 4. Run ────────────────────────────────────────────────────────────
-cfg = dict(max_connection_lifetime=3600,
-           max_connection_pool_size=50,
-           connection_timeout=30)
-
-print("Connecting to Aura …")
-with GraphDatabase.driver(URI, auth=(USER, PWD), **cfg) as drv:
-    drv.verify_connectivity()
-
-    with drv.session(database="neo4j") as s:
-        # print("Wiping previous data …")            # ← COMMENTED for incremental mode
-        # wipe_previous(s)                           # ← COMMENTED for incremental mode
-        create_constraints(s)
-
-    print(f"Ingesting rows (timestamp {LOAD_TS}) …")
-    BATCH, loaded = 1_000, 0
-    with drv.session(database="neo4j") as s:
-        iterator = row_iter()
-        for chunk in iter(lambda: list(itertools.islice(iterator, BATCH)), []):
-            try:
-                s.execute_write(lambda tx: tx.run(UNWIND_CYPHER, rows=chunk))
-            except exceptions.TransientError:
-                s.execute_write(lambda tx: tx.run(UNWIND_CYPHER, rows=chunk))
-            loaded += len(chunk)
-            if loaded % 10_000 == 0:
-                print(f"{loaded:,} rows processed")
-
-print(f"Finished. {loaded:,} rows ingested.")
+# ── 3. Row builder (all columns, column-wise) ─────────────────────────
+def build_rows(frame: pd.DataFrame, load_ts: str = LOAD_TS) -> list[dict]:
+    """Register rows → UNWIND row dicts, one vectorised pass per column."""
+    f = frame.apply(lambda c: c.astype(str).str.strip())
+    f = f[f["organisation_name"] != ""]
+    town   = f["town_city"].replace("", "<UnknownTown>")
+    county = f["county"].replace("", "<UnknownCounty>")
+    route  = f["route"].replace("", "<UnknownRoute>")
+
+    colmap = {c: camel_to_snake(c) for c in f.columns}     # once per frame
+    props = (f.rename(columns=colmap)
+              .assign(town=town, county=county,
+                      type_rating=f["type_rating"], load_ts=load_ts)
+              .to_dict("records"))
+
+    return [dict(name=n, town=t, county=c, rating=r, route=rt,
+                 name_clean=nc, trading_name_clean=tc,
+                 load_ts=load_ts, props=p)
+            for n, t, c, r, rt, nc, tc, p in zip(
+                f["organisation_name"], town, county, f["type_rating"],
+                route, f["name_clean"], f["trading_name_clean"], props)]
+
+def row_iter(frame: pd.DataFrame, load_ts: str = LOAD_TS):
+    yield from build_rows(frame, load_ts)
+
+def org_key(row: dict) -> str:
+    return row["name"]
+
+# ── 4. Writers ────────────────────────────────────────────────────────
+# Rows are sorted by organisation and written with key=org_key, so an
+# organisation is never split across two concurrent batches.
+def write_shared_nodes(writer, rows):
+    locations = {(r["town"], r["county"]) for r in rows}
+    routes = sorted({r["route"] for r in rows})
+    writer.run(lambda tx: tx.run(
+        SHARED_NODES_CYPHER,
+        locations=[dict(town=t, county=c) for t, c in sorted(locations)],
+        routes=routes).consume())
+    return len(locations), len(routes)
+
+def load_full(writer, rows):
+    return writer.write(UNWIND_CYPHER, sorted(rows, key=org_key), key=org_key,
+                        label="org_upsert")
+
+def write_changed(tx, batch):
+    tx.run(DETACH_EDGES_CYPHER, names=sorted({r["name"] for r in batch})).consume()
+    return tx.run(ADDED_CYPHER, rows=batch).consume()
+
+def load_delta(writer, rows, added, changed, removed, load_ts):
+    st = writer.write(ADDED_CYPHER,
+                      sorted((r for r in rows if r["name"] in added), key=org_key),
+                      key=org_key, label="org_added")
+    st_chg = writer.write(write_changed,
+                          sorted((r for r in rows if r["name"] in changed), key=org_key),
+                          key=org_key, label="org_changed")
+    writer.write(REMOVED_CYPHER, sorted(removed), param="names", load_ts=load_ts,
+                 label="org_removed")
+    st.rows += st_chg.rows
+    st.seconds += st_chg.seconds
+    return st
+
+# ── 5. Run ────────────────────────────────────────────────────────────
+def load(args):
+    source = file_sha256(args.csv)
+    with RowHashIndex(args.hash_index) as hashes:
+        if hashes.source() == source and not args.force:
+            print(f"{args.csv} unchanged since the last load "
+                  f"(sha256 {source[:12]}) – nothing to do.")
+            return
+
+    with METRICS.stage("read") as st:
+        df = read_register(args.csv)
+        current = org_hashes(df)
+        st.rows_out = len(df)
+    with METRICS.stage("build_rows", rows_in=len(df)) as st:
+        rows = build_rows(df)
+        st.rows_out = len(rows)
+    print(f"Built {len(rows):,} rows in {st.seconds:.1f}s")
+
+    print("Connecting to Aura …")
+    drv = get_driver()
+    writer = Neo4jWriter(drv, workers=args.workers, batch_size=args.batch,
+                         on_batch=progress())
+    try:
+        with RowHashIndex(args.hash_index) as hashes:
+            with drv.session(database="neo4j") as s:
+                # print("Wiping previous data …")            # ← COMMENTED for incremental mode
+                # wipe_previous(s)                           # ← COMMENTED for incremental mode
+                create_constraints(s)
+
+            # removals are applied in full mode too – the commit below drops
+            # their hashes, so no later --delta would see them again
+            added, changed, removed = hashes.diff(current)
+            if args.delta:
+                print(f"Delta (timestamp {LOAD_TS}): {len(added):,} added, "
+                      f"{len(changed):,} changed, {len(removed):,} removed "
+                      f"of {len(current):,} organisations")
+                rows = [r for r in rows
+                        if r["name"] in added or r["name"] in changed]
+
+            with METRICS.stage("shared_nodes"):
+                n_loc, n_route = write_shared_nodes(writer, rows) if rows else (0, 0)
+            print(f"Pre-merged {n_loc:,} locations / {n_route:,} routes")
+
+            print(f"Ingesting rows (timestamp {LOAD_TS}, {args.workers} workers) …")
+            with METRICS.stage("write", rows_in=len(rows)) as st:
+                if args.delta:
+                    stats = load_delta(writer, rows, added, changed, removed, LOAD_TS)
+                else:
+                    stats = load_full(writer, rows)
+                    if removed:
+                        print(f"Revoking {len(removed):,} organisations no "
+                              f"longer on the register")
+                        writer.write(REMOVED_CYPHER, sorted(removed),
+                                     param="names", load_ts=LOAD_TS,
+                                     label="org_removed")
+                st.rows_out = stats.rows
+
+            hashes.commit(current, LOAD_TS, source)   # only after a clean load
+
+        if args.aggregates:
+            print("Refreshing dashboard aggregates …")
+            refresh_aggregates(drv, args.aggregates, LOAD_TS)
+    finally:
+        close_driver()
+
+    print(f"Finished. {stats.rows:,} rows ingested "
+          f"({stats.rows_per_s:,.0f} rows/s).")
+
+def main():
+    cli = argparse.ArgumentParser(description="Load the sponsor register into Neo4j")
+    cli.add_argument("--csv", default=str(CSV))
+    cli.add_argument("--delta", action="store_true",
+                     help="send only added / changed / removed organisations")
+    cli.add_argument("--hash_index", default=str(HASHES),
+                     help="per-organisation row-hash snapshot (SQLite)")
+    cli.add_argument("--workers", type=int, default=4,
+                     help="concurrent write sessions for Organisation batches")
+    cli.add_argument("--batch", type=int, default=1_000)
+    cli.add_argument("--aggregates", default=str(AGGREGATES),
+                     help="dashboard aggregates dir, refreshed after the load "
+                          "(\"\" to skip)")
+    cli.add_argument("--force", action="store_true",
+                     help="load even if the CSV is unchanged since the last load")
+    add_cli(cli)
+    args = cli.parse_args()
+
+    load_dotenv(BASE / ".env")
+    with METRICS.run("etl_neo4j_load", args):
+        load(args)
+    print(METRICS.summary())
+
+
+if __name__ == "__main__":
+    main()
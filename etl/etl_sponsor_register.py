@@ -1,19 +1,50 @@
 """
-etl_sponsor_register.py – v1.2.4
+etl_sponsor_register.py – v1.6.0
 Download & clean the UK Home-Office sponsor register.
-
-Creates timestamped outputs in /data/:
-  • sponsor_register_raw_YYYY-MM-DD.csv/.xlsx     (original download)
-  • sponsor_register_clean_YYYY-MM-DD.csv         (comma, BOM, Excel-friendly)
-  • sponsor_register_clean_excel_YYYY-MM-DD.csv   (semicolon, BOM – Excel-safe)
-  • sponsor_register_clean_YYYY-MM-DD.xlsx        (native workbook)
+Adds `name_clean` / `trading_name_clean` (name_canon.py) to the clean files
+(cleaning rules: register_clean.py).
+
+Each day's cleaned register goes into the snapshot store (register_store.py,
+data/register_store): a dictionary-encoded Parquet base plus an append-only
+change log, so history no longer costs a full copy per day.
+
+The GOV.UK page goes through the on-disk response cache (data/http_cache,
+24 h TTL; `--no_cache` fetches it plainly).  The register file itself is a
+conditional GET (register_fetch.py): ETag / Last-Modified of the last
+download, Range resume of an interrupted one, and a sha256 of the body.
+When the register is unchanged – 304, or identical bytes re-published –
+the run stops before cleaning, and sponsor_register_clean.csv is left
+byte-identical, so etl_neo4j_load.py and the match memo skip it as well.
+`--replay` re-processes the last download offline.
+
+Each section is a metrics.py stage (locate / download / clean / store /
+export: seconds, rows in / out, peak RSS); `--metrics_dir` writes the
+Prometheus textfile and JSON run report, `--profile clean` / `--trace_memory`
+hook cProfile / tracemalloc into a stage.
+
+Creates in /data/:
+  • sponsor_register_raw_YYYY-MM-DD.csv/.xlsx     (original download, only
+                                                   on days it changed)
+  • sponsor_register_fetch.json                   (ETag / sha256 of it)
+  • register_store/                               (all cleaned snapshots)
+  • sponsor_register_clean.csv                    (latest; comma, BOM – the
+                                                   etl_neo4j_load.py input)
+  • with --excel: sponsor_register_clean_excel_YYYY-MM-DD.csv (semicolon)
+                  and sponsor_register_clean_YYYY-MM-DD.xlsx; any other day:
+                  python register_store.py export --date … --format xlsx
 """
 
-import os, re, requests, pandas as pd
+import os, re, sys, argparse, requests
 from bs4 import BeautifulSoup
 from datetime import date
 from pathlib import Path
 
+from http_cache import ResponseCache, CacheMiss
+from metrics import METRICS, add_cli
+from register_clean import clean_register, read_raw
+from register_fetch import fetch, load_state
+from register_store import RegisterStore, export_frame
+
 # ───── CONFIG ─────────────────────────────────────────────────────────
 BASE_DIR = r"C:\Users\victo\Documents\Data_Science_Projects\visapath-ai"
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -22,79 +53,120 @@ os.makedirs(DATA_DIR, exist_ok=True)
 PAGE_URL = "https://www.gov.uk/government/publications/register-of-licensed-sponsors-workers"
 HEADERS  = {"User-Agent": "Mozilla/5.0 (VisaPath ETL 1.2.4)"}
 TODAY    = date.today().isoformat()
+FETCH_STATE = os.path.join(DATA_DIR, "sponsor_register_fetch.json")
+CLEAN_CSV   = os.path.join(DATA_DIR, "sponsor_register_clean.csv")
+
+cli = argparse.ArgumentParser(description="Download & clean the sponsor register")
+cli.add_argument("--cache_dir", default=os.path.join(DATA_DIR, "http_cache"))
+cli.add_argument("--no_cache", action="store_true",
+                 help="Always hit GOV.UK (no response cache)")
+cli.add_argument("--replay", action="store_true",
+                 help="Offline: page from the cache, re-process the last download")
+cli.add_argument("--force", action="store_true",
+                 help="Clean and store even if the register is unchanged")
+cli.add_argument("--store", default=os.path.join(DATA_DIR, "register_store"),
+                 help="Parquet snapshot store (base + change log)")
+cli.add_argument("--excel", action="store_true",
+                 help="Also write today's semicolon CSV and XLSX")
+add_cli(cli)
+ARGS = cli.parse_args()
+METRICS.start("etl_sponsor_register", ARGS, at_exit=True)
+CACHE = None if ARGS.no_cache else ResponseCache(ARGS.cache_dir,
+                                                 replay=ARGS.replay)
+
+
+def http(method, url, **kw):
+    """requests.request via the response cache (when enabled)."""
+    with METRICS.timer("http_request_seconds", service="govuk"):
+        if CACHE is None:
+            return requests.request(method, url, headers=HEADERS, **kw)
+        try:
+            return CACHE.fetch(requests, "govuk", method, url,
+                               headers=HEADERS, **kw)
+        except CacheMiss as e:
+            sys.exit(f" {e}")
 
 # ───── 1. Locate current asset link ───────────────────────────────────
 print(" Looking for latest sponsor register …")
-html  = requests.get(PAGE_URL, headers=HEADERS, timeout=30).text
-soup  = BeautifulSoup(html, "html.parser")
-href  = next((a["href"] for a in soup.select("a[href]")
-              if re.search(r"Worker_and_Temporary_Worker\.(csv|xlsx)$", a["href"])),
-             None)
+with METRICS.stage("locate"):
+    html  = http("GET", PAGE_URL, timeout=30).text
+    soup  = BeautifulSoup(html, "html.parser")
+    href  = next((a["href"] for a in soup.select("a[href]")
+                  if re.search(r"Worker_and_Temporary_Worker\.(csv|xlsx)$", a["href"])),
+                 None)
 if not href:
     raise RuntimeError(" Could not find register link on GOV.UK")
 
 ext = href.split(".")[-1].lower()
 raw_path = os.path.join(DATA_DIR, f"sponsor_register_raw_{TODAY}.{ext}")
 
-# ───── 2. Download only if new (check file size) ─────────────────────
+# ───── 2. Download only if changed (register_fetch.py) ───────────────
 print(" Checking for updates …")
-new_file_size = int(requests.head(href, headers=HEADERS).headers.get("Content-Length", 0))
-
-if os.path.exists(raw_path):
-    local_file_size = os.path.getsize(raw_path)
-    if local_file_size == new_file_size:
-        print(" Latest version already downloaded.")
-    else:
-        print(" File updated – redownloading …")
-        os.remove(raw_path)  # delete old partial
+if ARGS.replay:
+    raw_path = load_state(FETCH_STATE).get("path")
+    if not raw_path or not os.path.exists(raw_path):
+        sys.exit(f" --replay: no previous download recorded in {FETCH_STATE}")
+    print(f" Replaying {raw_path}")
 else:
-    print("  New file available – downloading …")
-
-if not os.path.exists(raw_path):
-    with requests.get(href, headers=HEADERS, stream=True, timeout=120) as r:
-        r.raise_for_status()
-        with open(raw_path, "wb") as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
-    print(f" Saved: {raw_path}")
-
-# ───── 3. Load into DataFrame ─────────────────────────────────────────
+    try:
+        with METRICS.stage("download"):
+            got = fetch(href, raw_path, state=FETCH_STATE, headers=HEADERS)
+    except (requests.RequestException, RuntimeError) as e:
+        sys.exit(f" Download failed: {e}  (re-run to resume)")
+    raw_path = str(got.path)
+    if got.status == "downloaded":
+        print(f" Saved: {raw_path}  (sha256 {got.sha256[:12]})")
+    elif got.status == "not-modified":
+        print(" Not modified since the last download.")
+    else:
+        print(f" Re-published with identical content (sha256 {got.sha256[:12]}).")
+    if not got.changed and os.path.exists(CLEAN_CSV) and not ARGS.force:
+        print(" Register unchanged – cleaning, snapshot and exports skipped "
+              "(--force re-runs them).")
+        METRICS.done()
+        sys.exit(0)
+
+# ───── 3. Load & clean (register_clean.py) ───────────────────────────
 print(" Loading data …")
-if ext == "csv":
-    df = pd.read_csv(raw_path, dtype=str)
-else:
-    df = pd.read_excel(raw_path, engine="openpyxl")
-
-# ───── 4. Clean data ──────────────────────────────────────────────────
-df = df.rename(columns=str.strip)
-df.columns = (df.columns.str.lower()
-                        .str.replace(r"[^\w]+", "_", regex=True)
-                        .str.strip("_"))
-
-df = df.dropna(subset=["organisation_name", "town_city"]).drop_duplicates()
-
-# ───── 5. Save cleaned versions ───────────────────────────────────────
-csv_main   = os.path.join(DATA_DIR, f"sponsor_register_clean_{TODAY}.csv")
-csv_excel  = os.path.join(DATA_DIR, f"sponsor_register_clean_excel_{TODAY}.csv")
-xlsx_path  = os.path.join(DATA_DIR, f"sponsor_register_clean_{TODAY}.xlsx")
-
-# (a) Comma CSV – for pipelines / Neo4j
-with open(csv_main, "w", encoding="utf-8-sig", newline="") as f:
-    f.write("sep=,\n")
-    df.to_csv(f, index=False, encoding="utf-8-sig")
-
-# (b) Semicolon CSV – for Excel preview
-with open(csv_excel, "w", encoding="utf-8-sig", newline="") as f:
-    f.write("sep=;\n")
-    df.to_csv(f, sep=";", index=False, encoding="utf-8-sig")
-
-# (c) Excel XLSX
-with pd.ExcelWriter(xlsx_path, engine="openpyxl") as writer:
-    df.to_excel(writer, index=False, sheet_name="AllRoutes")
-
-# ───── 6. Done ────────────────────────────────────────────────────────
+with METRICS.stage("clean") as st:
+    raw = read_raw(raw_path)
+    df = clean_register(raw)
+    st.rows_in, st.rows_out = len(raw), len(df)
+del raw
+
+# ───── 4. Save cleaned versions ───────────────────────────────────────
+store = RegisterStore(ARGS.store)
+with METRICS.stage("store", rows_in=len(df)) as st:
+    entry = store.put(TODAY, df)
+    st.rows_out = entry["added"] + entry["removed"]
+print(f" Snapshot {TODAY}: {entry['kind']} "
+      f"(+{entry['added']:,} / -{entry['removed']:,} rows)")
+
+# (a) Comma CSV – for pipelines / Neo4j (latest only; history is in the store).
+#     Same rows as yesterday: keep the file byte-identical for downstream skips
+csv_main = CLEAN_CSV
+with METRICS.stage("export", rows_in=len(df)) as st:
+    if entry["kind"] != "same" or not os.path.exists(CLEAN_CSV):
+        export_frame(df, "csv", CLEAN_CSV)
+        st.rows_out = len(df)
+
+    # (b) Semicolon CSV + XLSX – Excel preview, on demand
+    excel_outputs = []
+    if ARGS.excel:
+        excel_outputs = [store.export(TODAY, "excel_csv", os.path.join(
+                             DATA_DIR, f"sponsor_register_clean_excel_{TODAY}.csv")),
+                         store.export(TODAY, "xlsx", os.path.join(
+                             DATA_DIR, f"sponsor_register_clean_{TODAY}.xlsx"))]
+
+# ───── 5. Done ────────────────────────────────────────────────────────
 print("\n Outputs saved:")
 print(f"   Raw file:         {raw_path}")
+print(f"   Snapshot store:   {ARGS.store} "
+      f"({store.disk_bytes() / 2**20:.1f} MiB, {len(store.entries)} days)")
 print(f"   Clean CSV:        {csv_main}")
-print(f"   Clean Excel CSV:  {csv_excel}")
-print(f"   Clean XLSX:       {xlsx_path}")
+for path in excel_outputs:
+    print(f"   Excel export:     {path}")
+
+print()
+print(METRICS.summary())
+METRICS.done()
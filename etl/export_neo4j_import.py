@@ -0,0 +1,250 @@
+# export_neo4j_import.py – v0.1  (ASCII-only)
+"""
+Cold-start export for ``neo4j-admin database import full``.
+
+Turns the cleaned sponsor register and the Adzuna job-ad snapshots into
+header-annotated node / relationship CSVs, so a fresh database (new Aura
+instance, disaster recovery, staging refresh) is built in one offline pass
+instead of replaying etl_neo4j_load.py through MERGE:
+
+    nodes:  Organisation, Location, Route, JobAd
+    rels:   LOCATED_IN, OFFERS_ROUTE, POSTED_BY
+
+• Organisation properties are exactly what etl_neo4j_load.py writes
+  (``build_rows``); JobAd properties what load_jobads.py +
+  match_jobads_local.py write (typed, ``content_hash``, match score).
+• IDs are de-duplicated: one Organisation per name, one Location per
+  (town, county), one JobAd per id (the last snapshot given wins).
+• POSTED_BY comes from the in-process sponsor matcher behind the match memo.
+• Constraints are not part of the import; the first etl_neo4j_load.py run
+  creates them.
+• ``--commit_hashes`` stores the exported register in the row-hash index,
+  so the next ``etl_neo4j_load.py --delta`` only sends newer changes.
+
+Writes <outdir>/*.csv plus ``import.args``; run, for example:
+    python export_neo4j_import.py --jobs data/*.jsonl --outdir data/bulk
+    neo4j-admin database import full neo4j @data/bulk/import.args
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import sys
+from pathlib import Path
+
+from etl_neo4j_load import CSV, HASHES, LOAD_TS, build_rows, read_register
+from job_io import content_hash, iter_jobs
+from match_memo import MatchMemo, MemoMatcher, register_version
+from row_hashes import RowHashIndex, org_hashes
+from sponsor_matcher import SponsorMatcher
+
+JOB_TYPES = {"latitude": "float", "longitude": "float",
+             "salary_min": "float", "salary_max": "float",
+             "created": "datetime", "salary_is_predicted": "boolean",
+             "area": "string[]", "match_score": "float",
+             "sponsor_possible": "boolean", "routes": "string[]",
+             "last_matched_ts": "datetime", "sponsorship_score": "int",
+             "sponsorship_signals": "string[]", "alt_ids": "string[]"}
+ARRAY_DELIM = ";"
+
+
+def _cell(v) -> str:
+    if v is None:
+        return ""                       # empty cell = property not set
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, (list, tuple)):
+        return ARRAY_DELIM.join(str(x) for x in v)
+    return str(v)
+
+
+class _Table:
+    """One import CSV with a neo4j-admin header row."""
+
+    def __init__(self, path: Path, header: list[str]):
+        self.path = path
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.w = csv.writer(self.f)
+        self.w.writerow(header)
+        self.n = 0
+
+    def write(self, values: list) -> None:
+        self.w.writerow([_cell(v) for v in values])
+        self.n += 1
+
+    def close(self) -> None:
+        self.f.close()
+
+
+def location_id(town: str, county: str) -> str:
+    return f"{town}|{county}"
+
+
+# ─────────────────────────── REGISTER ─────────────────────────────────
+def export_register(df, out: Path, load_ts: str) -> dict[str, list[str]]:
+    """Organisation / Location / Route nodes + LOCATED_IN / OFFERS_ROUTE.
+
+    Returns organisation name → sorted route names (for JobAd.routes).
+    """
+    rows = build_rows(df, load_ts)
+    orgs: dict[str, dict] = {}
+    locs: dict[str, tuple[str, str]] = {}
+    routes: dict[str, set[str]] = {}
+    located: set[tuple[str, str]] = set()
+    for r in rows:
+        props = {**r["props"], "type_rating": r["rating"],
+                 "town": r["town"], "county": r["county"],
+                 "name_clean": r["name_clean"],
+                 "trading_name_clean": r["trading_name_clean"],
+                 "date_added": load_ts}
+        props.pop("name", None)
+        orgs[r["name"]] = props         # last row wins, as with SET o += …
+        lid = location_id(r["town"], r["county"])
+        locs[lid] = (r["town"], r["county"])
+        routes.setdefault(r["name"], set()).add(r["route"])
+        located.add((r["name"], lid))
+
+    cols = list(dict.fromkeys(k for p in orgs.values() for k in p))
+    t = _Table(out / "organisations.csv",
+               ["name:ID(Organisation)", *cols, ":LABEL"])
+    for name, p in orgs.items():
+        t.write([name, *(p.get(c) for c in cols), "Organisation"])
+    t.close()
+
+    t = _Table(out / "locations.csv",
+               [":ID(Location)", "town", "county", ":LABEL"])
+    for lid, (town, county) in locs.items():
+        t.write([lid, town, county, "Location"])
+    t.close()
+
+    t = _Table(out / "routes.csv", ["name:ID(Route)", ":LABEL"])
+    for name in sorted({rt for s in routes.values() for rt in s}):
+        t.write([name, "Route"])
+    t.close()
+
+    t = _Table(out / "located_in.csv",
+               [":START_ID(Organisation)", ":END_ID(Location)", ":TYPE"])
+    for name, lid in sorted(located):
+        t.write([name, lid, "LOCATED_IN"])
+    t.close()
+
+    t = _Table(out / "offers_route.csv",
+               [":START_ID(Organisation)", ":END_ID(Route)", ":TYPE"])
+    for name in orgs:
+        for rt in sorted(routes[name]):
+            t.write([name, rt, "OFFERS_ROUTE"])
+    t.close()
+
+    logging.info("Register: %d organisations, %d locations, %d routes",
+                 len(orgs), len(locs), len({rt for s in routes.values()
+                                            for rt in s}))
+    return {n: sorted(s) for n, s in routes.items()}
+
+
+# ─────────────────────────── JOB ADS ──────────────────────────────────
+def export_jobs(paths, out: Path, matcher, org_routes, load_ts: str,
+                batch: int = 1_000) -> tuple[int, int]:
+    jobs: dict[str, dict] = {}
+    for path in paths:                  # later snapshots overwrite earlier
+        for row in iter_jobs(path):
+            if row["id"]:
+                row["content_hash"] = content_hash(row)
+                jobs[row["id"]] = row
+
+    ids = list(jobs)
+    posted: list[tuple[str, str, float]] = []
+    for i in range(0, len(ids), batch):
+        chunk = [jobs[k] for k in ids[i:i + batch]]
+        for job, m in zip(chunk, matcher.match_many([j["company"]
+                                                     for j in chunk])):
+            if m is None or m.org not in org_routes:
+                continue
+            job.update(sponsor_possible=True, match_score=m.score,
+                       routes=org_routes[m.org], last_matched_ts=load_ts)
+            posted.append((job["id"], m.org, m.score))
+
+    cols = list(dict.fromkeys(k for j in jobs.values() for k in j if k != "id"))
+    header = [f"{c}:{JOB_TYPES[c]}" if c in JOB_TYPES else c for c in cols]
+    t = _Table(out / "jobads.csv", ["id:ID(JobAd)", *header, ":LABEL"])
+    for jid, j in jobs.items():
+        t.write([jid, *(j.get(c) for c in cols), "JobAd"])
+    t.close()
+
+    t = _Table(out / "posted_by.csv",
+               [":START_ID(JobAd)", ":END_ID(Organisation)",
+                "match_score:float", ":TYPE"])
+    for jid, org, score in posted:
+        t.write([jid, org, score, "POSTED_BY"])
+    t.close()
+    return len(jobs), len(posted)
+
+
+IMPORT_ARGS = """\
+--nodes=Organisation={out}/organisations.csv
+--nodes=Location={out}/locations.csv
+--nodes=Route={out}/routes.csv
+--nodes=JobAd={out}/jobads.csv
+--relationships=LOCATED_IN={out}/located_in.csv
+--relationships=OFFERS_ROUTE={out}/offers_route.csv
+--relationships=POSTED_BY={out}/posted_by.csv
+--array-delimiter={delim}
+--multiline-fields=true
+--overwrite-destination=true
+"""
+
+
+# ─────────────────────────── CLI ──────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Export neo4j-admin import CSVs")
+    p.add_argument("--register", default=str(CSV),
+                   help="cleaned sponsor register CSV")
+    p.add_argument("--jobs", nargs="*", default=[],
+                   help="job-ad snapshots (json/jsonl/csv/parquet), oldest first")
+    p.add_argument("--outdir", default="data/neo4j_import")
+    p.add_argument("--memo", default="data/match_memo.sqlite",
+                   help="company → sponsor memo (empty string disables)")
+    p.add_argument("--commit_hashes", action="store_true",
+                   help="record the exported register as the --delta baseline")
+    p.add_argument("--hash_index", default=str(HASHES))
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    out = Path(args.outdir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    df = read_register(args.register)
+    org_routes = export_register(df, out, LOAD_TS)
+
+    def load_matcher():
+        return SponsorMatcher.from_register_csv(args.register)
+
+    memo = None
+    if args.memo:
+        memo = MatchMemo(args.memo, register_version(args.register))
+        matcher = MemoMatcher(memo, load_matcher)
+    else:
+        matcher = load_matcher()
+    try:
+        n_jobs, n_posted = export_jobs(args.jobs, out, matcher, org_routes,
+                                       LOAD_TS)
+    finally:
+        if memo is not None:
+            memo.close()
+    logging.info("Job ads: %d unique, %d POSTED_BY", n_jobs, n_posted)
+
+    (out / "import.args").write_text(
+        IMPORT_ARGS.format(out=out.resolve().as_posix(), delim=ARRAY_DELIM),
+        encoding="utf-8")
+
+    if args.commit_hashes:
+        with RowHashIndex(args.hash_index) as idx:
+            idx.commit(org_hashes(df), LOAD_TS)
+        logging.info("Row-hash baseline updated (%s)", args.hash_index)
+
+    print(f"neo4j-admin database import full neo4j @{out / 'import.args'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
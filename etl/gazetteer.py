@@ -0,0 +1,279 @@
+# gazetteer.py – v0.1  (ASCII-only)
+"""
+Offline gazetteer: register town / county strings -> latitude / longitude.
+
+The sponsor register only has ``town_city`` / ``county`` text; this
+builds a lookup table once, offline, and resolves register locations
+against it without any geocoding API.
+
+Sources, highest priority first (one row per place key):
+
+  seed      gazetteer_seed.csv next to this file – UK cities, large towns,
+            London districts and ceremonial / historic counties;
+  geonames  optional GeoNames country dump (GB.txt from
+            https://download.geonames.org/export/dump/GB.zip): populated
+            places, the most populous one per name;
+  ads       optional Adzuna files (adzuna_job_loader.py output): the
+            median latitude / longitude of the ads per ``location.area``
+            leaf and per first part of ``location.display_name`` (at
+            least --min_ads ads).
+
+    python etl/gazetteer.py build --geonames GB.txt --ads data/*.json
+    python etl/gazetteer.py resolve --register data/sponsor_register_clean.csv
+
+``Gazetteer.resolve(town, county)`` tries the town (whole, then each
+comma-separated part, postcodes dropped), preferring an entry in the
+same county, then falls back to the county centroid; ``precision`` says
+which ("town" / "county" / "").
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import pandas as pd
+
+from geo_index import haversine_km
+from job_io import iter_job_chunks
+
+SEED = Path(__file__).with_name("gazetteer_seed.csv")
+DEFAULT = Path("data") / "gazetteer.csv"
+COLUMNS = ["key", "name", "county", "county_key", "lat", "lon", "kind",
+           "source", "population", "ads"]
+GEONAMES_COLS = {1: "name", 2: "asciiname", 3: "alternates", 4: "lat",
+                 5: "lon", 6: "feature_class", 14: "population"}
+
+_POSTCODE_RE = re.compile(r"\b[a-z]{1,2}\d[a-z\d]?\s*\d[a-z]{2}\b|\b[a-z]{1,2}\d{1,2}[a-z]?\b$")
+_PUNCT_RE = re.compile(r"[^a-z0-9]+")
+_DROP = {"uk", "gb", "united kingdom", "great britain", "england", "scotland",
+         "wales", "northern ireland"}
+_PREFIX_RE = re.compile(r"^(?:the |city of |royal borough of |london borough of "
+                        r"|borough of )")
+_COMPASS_RE = re.compile(r"^(?:(?:north|south|east|west|central|inner|outer|greater)"
+                         r"\s+)+(?=\w)")
+COUNTY_SLACK_KM = 60        # a town this far from the given county is a namesake
+
+
+class Place(NamedTuple):
+    lat: float | None
+    lon: float | None
+    precision: str                      # "town" | "county" | ""
+    name: str
+
+
+NOWHERE = Place(None, None, "", "")
+
+
+def place_key(text) -> str:
+    """Town / county text -> comparison key ("St. Albans" -> "st albans")."""
+    if not isinstance(text, str) or not text.strip():
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = text.encode("ascii", "ignore").decode("ascii").lower().strip()
+    text = _POSTCODE_RE.sub(" ", text).replace("&", " and ")
+    text = _PUNCT_RE.sub(" ", text).strip()
+    text = re.sub(r"\bsaint\b", "st", text)
+    text = re.sub(r"\b(?:co|county)\b(?= \w)", "county", text)
+    text = _PREFIX_RE.sub("", text)
+    return "" if text in _DROP else " ".join(text.split())
+
+
+def _parts(town: str) -> list[str]:
+    """Whole town string first, then its comma / slash separated parts,
+    then the same without compass prefixes ("West London" -> "london")."""
+    keys = [place_key(town)]
+    keys += [place_key(p) for p in re.split(r"[,/()]", town or "")]
+    keys += [_COMPASS_RE.sub("", k) for k in keys]
+    return [k for i, k in enumerate(keys) if k and k not in keys[:i]]
+
+
+# ─── Sources ────────────────────────────────────────────────────────────────────
+def seed_rows(path: str | Path = SEED) -> pd.DataFrame:
+    seed = pd.read_csv(path, dtype=str, keep_default_na=False)
+    rows = []
+    for r in seed.itertuples(index=False):
+        for alias in [r.name, *filter(None, r.aliases.split("|"))]:
+            rows.append(dict(key=place_key(alias), name=r.name, county=r.county,
+                             lat=float(r.lat), lon=float(r.lon), kind=r.kind,
+                             source="seed", population=0, ads=0))
+    return pd.DataFrame(rows)
+
+
+def geonames_rows(path: str | Path, min_population: int = 1_000) -> pd.DataFrame:
+    """Populated places (feature class P) of a GeoNames country dump."""
+    g = pd.read_csv(path, sep="\t", header=None, usecols=list(GEONAMES_COLS),
+                    dtype=str, keep_default_na=False,
+                    quoting=3).rename(columns=GEONAMES_COLS)
+    g = g[g["feature_class"] == "P"]
+    g = g.assign(population=pd.to_numeric(g["population"], errors="coerce")
+                 .fillna(0).astype(int))
+    g = g[g["population"] >= min_population]
+    out = pd.DataFrame(dict(key=g["asciiname"].map(place_key), name=g["name"],
+                            county="", lat=g["lat"].astype(float),
+                            lon=g["lon"].astype(float), kind="town",
+                            source="geonames", population=g["population"],
+                            ads=0))
+    return (out[out["key"] != ""].sort_values("population", ascending=False)
+               .drop_duplicates("key"))
+
+
+def ad_rows(paths: Iterable[str | Path], min_ads: int = 3) -> pd.DataFrame:
+    """Median coordinates of the ads per area leaf / display-name town."""
+    recs = []
+    for path in paths:
+        for chunk in iter_job_chunks(path, 5_000):
+            for row in chunk:
+                lat, lon = row.get("latitude"), row.get("longitude")
+                if lat is None or lon is None:
+                    continue
+                names = {(row.get("location") or "").split(",")[0]}
+                area = row.get("area") or []
+                if len(area) > 1:           # ["UK", region, ..., leaf]
+                    names.add(area[-1])
+                recs += [(n, lat, lon) for n in names if place_key(n)]
+    if not recs:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.DataFrame(recs, columns=["name", "lat", "lon"])
+    df["key"] = df["name"].map(place_key)
+    g = df.groupby("key").agg(name=("name", "first"), lat=("lat", "median"),
+                              lon=("lon", "median"), ads=("lat", "size"))
+    g = g[g["ads"] >= min_ads].reset_index()
+    return g.assign(county="", kind="town", source="ads", population=0)
+
+
+def build(geonames: str | Path | None = None, ads: Iterable = (),
+          min_ads: int = 3, seed: str | Path = SEED) -> pd.DataFrame:
+    """Merge the sources; the first source to name a place wins."""
+    parts = [seed_rows(seed)]
+    if geonames:
+        parts.append(geonames_rows(geonames))
+    ads = list(ads)
+    if ads:
+        parts.append(ad_rows(ads, min_ads))
+    df = pd.concat(parts, ignore_index=True)
+    df["county_key"] = df["county"].map(place_key)
+    # towns: one row per (key, county); counties: one row per key
+    df = df.drop_duplicates(["kind", "key", "county_key"])
+    towns = df[df["kind"] == "town"]
+    towns = towns[~(towns["county_key"].eq("")
+                    & towns["key"].isin(towns.loc[towns["county_key"] != "", "key"]))]
+    df = pd.concat([towns, df[df["kind"] == "county"]], ignore_index=True)
+    df[["lat", "lon"]] = df[["lat", "lon"]].round(5)
+    return df[COLUMNS].reset_index(drop=True)
+
+
+# ─── Lookup ─────────────────────────────────────────────────────────────────────
+class Gazetteer:
+    def __init__(self, table: pd.DataFrame):
+        self.table = table
+        self.towns: dict[str, list[tuple]] = {}
+        self.counties: dict[str, tuple] = {}
+        for r in table.itertuples(index=False):
+            entry = (float(r.lat), float(r.lon), r.county_key, r.name)
+            if r.kind == "county":
+                self.counties.setdefault(r.key, entry)
+            else:
+                self.towns.setdefault(r.key, []).append(entry)
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT) -> "Gazetteer":
+        """The built table at *path*, or the seed alone if not built yet."""
+        path = Path(path)
+        if not path.exists():
+            return cls(build())
+        return cls(pd.read_csv(path, dtype={"key": str, "county_key": str},
+                               keep_default_na=False))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _county(self, county: str | None) -> tuple | None:
+        return next((self.counties[k] for k in _parts(county or "")
+                     if k in self.counties), None)
+
+    def resolve(self, town: str | None, county: str | None = None) -> Place:
+        ck = place_key(county)
+        area = self._county(county)
+        for key in _parts(town or ""):
+            hits = self.towns.get(key)
+            if hits:
+                lat, lon, hit_county, name = next(
+                    (h for h in hits if ck and h[2] == ck), hits[0])
+                if area is None or hit_county == ck or haversine_km(
+                        lat, lon, area[0], area[1]) <= COUNTY_SLACK_KM:
+                    return Place(lat, lon, "town", name)
+                break                       # namesake elsewhere: use county
+            if key in self.counties:        # "Kent" given as the town
+                lat, lon, _, name = self.counties[key]
+                return Place(lat, lon, "county", name)
+        if area is not None:
+            lat, lon, _, name = area
+            return Place(lat, lon, "county", name)
+        return NOWHERE
+
+    def resolve_frame(self, df: pd.DataFrame, town: str = "town_city",
+                      county: str = "county") -> pd.DataFrame:
+        """lat / lon / geo_precision for every row (one lookup per
+        distinct town / county pair)."""
+        pairs = df[[town, county]].fillna("").astype(str)
+        uniq = pairs.drop_duplicates()
+        found = [self.resolve(t, c) for t, c in zip(uniq[town], uniq[county])]
+        res = pd.DataFrame(
+            dict(lat=[p.lat for p in found], lon=[p.lon for p in found],
+                 geo_precision=[p.precision for p in found]),
+            index=pd.MultiIndex.from_frame(uniq))
+        out = res.reindex(pd.MultiIndex.from_frame(pairs))
+        out.index = df.index
+        return out
+
+
+# ─── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Offline gazetteer for register locations")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="merge seed / GeoNames / ad coordinates")
+    b.add_argument("--geonames", default="", help="GeoNames GB.txt (optional)")
+    b.add_argument("--ads", nargs="*", default=[],
+                   help="Adzuna json / jsonl / csv / parquet files")
+    b.add_argument("--min_ads", type=int, default=3)
+    b.add_argument("--out", default=str(DEFAULT))
+    r = sub.add_parser("resolve", help="coverage of a clean register CSV")
+    r.add_argument("--register", default="data/sponsor_register_clean.csv")
+    r.add_argument("--gazetteer", default=str(DEFAULT))
+    r.add_argument("--unresolved", type=int, default=20,
+                   help="show this many unresolved towns")
+    args = p.parse_args(argv)
+
+    if args.cmd == "build":
+        if args.geonames and not Path(args.geonames).exists():
+            sys.exit(f"  No GeoNames file at {args.geonames}")
+        df = build(args.geonames or None, args.ads, args.min_ads)
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.out, index=False)
+        counts = df.groupby(["source", "kind"]).size()
+        print(f"  {len(df):,} places -> {args.out}")
+        for (source, kind), n in counts.items():
+            print(f"    {source:<9} {kind:<7} {n:>7,}")
+        return 0
+
+    gaz = Gazetteer.load(args.gazetteer)
+    reg = pd.read_csv(args.register, skiprows=1, encoding="utf-8-sig",
+                      dtype=str, na_filter=False)
+    reg.columns = reg.columns.str.strip()
+    geo = gaz.resolve_frame(reg)
+    share = geo["geo_precision"].value_counts(normalize=True)
+    print(f"  {len(reg):,} register rows, {len(gaz):,} places")
+    for prec in ("town", "county", ""):
+        print(f"    {prec or 'unresolved':<10} {share.get(prec, 0):>6.1%}")
+    missing = reg.loc[geo["geo_precision"] == "", "town_city"].value_counts()
+    for town, n in missing.head(args.unresolved).items():
+        print(f"    {n:>6,}  {town}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
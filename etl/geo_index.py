@@ -0,0 +1,139 @@
+# geo_index.py – v0.1  (ASCII-only)
+"""
+In-memory spatial index over lat / lon points (NumPy only).
+
+Points are bucketed on a regular lat / lon grid (``cell_km`` square at the
+equator) and stored sorted by cell, row-major, so a query box is one
+contiguous slice per grid row – two ``searchsorted`` calls, no per-cell
+dicts.  Candidates from the box are then measured exactly (haversine), so
+results are exact; the grid only decides how much is measured.
+
+    idx = GeoIndex(ads["latitude"], ads["longitude"], cell_km=5)
+    hits = idx.within([53.48, 51.51], [-2.24, -0.13], 15)     # list of arrays
+    dist, ind = idx.nearest(lat, lon, k=10)                   # (n, k) each
+
+Indices refer to positions in the input arrays (rows with NaN coordinates
+are skipped), each query's hits sorted by distance.  Good for UK-scale
+data; boxes are not wrapped across the antimeridian.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+EARTH_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km; arguments broadcast like NumPy."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp, dl = p2 - p1, np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _as_batch(lat, lon) -> tuple[np.ndarray, np.ndarray]:
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    if lat.shape != lon.shape:
+        raise ValueError("lat and lon must have the same length")
+    return lat, lon
+
+
+class GeoIndex:
+    def __init__(self, lat, lon, *, cell_km: float = 5.0):
+        lat, lon = _as_batch(lat, lon)
+        ok = np.isfinite(lat) & np.isfinite(lon)
+        self.cell = cell_km / KM_PER_DEG                    # degrees
+        ids = np.flatnonzero(ok)
+        lat, lon = lat[ok], lon[ok]
+        self.lat0 = float(lat.min()) if len(lat) else 0.0
+        self.lon0 = float(lon.min()) if len(lon) else 0.0
+        rows = self._row(lat)
+        cols = self._col(lon)
+        self.ncols = int(cols.max()) + 1 if len(cols) else 1
+        self.nrows = int(rows.max()) + 1 if len(rows) else 1
+        cells = rows * self.ncols + cols
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.ids = ids[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _row(self, lat) -> np.ndarray:
+        return np.floor((np.asarray(lat) - self.lat0) / self.cell).astype(np.int64)
+
+    def _col(self, lon) -> np.ndarray:
+        return np.floor((np.asarray(lon) - self.lon0) / self.cell).astype(np.int64)
+
+    # ── candidates ───────────────────────────────────────────────────
+    def _box(self, lat: float, lon: float, km: float) -> np.ndarray:
+        """Positions (into the sorted arrays) of points in the bounding
+        box of the circle (*lat*, *lon*, *km*)."""
+        dlat = km / KM_PER_DEG
+        edge = min(90.0, abs(lat) + dlat)                   # widest latitude
+        cos = math.cos(math.radians(edge))
+        dlon = 180.0 if cos < 1e-9 else min(180.0, dlat / cos)
+        r0, r1 = self._row(lat - dlat), self._row(lat + dlat)
+        c0, c1 = self._col(lon - dlon), self._col(lon + dlon)
+        r0, r1 = max(int(r0), 0), min(int(r1), self.nrows - 1)
+        c0, c1 = max(int(c0), 0), min(int(c1), self.ncols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(r0, r1 + 1) * self.ncols
+        lo = np.searchsorted(self.cells, rows + c0, side="left")
+        hi = np.searchsorted(self.cells, rows + c1, side="right")
+        spans = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    # ── queries ──────────────────────────────────────────────────────
+    def within(self, lat, lon, radius_km, *, return_distance: bool = False):
+        """Points within *radius_km* of each query point (radius may be
+        one value or one per query).  Returns a list of index arrays, or
+        of ``(indices, km)`` pairs with *return_distance*."""
+        lat, lon = _as_batch(lat, lon)
+        radius = np.broadcast_to(np.asarray(radius_km, dtype=np.float64),
+                                 lat.shape)
+        out = []
+        for qa, qo, r in zip(lat, lon, radius):
+            pos = self._box(qa, qo, r)
+            d = haversine_km(qa, qo, self.lat[pos], self.lon[pos])
+            keep = d <= r
+            pos, d = pos[keep], d[keep]
+            order = np.argsort(d, kind="stable")
+            ids = self.ids[pos[order]]
+            out.append((ids, d[order]) if return_distance else ids)
+        return out
+
+    def nearest(self, lat, lon, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """The *k* nearest points per query: ``(km, indices)``, each of
+        shape (n, k); missing neighbours are ``inf`` / -1."""
+        lat, lon = _as_batch(lat, lon)
+        dist = np.full((len(lat), k), np.inf)
+        ind = np.full((len(lat), k), -1, dtype=np.int64)
+        if not len(self) or k < 1:
+            return dist, ind
+        span = KM_PER_DEG * max(self.nrows, self.ncols) * self.cell
+        for i, (qa, qo) in enumerate(zip(lat, lon)):
+            # grow the box until the k-th candidate lies inside the circle;
+            # everything nearer than it is then in the box as well
+            r = self.cell * KM_PER_DEG
+            while True:
+                pos = self._box(qa, qo, r)
+                d = haversine_km(qa, qo, self.lat[pos], self.lon[pos])
+                done = len(d) >= k and np.partition(d, k - 1)[k - 1] <= r
+                if done or len(pos) == len(self) or r > span + 40_000:
+                    break
+                r *= 2
+            take = np.argsort(d, kind="stable")[:k]
+            dist[i, :len(take)] = d[take]
+            ind[i, :len(take)] = self.ids[pos[take]]
+        return dist, ind
+
+    def count_within(self, lat, lon, radius_km) -> np.ndarray:
+        return np.array([len(h) for h in self.within(lat, lon, radius_km)])
@@ -0,0 +1,156 @@
+# http_cache.py – v0.1  (ASCII-only)
+"""
+Content-addressed on-disk HTTP response cache for the ETL fetchers.
+
+• Key = SHA-256 of the normalised request (method, URL, sorted params)
+  with credentials (``app_key``, ``app_id``) stripped, so keys never embed
+  secrets and survive key rotation.
+• Per-source TTL (e.g. ``adzuna`` 6 h, ``govuk`` 24 h).
+• Size-bounded LRU: hits touch the entry's mtime; the oldest entries are
+  evicted once the cache grows past ``max_bytes``.
+• ``replay=True`` serves only from the cache (ignoring TTL) and raises
+  ``CacheMiss`` instead of touching the network – for offline reruns and
+  benchmarks against recorded responses.
+
+Entry layout: ``<root>/<k[:2]>/<k>.bin`` = one JSON metadata line + body.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+
+log = logging.getLogger(__name__)
+
+SECRET_PARAMS = {"app_key", "app_id"}
+DEFAULT_TTL = {"adzuna": 6 * 3600, "govuk": 24 * 3600}
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class CachedResponse:
+    """Minimal stand-in for ``requests.Response`` built from a cache entry."""
+
+    def __init__(self, status_code: int, headers: dict, content: bytes,
+                 url: str = "", from_cache: bool = True):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(
+                f"HTTP {self.status_code} for {self.url}", response=self)
+
+
+class ResponseCache:
+    def __init__(self, root: str | os.PathLike, *,
+                 max_bytes: int = 512 * 1024 * 1024,
+                 ttl: dict[str, float] | None = None,
+                 replay: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.replay = replay
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.root.glob("*/*.bin"))
+
+    # ── keys ─────────────────────────────────────────────────────────
+    @staticmethod
+    def key(method: str, url: str, params: dict | None = None) -> str:
+        clean = sorted((k, str(v)) for k, v in (params or {}).items()
+                       if k not in SECRET_PARAMS)
+        norm = f"{method.upper()} {url.rstrip('/')}?{urlencode(clean)}"
+        return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.bin"
+
+    # ── read / write ─────────────────────────────────────────────────
+    def get(self, source: str, method: str, url: str,
+            params: dict | None = None) -> CachedResponse | None:
+        path = self._path(self.key(method, url, params))
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        ttl = self.ttl.get(source)
+        if not self.replay and ttl is not None \
+                and time.time() - meta["stored_at"] > ttl:
+            return None
+        with contextlib.suppress(FileNotFoundError):    # evicted meanwhile
+            os.utime(path)                              # LRU touch
+        return CachedResponse(meta["status"], meta["headers"], body, url)
+
+    def put(self, source: str, method: str, url: str, params: dict | None,
+            status: int, headers: dict, body: bytes) -> None:
+        path = self._path(self.key(method, url, params))
+        path.parent.mkdir(exist_ok=True)
+        meta = dict(source=source, method=method.upper(), url=url,
+                    status=status, headers=dict(headers),
+                    stored_at=time.time())
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        with self._lock:
+            old = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._size += path.stat().st_size - old
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until under 90 % of the cap."""
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self.root.glob("*/*.bin"),
+                         key=lambda p: p.stat().st_mtime)
+        for p in entries:
+            if self._size <= target:
+                break
+            size = p.stat().st_size
+            p.unlink(missing_ok=True)
+            self._size -= size
+        log.info("HTTP cache evicted down to %.1f MB", self._size / 2**20)
+
+    # ── fetch-through ────────────────────────────────────────────────
+    def fetch(self, session, source: str, method: str, url: str,
+              params: dict | None = None, **kwargs) -> CachedResponse:
+        """Serve from cache, else perform the request and store 2xx bodies.
+
+        *session* is anything with ``request()`` (``requests`` module or a
+        ``requests.Session``).  In replay mode a miss raises ``CacheMiss``.
+        """
+        hit = self.get(source, method, url, params)
+        if hit is not None:
+            return hit
+        if self.replay:
+            raise CacheMiss(f"{method.upper()} {url} not in cache (replay)")
+        resp = session.request(method, url, params=params, **kwargs)
+        if 200 <= resp.status_code < 300:
+            self.put(source, method, url, params, resp.status_code,
+                     resp.headers, resp.content)
+        return CachedResponse(resp.status_code, dict(resp.headers),
+                              resp.content, url, from_cache=False)
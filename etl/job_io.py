@@ -0,0 +1,288 @@
+# job_io.py – v0.1  (ASCII-only)
+"""
+Streaming writers / chunked readers for Adzuna job-ad files.
+
+Formats (``--formats`` on the loader):
+  • json     pretty array (legacy, byte-identical to ``json.dump(indent=2)``)
+  • csv      flattened CSV_FIELDS (legacy + ``sponsorship_score``)
+  • jsonl    one raw ad per line, appended page by page
+  • parquet  typed columns (float salary / lat / long, UTC ``created``),
+             one row group per page – needs ``pyarrow``
+
+Every writer is fed page by page via ``JobSink.write(jobs)``, so memory
+stays at one page regardless of ``--pages``.
+
+``iter_job_chunks(path, chunksize)`` reads any of the four formats back in
+bounded chunks of flat, typed rows (see ``flatten``) for the pipeline/
+loaders; only the legacy ``.json`` array has to be parsed whole.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from name_canon import canonical_name
+from sponsorship_signal import job_text, scan
+
+try:                                    # optional: only for parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:                     # pragma: no cover
+    pa = pq = None
+
+FORMATS = ("json", "csv", "jsonl", "parquet")
+
+CSV_FIELDS = [
+    "id", "title", "company", "location", "created", "description",
+    "latitude", "longitude", "salary_min", "salary_max", "redirect_url",
+    "sponsorship_score",
+]
+
+FLOAT_FIELDS = ("latitude", "longitude", "salary_min", "salary_max")
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Parquet support needs pyarrow (pip install pyarrow)")
+
+
+def _float(v) -> float | None:
+    try:
+        return float(v) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def to_datetime(ts: str | datetime | None) -> datetime | None:
+    """Adzuna ``created`` stamp → aware UTC datetime (None if empty);
+    datetimes (parquet rows) pass through."""
+    if not ts:
+        return None
+    if isinstance(ts, datetime):
+        return ts
+    return datetime.strptime(ts, TS_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def content_hash(row: dict) -> str:
+    """Order-independent digest of a flat row (see ``flatten``)."""
+    body = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def flatten(job: dict) -> dict:
+    """Raw Adzuna ad → flat row with typed numeric columns and the
+    canonical ``company_clean`` (name_canon.py) used for sponsor matching.
+
+    Already-flat rows (CSV / parquet) pass through with their types fixed.
+    """
+    company = job.get("company")
+    location = job.get("location")
+    category = job.get("category")
+    row = {
+        "id": str(job.get("id", "")),
+        "title": job.get("title"),
+        "company": (company or {}).get("display_name")
+                   if isinstance(company, dict) else company,
+        "location": (location or {}).get("display_name")
+                    if isinstance(location, dict) else location,
+        "area": (location or {}).get("area", [])
+                if isinstance(location, dict) else job.get("area") or [],
+        "category": (category or {}).get("label")
+                    if isinstance(category, dict) else category,
+        "contract_type": job.get("contract_type"),
+        "contract_time": job.get("contract_time"),
+        "created": job.get("created"),
+        "description": job.get("description"),
+        "salary_is_predicted": str(job.get("salary_is_predicted", "0"))
+                               in ("1", "True", "true"),
+        "redirect_url": job.get("redirect_url"),
+        "alt_ids": [str(i) for i in job.get("alt_ids") or []],  # dedup_jobads
+    }
+    row["company_clean"] = canonical_name(row["company"])
+    signals = job.get("sponsorship_signals")
+    if isinstance(signals, list):           # annotated by the crawler
+        row["sponsorship_score"] = int(job.get("sponsorship_score") or 0)
+        row["sponsorship_signals"] = signals
+    else:                                   # CSV / older files: rescan
+        sig = scan(job_text(row))
+        row["sponsorship_score"] = sig.score
+        row["sponsorship_signals"] = list(sig.signals)
+    for f in FLOAT_FIELDS:
+        row[f] = _float(job.get(f))
+    return row
+
+
+def csv_row(job: dict) -> list:
+    """Raw Adzuna ad → CSV_FIELDS values (legacy layout + signal score)."""
+    return [
+        job.get("id"), job.get("title"),
+        job.get("company", {}).get("display_name"),
+        job.get("location", {}).get("display_name", ""),
+        job.get("created"), job.get("description"),
+        job.get("latitude"), job.get("longitude"),
+        job.get("salary_min"), job.get("salary_max"),
+        job.get("redirect_url"), job.get("sponsorship_score"),
+    ]
+
+
+# ─────────────────────────── WRITERS ──────────────────────────────────
+class JsonArrayWriter:
+    """Streams the exact layout of ``json.dump(jobs, f, indent=2)``."""
+
+    def __init__(self, path: Path):
+        self.f = open(path, "w", encoding="utf-8")
+        self.n = 0
+
+    def write(self, jobs: Iterable[dict]) -> None:
+        for j in jobs:
+            body = json.dumps(j, indent=2, ensure_ascii=False)
+            self.f.write(("[\n  " if self.n == 0 else ",\n  ")
+                         + body.replace("\n", "\n  "))
+            self.n += 1
+
+    def close(self) -> None:
+        self.f.write("\n]" if self.n else "[]")
+        self.f.close()
+
+
+class CsvWriter:
+    def __init__(self, path: Path):
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.w = csv.writer(self.f)
+        self.w.writerow(CSV_FIELDS)
+
+    def write(self, jobs: Iterable[dict]) -> None:
+        self.w.writerows(csv_row(j) for j in jobs)
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: Path):
+        self.f = open(path, "w", encoding="utf-8")
+
+    def write(self, jobs: Iterable[dict]) -> None:
+        self.f.writelines(json.dumps(j, ensure_ascii=False) + "\n"
+                          for j in jobs)
+        self.f.flush()                      # readable while still crawling
+
+    def close(self) -> None:
+        self.f.close()
+
+
+def parquet_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("company", pa.string()),
+        ("company_clean", pa.string()),
+        ("location", pa.string()),
+        ("area", pa.list_(pa.string())),
+        ("category", pa.string()),
+        ("contract_type", pa.string()),
+        ("contract_time", pa.string()),
+        ("created", pa.timestamp("s", tz="UTC")),
+        ("description", pa.string()),
+        ("salary_is_predicted", pa.bool_()),
+        ("redirect_url", pa.string()),
+        ("alt_ids", pa.list_(pa.string())),
+        ("sponsorship_score", pa.int32()),
+        ("sponsorship_signals", pa.list_(pa.string())),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("salary_min", pa.float64()),
+        ("salary_max", pa.float64()),
+    ])
+
+
+class ParquetWriter:
+    """One row group per page; ``created`` stored as a UTC timestamp."""
+
+    def __init__(self, path: Path):
+        self.schema = parquet_schema()
+        self.w = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, jobs: Iterable[dict]) -> None:
+        rows = [flatten(j) for j in jobs]
+        if not rows:
+            return
+        for r in rows:
+            r["created"] = to_datetime(r["created"])
+        self.w.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self) -> None:
+        self.w.close()
+
+
+WRITERS = {"json": JsonArrayWriter, "csv": CsvWriter,
+           "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+class JobSink:
+    """All requested output formats for one slug, fed page by page."""
+
+    def __init__(self, out_dir: Path, slug: str, formats: Iterable[str]):
+        self.paths = [Path(out_dir) / f"{slug}.{fmt}" for fmt in formats]
+        self.writers = [WRITERS[p.suffix[1:]](p) for p in self.paths]
+        self.count = 0
+
+    def write(self, jobs: list[dict]) -> None:
+        for w in self.writers:
+            w.write(jobs)
+        self.count += len(jobs)
+
+    def close(self) -> None:
+        for w in self.writers:
+            w.close()
+
+
+# ─────────────────────────── READERS ──────────────────────────────────
+def _chunks(it: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(it)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _iter_raw(path: Path) -> Iterator[dict]:
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)             # legacy array: whole file
+    elif suffix == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif suffix == ".parquet":
+        _require_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=1_000):
+            for r in batch.to_pylist():
+                if isinstance(r.get("created"), datetime):
+                    r["created"] = r["created"].strftime(TS_FORMAT)
+                yield r
+    else:
+        raise ValueError(f"Unsupported job file: {path}")
+
+
+def iter_jobs(path: str | os.PathLike, flat: bool = True) -> Iterator[dict]:
+    """Stream ads from *path*; ``flat=False`` keeps raw JSON/JSONL ads."""
+    for job in _iter_raw(Path(path)):
+        yield flatten(job) if flat else job
+
+
+def iter_job_chunks(path: str | os.PathLike, chunksize: int = 1_000,
+                    flat: bool = True) -> Iterator[list[dict]]:
+    """Stream ads from *path* in lists of at most *chunksize*."""
+    yield from _chunks(iter_jobs(path, flat), chunksize)
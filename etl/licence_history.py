@@ -0,0 +1,358 @@
+# licence_history.py – v0.1  (ASCII-only)
+"""
+Temporal index of sponsor licences over the daily register snapshots.
+
+Replays the snapshot store (register_store.py) once and keeps, per
+organisation, the intervals during which it
+
+  • held a licence            kind "licence"  (value "")
+  • held a rating             kind "rating"   (value = type_rating)
+  • offered a route           kind "route"    (value = route)
+
+as ``Interval(org, kind, value, start, end)`` – ``end`` is the first
+snapshot day without it (None = still held).  Intervals starting on the
+first snapshot day are left-censored: "held since at least".
+
+Queries run on in-memory dicts / sorted event lists (sub-millisecond):
+
+    h = LicenceHistory.from_store("data/register_store")
+    h.state("ACME LTD", "2025-07-10")           # licensed / ratings / routes
+    h.held_for("ACME LTD", "route", "Skilled Worker")  # (start, days)
+    h.events("2025-07-01", "2025-07-31", kind="licence", change="-")
+    h.downgraded("2025-07-01", "2025-07-31")     # A rating -> B rating
+
+The built intervals are cached in <store>/licence_history.parquet and
+reused while the store's manifest (every snapshot day) is unchanged.
+``--neo4j`` materialises them as HELD_LICENCE / HELD_RATING / HELD_ROUTE
+relationships with ``start`` / ``end`` properties; the shared Register /
+Rating / Route nodes are merged once, under uniqueness constraints, before
+the parallel batches.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date as _date
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from register_store import KEY, RegisterStore
+
+KINDS = ("licence", "rating", "route")
+FACT_COLUMNS = {"rating": "type_rating", "route": "route"}
+CACHE_FILE = "licence_history.parquet"
+OPEN = "9999-12-31"                     # sorts after every real day
+_RATING = re.compile(r"^(.*?)\s*\(\s*([AB])\b")  # licence type, grade
+
+
+class Interval(NamedTuple):
+    org: str
+    kind: str
+    value: str
+    start: str
+    end: str | None                     # exclusive; None = still held
+
+
+class Event(NamedTuple):
+    date: str
+    org: str
+    kind: str
+    value: str
+    change: str                         # "+" gained, "-" lost
+
+
+def _facts(rows: pd.DataFrame) -> Iterable[tuple[str, str, str]]:
+    """(org, kind, value) facts supported by each register row."""
+    names = [str(n).strip() for n in rows["organisation_name"].tolist()]
+    yield from ((n, "licence", "") for n in names)
+    for kind, col in FACT_COLUMNS.items():
+        yield from zip(names, repeat(kind), map(str, rows[col].tolist()))
+
+
+# ─────────────────────────── BUILD ────────────────────────────────────
+def build_intervals(store: RegisterStore) -> list[Interval]:
+    """Replay every snapshot day of *store* as row additions / removals."""
+    count: dict[tuple, int] = defaultdict(int)      # rows supporting a fact
+    since: dict[tuple, str] = {}
+    out: list[Interval] = []
+    live: pd.DataFrame | None = None                # rows of the previous day
+
+    def apply(day: str, added: pd.DataFrame, removed: pd.DataFrame) -> None:
+        for f in _facts(removed):
+            count[f] -= 1
+            if count[f] == 0:
+                del count[f]
+                out.append(Interval(*f, since.pop(f), day))
+        for f in _facts(added):
+            count[f] += 1
+            if count[f] == 1:
+                since[f] = day
+
+    for e in store.entries:
+        if e["kind"] == "same":
+            continue
+        cur = store.as_of(e["date"], keys=True)
+        if live is None:
+            apply(e["date"], cur, cur.iloc[:0])
+        else:
+            apply(e["date"], cur[~cur[KEY].isin(live[KEY])],
+                  live[~live[KEY].isin(cur[KEY])])
+        live = cur
+    out.extend(Interval(*f, start, None) for f, start in since.items())
+    return out
+
+
+def _stamp(entries: list[dict]) -> str:
+    """Digest of the whole manifest (every day and its content hash) – the
+    latest hash alone misses a register returning to an earlier state and
+    days added or dropped underneath it."""
+    days = "\n".join(f"{e['date']} {e['kind']} {e['hash']}" for e in entries)
+    return hashlib.blake2b(days.encode(), digest_size=16).hexdigest()
+
+
+# ─────────────────────────── INDEX ────────────────────────────────────
+class LicenceHistory:
+    def __init__(self, intervals: Iterable[Interval], first_day: str | None = None):
+        self.by_org: dict[str, list[Interval]] = defaultdict(list)
+        events: list[Event] = []
+        for iv in intervals:
+            self.by_org[iv.org].append(iv)
+            if iv.start != first_day:           # left-censored: no event
+                events.append(Event(iv.start, iv.org, iv.kind, iv.value, "+"))
+            if iv.end is not None:
+                events.append(Event(iv.end, iv.org, iv.kind, iv.value, "-"))
+        events.sort()
+        self.events_ = events
+        self._days = [ev.date for ev in events]
+        # per (kind, change) sub-lists: "removed this month" slices ~100s
+        # of events instead of filtering every change in the range
+        self._by_kind: dict[tuple[str, str], tuple[list, list]] = {}
+        for ev in events:
+            days, evs = self._by_kind.setdefault((ev.kind, ev.change), ([], []))
+            days.append(ev.date)
+            evs.append(ev)
+        self.first_day = first_day
+
+    @classmethod
+    def from_store(cls, root: str | Path, *, rebuild: bool = False
+                   ) -> "LicenceHistory":
+        store = RegisterStore(root)
+        if not store.entries:
+            raise RuntimeError(f"No register snapshots in {root}")
+        first, stamp = store.entries[0]["date"], _stamp(store.entries)
+        cache = Path(root) / CACHE_FILE
+        if cache.exists() and not rebuild:
+            table = pq.read_table(cache)
+            if table.num_rows and table.column("_stamp")[0].as_py() == stamp:
+                cols = (table.column(c).to_pylist() for c in Interval._fields)
+                return cls((Interval(o, k, v, s, None if e == OPEN else e)
+                            for o, k, v, s, e in zip(*cols)), first)
+        intervals = build_intervals(store)
+        df = pd.DataFrame(intervals, columns=Interval._fields)
+        df["end"] = df["end"].fillna(OPEN)
+        df.assign(_stamp=stamp).to_parquet(cache, index=False)
+        return cls(intervals, first)
+
+    def __len__(self) -> int:
+        return len(self.by_org)
+
+    # ── per organisation ─────────────────────────────────────────────
+    def intervals(self, org: str, kind: str | None = None) -> list[Interval]:
+        return sorted(iv for iv in self.by_org.get(org, ())
+                      if kind is None or iv.kind == kind)
+
+    def state(self, org: str, day: str) -> dict:
+        """Licence / ratings / routes held by *org* on *day*."""
+        held = [iv for iv in self.by_org.get(org, ())
+                if iv.start <= day and (iv.end is None or day < iv.end)]
+        return dict(org=org, date=day,
+                    licensed=any(iv.kind == "licence" for iv in held),
+                    ratings=sorted(iv.value for iv in held if iv.kind == "rating"),
+                    routes=sorted(iv.value for iv in held if iv.kind == "route"))
+
+    def held_for(self, org: str, kind: str, value: str = "",
+                 day: str | None = None) -> tuple[str, int] | None:
+        """(start, days held) of the interval covering *day* (default today);
+        the start is a lower bound when it is the first snapshot day."""
+        day = day or _date.today().isoformat()
+        for iv in self.by_org.get(org, ()):
+            if iv.kind == kind and iv.value == value and iv.start <= day \
+                    and (iv.end is None or day < iv.end):
+                days = (_date.fromisoformat(day)
+                        - _date.fromisoformat(iv.start)).days
+                return iv.start, days
+        return None
+
+    # ── range queries ────────────────────────────────────────────────
+    def events(self, start: str, end: str, *, kind: str | None = None,
+               change: str | None = None) -> list[Event]:
+        """Gains / losses with ``start <= date <= end``."""
+        if kind is not None and change is not None:
+            days, evs = self._by_kind.get((kind, change), ([], []))
+            return evs[bisect_left(days, start):bisect_right(days, end)]
+        lo, hi = bisect_left(self._days, start), bisect_right(self._days, end)
+        return [ev for ev in self.events_[lo:hi]
+                if (kind is None or ev.kind == kind)
+                and (change is None or ev.change == change)]
+
+    def removed(self, start: str, end: str) -> list[str]:
+        return sorted({ev.org for ev in self.events(start, end, kind="licence",
+                                                    change="-")})
+
+    def downgraded(self, start: str, end: str) -> list[str]:
+        """Organisations whose A-family rating (A rating / A (Premium) /
+        A (SME+)) was replaced by a B rating of the same licence type
+        (Worker / Temporary Worker) on the same day, within the range."""
+        out = set()
+        for ev in self.events(start, end, kind="rating", change="+"):
+            kind, grade = _rating(ev.value)
+            if grade != "B":
+                continue
+            if any(iv.kind == "rating" and iv.end == ev.date
+                   and _rating(iv.value) == (kind, "A")
+                   for iv in self.by_org[ev.org]):
+                out.add(ev.org)
+        return sorted(out)
+
+
+def _rating(value: str) -> tuple[str, str]:
+    """"Worker (A (SME+))" -> ("Worker", "A"); grade "" if unrecognised."""
+    m = _RATING.match(value)
+    return (m.group(1).strip(), m.group(2)) if m else (value, "")
+
+
+# ─────────────────────────── NEO4J ────────────────────────────────────
+REGISTER = "Worker and Temporary Worker"
+
+CONSTRAINTS = [
+    "CREATE CONSTRAINT register_name IF NOT EXISTS "
+    "FOR (r:Register) REQUIRE r.name IS UNIQUE",
+    "CREATE CONSTRAINT rating_name IF NOT EXISTS "
+    "FOR (t:Rating) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT route_key IF NOT EXISTS "
+    "FOR (r:Route) REQUIRE r.name IS UNIQUE",
+]
+
+# shared nodes, merged in one transaction before the parallel writers
+# (which only MATCH them) – as etl_neo4j_load.write_shared_nodes does for
+# Location / Route; separate statements, so an empty list skips nothing
+SHARED_NODES_CYPHER = [
+    "MERGE (:Register {name: $register})",
+    "UNWIND $ratings AS rating MERGE (:Rating {name: rating})",
+    "UNWIND $routes AS route MERGE (:Route {name: route})",
+]
+
+NEO4J_CYPHER = {
+    "licence": """
+UNWIND $rows AS row
+MATCH (o:Organisation {name: row.org})
+MATCH (reg:Register {name: $register})
+MERGE (o)-[h:HELD_LICENCE {start: date(row.start)}]->(reg)
+SET   h.end = CASE WHEN row.end IS NULL THEN null ELSE date(row.end) END
+""",
+    "rating": """
+UNWIND $rows AS row
+MATCH (o:Organisation {name: row.org})
+MATCH (t:Rating {name: row.value})
+MERGE (o)-[h:HELD_RATING {start: date(row.start)}]->(t)
+SET   h.end = CASE WHEN row.end IS NULL THEN null ELSE date(row.end) END
+""",
+    "route": """
+UNWIND $rows AS row
+MATCH (o:Organisation {name: row.org})
+MATCH (r:Route {name: row.value})
+MERGE (o)-[h:HELD_ROUTE {start: date(row.start)}]->(r)
+SET   h.end = CASE WHEN row.end IS NULL THEN null ELSE date(row.end) END
+""",
+}
+
+
+def write_shared_nodes(writer, history: LicenceHistory) -> None:
+    values = {kind: sorted({iv.value for ivs in history.by_org.values()
+                            for iv in ivs if iv.kind == kind})
+              for kind in ("rating", "route")}
+
+    with writer.driver.session(database=writer.database) as s:
+        for cy in CONSTRAINTS:
+            s.run(cy).consume()
+
+    def merge(tx):
+        for cy in SHARED_NODES_CYPHER:
+            tx.run(cy, register=REGISTER, ratings=values["rating"],
+                   routes=values["route"]).consume()
+
+    writer.run(merge)
+
+
+def materialise(history: LicenceHistory, writer) -> dict[str, int]:
+    """Write every interval as a relationship; safe to re-run."""
+    write_shared_nodes(writer, history)
+    written = {}
+    for kind in KINDS:
+        rows = sorted((iv._asdict() for ivs in history.by_org.values()
+                       for iv in ivs if iv.kind == kind),
+                      key=lambda r: r["org"])
+        stats = writer.write(NEO4J_CYPHER[kind], rows, key=lambda r: r["org"],
+                             label=f"held_{kind}", register=REGISTER)
+        written[kind] = stats.rows
+    return written
+
+
+# ─────────────────────────── CLI ──────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Sponsor licence history")
+    p.add_argument("--store", default="data/register_store")
+    p.add_argument("--rebuild", action="store_true",
+                   help="ignore the cached intervals")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    st = sub.add_parser("state", help="what an organisation held on a day")
+    st.add_argument("org")
+    st.add_argument("--date", default=_date.today().isoformat())
+    hi = sub.add_parser("history", help="all intervals of an organisation")
+    hi.add_argument("org")
+    for name in ("events", "removed", "downgraded"):
+        sp = sub.add_parser(name, help=f"{name} within a date range")
+        sp.add_argument("--from", dest="start", required=True)
+        sp.add_argument("--to", dest="end", default=_date.today().isoformat())
+        if name == "events":
+            sp.add_argument("--kind", choices=KINDS)
+            sp.add_argument("--change", choices=("+", "-"))
+    sub.add_parser("neo4j", help="materialise intervals as relationships")
+    args = p.parse_args(argv)
+
+    h = LicenceHistory.from_store(args.store, rebuild=args.rebuild)
+    if args.cmd == "state":
+        print(h.state(args.org, args.date))
+    elif args.cmd == "history":
+        for iv in h.intervals(args.org):
+            print(f"{iv.kind:<8} {iv.value:<45} {iv.start} -> {iv.end or 'now'}")
+    elif args.cmd == "events":
+        for ev in h.events(args.start, args.end, kind=args.kind,
+                           change=args.change):
+            print(f"{ev.date}  {ev.change} {ev.kind:<8} {ev.value:<40} {ev.org}")
+    elif args.cmd in ("removed", "downgraded"):
+        orgs = getattr(h, args.cmd)(args.start, args.end)
+        print("\n".join(orgs))
+        print(f"{len(orgs)} organisations {args.cmd} "
+              f"{args.start} - {args.end}")
+    else:
+        from dotenv import load_dotenv
+        from neo4j_writer import Neo4jWriter, close_driver, progress
+        load_dotenv()
+        try:
+            print(materialise(h, Neo4jWriter(on_batch=progress("intervals"))))
+        finally:
+            close_driver()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
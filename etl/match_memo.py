@@ -0,0 +1,129 @@
+# match_memo.py – v0.1  (ASCII-only)
+"""
+Persistent company → sponsor match memo (SQLite).
+
+• Key: the canonical company name (``name_canon.canonical_name``), so
+  "IBM UK LTD" and "IBM UK Ltd." share one entry.
+• Value: matched Organisation name + scores, or NULL for a known miss –
+  negative results are memoised too.
+• The whole memo is stamped with the register snapshot it was computed
+  against (content hash of the register file + ``MATCHER_VERSION``); it is
+  cleared only when that stamp changes.
+
+``MemoMatcher`` consults the memo first and only builds the (comparatively
+expensive) ``SponsorMatcher`` index if some names are not memoised yet.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+from name_canon import canonical_name
+from sponsor_matcher import MATCHER_VERSION, Match, SponsorMatcher
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+CREATE TABLE IF NOT EXISTS memo (
+    company  TEXT PRIMARY KEY,
+    org      TEXT,                      -- NULL = no sponsor matched
+    score    REAL,
+    ft       REAL,
+    jw       REAL
+) WITHOUT ROWID;
+"""
+
+
+def register_version(path: str | Path) -> str:
+    """Content hash of a register file, qualified by the matcher version."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return f"{h.hexdigest()[:16]}:{MATCHER_VERSION}"
+
+
+class MatchMemo:
+    def __init__(self, path: str | Path, version: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.version = version
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+        row = self._db.execute(
+            "SELECT v FROM meta WHERE k = 'register_version'").fetchone()
+        if row is None or row[0] != version:
+            if row is not None:
+                log.info("Register changed (%s -> %s): match memo cleared",
+                         row[0], version)
+            self._db.execute("DELETE FROM memo")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('register_version', ?)",
+                (version,))
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "MatchMemo":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM memo").fetchone()[0]
+
+    def lookup(self, keys: Iterable[str]) -> dict[str, Match | None]:
+        """Memoised keys only; a value of None is a remembered miss."""
+        keys = list(dict.fromkeys(keys))
+        out: dict[str, Match | None] = {}
+        for i in range(0, len(keys), 900):              # SQLite var limit
+            chunk = keys[i:i + 900]
+            marks = ",".join("?" * len(chunk))
+            for company, org, score, ft, jw in self._db.execute(
+                    f"SELECT company, org, score, ft, jw FROM memo "
+                    f"WHERE company IN ({marks})", chunk):
+                out[company] = Match(org, score, ft, jw) if org else None
+        return out
+
+    def store(self, results: dict[str, Match | None]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?)",
+            [(k, *(m if m else (None, None, None, None)))
+             for k, m in results.items()])
+        self._db.commit()
+
+
+class MemoMatcher:
+    """``SponsorMatcher.match_many`` behind a ``MatchMemo``."""
+
+    def __init__(self, memo: MatchMemo,
+                 load_matcher: Callable[[], SponsorMatcher]):
+        self.memo = memo
+        self._load = load_matcher
+        self._matcher: SponsorMatcher | None = None
+        self.hits = self.misses = 0
+
+    @property
+    def matcher(self) -> SponsorMatcher:
+        if self._matcher is None:
+            self._matcher = self._load()
+        return self._matcher
+
+    def match_many(self, companies: Sequence[str | None]) -> list[Match | None]:
+        keys = [canonical_name(c) for c in companies]
+        known = self.memo.lookup(k for k in keys if k)
+        todo = [k for k in dict.fromkeys(keys) if k and k not in known]
+        self.hits += len(keys) - len(todo)
+        self.misses += len(todo)
+        if todo:
+            fresh = dict(zip(todo, (self.matcher.match_clean(k)
+                                    for k in todo)))
+            self.memo.store(fresh)
+            known.update(fresh)
+        return [known.get(k) if k else None for k in keys]
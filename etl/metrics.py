@@ -0,0 +1,473 @@
+# metrics.py – v0.1  (ASCII-only)
+"""
+Shared run instrumentation for the ETL and pipeline scripts.
+
+One process-wide registry, ``METRICS``, collects:
+
+• counters / gauges / histograms with labels – HTTP latency, requests by
+  status code, retries and 429s (adzuna_client, register_fetch), Neo4j
+  batch latency, rows, retries and ``summary.counters`` (neo4j_writer);
+• per-stage wall time and rows in / out (``stage()`` / ``rows()``), with
+  the peak RSS of the process when each stage ended;
+• optional per-stage hooks: cProfile (``--profile clean,write`` or
+  ``all``) dumps ``<job>_<stage>.pstats``; tracemalloc (``--trace_memory``)
+  adds the stage's peak traced memory.  tracemalloc is process-wide, so
+  for concurrent stages (run_pipeline.py) the peaks overlap.
+
+At the end of a run it writes, into ``--metrics_dir`` (or
+$VISAPATH_METRICS_DIR; nothing is written when both are empty):
+
+    <job>.prom                Prometheus textfile (node_exporter textfile
+                              collector), replaced atomically every run
+    <job>_<YYYYmmdd_HHMMSS>.json   run report: stages, counters,
+                              histogram summaries, peak RSS, status
+
+    cli = argparse.ArgumentParser(); add_cli(cli); args = cli.parse_args()
+    with METRICS.run("etl_neo4j_load", args):
+        with METRICS.stage("read") as st:
+            df = read(...)
+            st.rows_out = len(df)
+
+Collection is always on and cheap (a lock and a dict update per event).
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import bisect
+import cProfile
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+log = logging.getLogger(__name__)
+
+PREFIX = "visapath_"
+ENV_DIR = "VISAPATH_METRICS_DIR"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)                  # seconds
+
+HELP = {
+    "http_request_seconds": "HTTP request latency",
+    "http_requests_total": "HTTP responses by status code",
+    "http_retries_total": "HTTP requests retried, by status code",
+    "http_cache_total": "Response cache lookups",
+    "http_rate_limit_wait_seconds_total": "Time spent waiting for the rate limiter",
+    "http_bytes_total": "HTTP body bytes received",
+    "neo4j_batch_seconds": "Neo4j write batch latency",
+    "neo4j_rows_total": "Rows written to Neo4j",
+    "neo4j_retries_total": "Neo4j transactions retried",
+    "neo4j_splits_total": "Neo4j batches split after a memory error",
+    "neo4j_counters_total": "Neo4j summary.counters, summed",
+    "query_seconds": "Dashboard query latency against Neo4j",
+    "query_cache_total": "Dashboard query cache lookups",
+    "stage_seconds": "Stage wall time",
+    "stage_rows_in_total": "Rows into a stage",
+    "stage_rows_out_total": "Rows out of a stage",
+    "peak_rss_bytes": "Peak resident set size of the process",
+    "run_duration_seconds": "Wall time of the run",
+    "run_success": "1 if the run finished without error",
+    "run_timestamp_seconds": "Unix time the run finished",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def peak_rss() -> int | None:
+    """Peak RSS of this process in bytes (None where it cannot be read)."""
+    try:
+        import resource
+    except ImportError:                 # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        mem = psutil.Process().memory_info()
+        return getattr(mem, "peak_wset", None) or mem.rss
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    esc = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+           for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, esc)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)      # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, v)] += 1
+        self.sum += v
+        self.count += 1
+        self.max = max(self.max, v)
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bucket bound holding the q-th observation."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, round(self.max, 3))
+        return round(self.max, 3)
+
+    def summary(self) -> dict:
+        return dict(count=self.count, sum=round(self.sum, 3),
+                    mean=round(self.sum / self.count, 4) if self.count else None,
+                    p50=self.quantile(0.5), p95=self.quantile(0.95),
+                    max=round(self.max, 3))
+
+
+@dataclass
+class Stage:
+    name: str
+    rows_in: int = 0
+    rows_out: int = 0
+    seconds: float = 0.0
+    runs: int = 0
+    extra: dict = field(default_factory=dict)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.gauges: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, _Histogram]] = {}
+        self.stages: dict[str, Stage] = {}
+        self.job = Path(sys.argv[0]).stem or "python"
+        self.outdir: Path | None = None
+        self.profile: set[str] = set()
+        self.trace: set[str] = set()
+        self.status = "running"
+        self.started = _now()
+        self._t0 = time.perf_counter()
+        self._tracing = 0
+        self._own_trace = False
+        self._finished = False
+
+    # ── primitives ───────────────────────────────────────────────────
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            c = self.counters.setdefault(name, {})
+            c[k] = c.get(k, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            h = self.histograms.setdefault(name, {})
+            (h.get(k) or h.setdefault(k, _Histogram())).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    # ── stages ───────────────────────────────────────────────────────
+    def _stage(self, name: str) -> Stage:
+        with self._lock:
+            return self.stages.get(name) or self.stages.setdefault(name, Stage(name))
+
+    def rows(self, stage: str, rows_in: int = 0, rows_out: int = 0) -> None:
+        """Add rows to *stage* without timing it (per page / per batch)."""
+        st = self._stage(stage)
+        with self._lock:
+            st.rows_in += rows_in
+            st.rows_out += rows_out
+
+    def _wanted(self, chosen: set[str], name: str) -> bool:
+        return name in chosen or "all" in chosen
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = 0) -> Iterator[Stage]:
+        """Time a stage; set ``rows_out`` (and ``rows_in``) on the yielded
+        record.  Re-entering a stage adds to it."""
+        cur = Stage(name, rows_in=rows_in)
+        prof = cProfile.Profile() if self._wanted(self.profile, name) else None
+        trace = self._wanted(self.trace, name)
+        if trace:
+            self._trace_start()
+        t0 = time.perf_counter()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield cur
+        finally:
+            if prof is not None:
+                prof.disable()
+            cur.seconds = time.perf_counter() - t0
+            if trace:
+                cur.extra["traced_peak_mib"] = self._trace_stop()
+            if prof is not None:
+                self._dump_profile(name, prof)
+            self._merge(cur)
+
+    def staged(self, name: str, fn: Callable) -> Callable:
+        """Wrap a streaming.run_stages generator stage in ``stage(name)``."""
+        def run(items):
+            with self.stage(name):
+                yield from fn(items)
+        return run
+
+    def _merge(self, cur: Stage) -> None:
+        st = self._stage(cur.name)
+        rss = peak_rss()
+        with self._lock:
+            st.rows_in += cur.rows_in
+            st.rows_out += cur.rows_out
+            st.seconds += cur.seconds
+            st.runs += 1
+            for k, v in cur.extra.items():
+                st.extra[k] = max(st.extra.get(k, v), v) if k.endswith("_mib") else v
+            if rss is not None:
+                st.extra["peak_rss_mib"] = round(rss / 2**20, 1)
+
+    def stage_stats(self, stats: Iterable) -> None:
+        """Attach streaming.StageStats (busy / blocked seconds, items)."""
+        for s in stats:
+            st = self._stage(s.name)
+            with self._lock:
+                st.extra.update(items=s.items, busy_s=round(s.busy, 3),
+                                waited_s=round(s.waited, 3))
+
+    # ── profiling hooks ──────────────────────────────────────────────
+    def _trace_start(self) -> None:
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_trace = True
+            self._tracing += 1
+            if self._tracing == 1:
+                tracemalloc.reset_peak()
+
+    def _trace_stop(self) -> float:
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            self._tracing -= 1
+            if self._tracing == 0 and self._own_trace:
+                tracemalloc.stop()
+                self._own_trace = False
+        return round(peak, 1)
+
+    def _dump_profile(self, name: str, prof: cProfile.Profile) -> None:
+        out = (self.outdir or Path(".")) / f"{self.job}_{name}.pstats"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(out)
+        log.info("Profile of stage %s -> %s  (python -m pstats %s)",
+                 name, out, out)
+
+    # ── run lifecycle ────────────────────────────────────────────────
+    def configure(self, job: str | None = None, outdir: str | Path | None = None,
+                  profile: Iterable[str] = (), trace: Iterable[str] = ()) -> None:
+        if job:
+            self.job = job
+        self.outdir = Path(outdir) if outdir else None
+        self.profile = {s.strip() for s in profile if s.strip()}
+        self.trace = {s.strip() for s in trace if s.strip()}
+
+    def start(self, job: str, args: argparse.Namespace | None = None, *,
+              at_exit: bool = False) -> None:
+        """Configure from ``add_cli`` options.  With *at_exit* the outputs
+        are written when the interpreter exits (module-level scripts);
+        call ``done()`` on success, otherwise the run counts as failed."""
+        a = vars(args) if args is not None else {}
+        self.configure(job, a.get("metrics_dir") or os.getenv(ENV_DIR),
+                       (a.get("profile") or "").split(","),
+                       (a.get("trace_memory") or "").split(","))
+        self.started, self._t0 = _now(), time.perf_counter()
+        self.status, self._finished = "running", False
+        if at_exit:
+            atexit.register(self.finish)
+
+    def done(self) -> None:
+        self.status = "ok"
+
+    def finish(self) -> None:
+        """Write the textfile and report once (status "failed" unless
+        ``done()`` was called)."""
+        if self._finished:
+            return
+        self._finished = True
+        if self.status == "running":
+            self.status = "failed"
+        if self.outdir is None:
+            return
+        try:
+            self.outdir.mkdir(parents=True, exist_ok=True)
+            self.write_textfile(self.outdir / f"{self.job}.prom")
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            path = self.write_report(self.outdir / f"{self.job}_{stamp}.json")
+            log.info("Run report -> %s", path)
+        except OSError as e:            # never fail a run over its metrics
+            log.warning("Could not write metrics to %s: %s", self.outdir, e)
+
+    @contextmanager
+    def run(self, job: str, args: argparse.Namespace | None = None
+            ) -> Iterator["Metrics"]:
+        """``start`` + ``finish`` around a ``main()`` body; SystemExit with
+        code 0 / None counts as success."""
+        self.start(job, args)
+        try:
+            yield self
+        except SystemExit as e:
+            if e.code in (0, None):
+                self.done()
+            raise
+        else:
+            self.done()
+        finally:
+            self.finish()
+
+    # ── outputs ──────────────────────────────────────────────────────
+    def _run_gauges(self) -> None:
+        self.set("run_duration_seconds", round(time.perf_counter() - self._t0, 3))
+        self.set("run_success", 1 if self.status == "ok" else 0)
+        self.set("run_timestamp_seconds", round(time.time()))
+        rss = peak_rss()
+        if rss is not None:
+            self.set("peak_rss_bytes", rss)
+        with self._lock:
+            stages = list(self.stages.values())
+        for st in stages:
+            self.set("stage_seconds", round(st.seconds, 3), stage=st.name)
+            self.set("stage_rows_in_total", st.rows_in, stage=st.name)
+            self.set("stage_rows_out_total", st.rows_out, stage=st.name)
+
+    def textfile(self) -> str:
+        """Prometheus text exposition of everything, labelled job=<job>."""
+        self._run_gauges()
+        job = (("job", self.job),)
+        lines: list[str] = []
+
+        def head(name: str, kind: str) -> str:
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                full = head(name, "counter")
+                lines += [f"{full}{_fmt_labels(job + k)} {_num(v)}"
+                          for k, v in sorted(series.items())]
+            for name, series in sorted(self.gauges.items()):
+                kind = "counter" if name.endswith("_total") else "gauge"
+                full = head(name, kind)
+                lines += [f"{full}{_fmt_labels(job + k)} {_num(v)}"
+                          for k, v in sorted(series.items())]
+            for name, series in sorted(self.histograms.items()):
+                full = head(name, "histogram")
+                for k, h in sorted(series.items()):
+                    cum = 0
+                    for bound, n in zip(BUCKETS + ("+Inf",), h.counts):
+                        cum += n
+                        lines.append(f"{full}_bucket"
+                                     f"{_fmt_labels(job + k, (('le', str(bound)),))} {cum}")
+                    lines.append(f"{full}_sum{_fmt_labels(job + k)} {_num(h.sum)}")
+                    lines.append(f"{full}_count{_fmt_labels(job + k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str | Path) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")      # collector skips *.tmp
+        tmp.write_text(self.textfile(), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def report(self) -> dict:
+        self._run_gauges()
+
+        def flat(series: dict[tuple, object], conv=lambda v: v) -> list[dict]:
+            return [{**dict(k), "value": conv(v)} for k, v in sorted(series.items())]
+
+        rss = peak_rss()
+        with self._lock:
+            return dict(
+                job=self.job, status=self.status, started=self.started,
+                finished=_now(),
+                seconds=round(time.perf_counter() - self._t0, 3),
+                peak_rss_mib=round(rss / 2**20, 1) if rss is not None else None,
+                argv=sys.argv[1:],
+                machine=dict(python=platform.python_version(),
+                             platform=platform.platform(), cpus=os.cpu_count()),
+                stages={n: dict(rows_in=s.rows_in, rows_out=s.rows_out,
+                                seconds=round(s.seconds, 3), runs=s.runs,
+                                **s.extra)
+                        for n, s in self.stages.items()},
+                counters={n: flat(s) for n, s in sorted(self.counters.items())},
+                histograms={n: flat(s, _Histogram.summary)
+                            for n, s in sorted(self.histograms.items())},
+            )
+
+    def write_report(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.report(), indent=2, default=str),
+                        encoding="utf-8")
+        return path
+
+    def summary(self) -> str:
+        """Stage table for the console."""
+        lines = [f"{'stage':<14} {'rows in':>10} {'rows out':>10} {'seconds':>9}"]
+        with self._lock:
+            lines += [f"{s.name:<14} {s.rows_in:>10,} {s.rows_out:>10,} "
+                      f"{s.seconds:>9.1f}" for s in self.stages.values()]
+        rss = peak_rss()
+        if rss is not None:
+            lines.append(f"peak RSS {rss / 2**20:,.0f} MiB")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+def add_cli(p: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """--metrics_dir / --profile / --trace_memory, shared by every script."""
+    g = p.add_argument_group("instrumentation")
+    g.add_argument("--metrics_dir", default=os.getenv(ENV_DIR, ""),
+                   help=f"write <job>.prom and a JSON run report here "
+                        f"(default ${ENV_DIR}; off when empty)")
+    g.add_argument("--profile", default="", metavar="STAGES",
+                   help="cProfile these stages (comma-separated, or all)")
+    g.add_argument("--trace_memory", default="", metavar="STAGES",
+                   help="tracemalloc peak of these stages (or all)")
+    return p
@@ -0,0 +1,90 @@
+# name_canon.py – v0.1  (ASCII-only)
+"""
+Canonical organisation / company names, shared by every stage.
+
+    "Müller & Sons (UK) Ltd T/A Müller Foods"
+        -> name_clean    "muller sons uk"
+        -> trading names ["muller foods"]
+
+Rules (identical for the sponsor register and Adzuna companies):
+  1. accents folded to ASCII, lower-cased;
+  2. "T/A", "t/as", "trading as" split off trading-name aliases;
+  3. punctuation → single spaces;
+  4. trailing legal suffixes dropped (ltd, limited, plc, llp, ...),
+     repeatedly, unless nothing would be left.
+
+``canonical_name`` / ``split_trading_names`` work on single strings;
+``canonicalize`` does the same over a whole pandas Series with ``.str``
+ops (used by etl_sponsor_register.py on ~100k rows).
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+CANON_VERSION = "1"             # bump when the rules below change
+
+TRADING_AS = r"\s+(?:t\s*/\s*as?|t\\a|trading\s+as)\s+"
+LEGAL_SUFFIXES = ("ltd", "limited", "plc", "llp", "l l p", "lp",
+                  "cic", "llc", "inc", "co ltd")
+
+_TRADING_RE = re.compile(TRADING_AS, re.I)
+_PUNCT_RE = re.compile(r"[^a-z0-9]+")
+_SUFFIX_RE = re.compile(
+    r"(?:\s+(?:" + "|".join(sorted((s.replace(" ", r"\s+")
+                                    for s in LEGAL_SUFFIXES),
+                                   key=len, reverse=True)) + r"))+$")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def _strip(text: str) -> str:
+    """Folded text → punctuation-free, suffix-free canonical form."""
+    text = _PUNCT_RE.sub(" ", text).strip()
+    bare = _SUFFIX_RE.sub("", " " + text).strip()
+    return bare or text
+
+
+def split_trading_names(name: str | None) -> tuple[str, list[str]]:
+    """Raw name → (canonical legal name, [canonical trading names])."""
+    if not name:
+        return "", []
+    parts = [_strip(p) for p in _TRADING_RE.split(_fold(name))]
+    return parts[0], [p for p in parts[1:] if p]
+
+
+def canonical_name(name: str | None) -> str:
+    """Raw name → canonical legal name (trading names dropped)."""
+    return split_trading_names(name)[0]
+
+
+def canonicalize(names):
+    """Vectorised twin of ``split_trading_names`` for a pandas Series.
+
+    Returns a DataFrame with ``name_clean`` and ``trading_name_clean``
+    (aliases joined with " | ", "" when none).
+    """
+    folded = (names.fillna("").astype(str)
+                   .str.normalize("NFKD")
+                   .str.encode("ascii", "ignore").str.decode("ascii")
+                   .str.lower())
+    parts = folded.str.split(TRADING_AS, n=-1, regex=True, expand=True)
+
+    def strip(col):
+        text = (col.fillna("").str.replace(_PUNCT_RE.pattern, " ", regex=True)
+                   .str.strip())
+        bare = (" " + text).str.replace(_SUFFIX_RE.pattern, "", regex=True) \
+                           .str.strip()
+        return bare.where(bare != "", text)
+
+    legal = strip(parts[0])
+    if parts.shape[1] > 1:
+        aliases = parts.iloc[:, 1:].apply(strip)
+        trading = aliases.apply(lambda r: " | ".join(a for a in r if a),
+                                axis=1)
+    else:
+        trading = legal.map(lambda _: "")
+    return legal.to_frame("name_clean").assign(trading_name_clean=trading)
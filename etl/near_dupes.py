@@ -0,0 +1,208 @@
+# near_dupes.py – v0.1  (ASCII-only)
+"""
+Near-duplicate job ads: MinHash signatures + a persistent LSH index (SQLite).
+
+The same vacancy comes back under several search terms / cities and is
+re-posted under new Adzuna ids.  Each ad is reduced to a MinHash signature
+over word 3-gram shingles of title + company + description; signatures are
+split into ``bands`` LSH buckets, and an ad whose estimated Jaccard
+similarity to an earlier ad reaches ``threshold`` joins that ad's group –
+unless both state pay figures and none of them agree (a "Senior" variant of
+the same ad text at another salary is a different vacancy).
+
+    idx = DupIndex("data/near_dupes.sqlite")
+    canonical_id, similarity = idx.assign(job)       # one raw / flat ad
+    idx.alternates(canonical_id)                      # other ids of the group
+
+The first ad of a group is its canonical id; groups survive across runs.
+Hash parameters are stored with the index, a mismatch is a RuntimeError.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+PRIME = (1 << 31) - 1                   # a * x + b stays below 2**63
+SEED = 20250725
+SHINGLE = 3
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+CREATE TABLE IF NOT EXISTS ad (
+    id            TEXT PRIMARY KEY,
+    canonical_id  TEXT NOT NULL,
+    similarity    REAL NOT NULL,
+    pay           TEXT,                 -- pay figures, NULL if none stated
+    sig           BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ad_canonical ON ad (canonical_id);
+CREATE TABLE IF NOT EXISTS lsh (
+    band    INTEGER NOT NULL,
+    bucket  INTEGER NOT NULL,
+    id      TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, id)
+) WITHOUT ROWID;
+"""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _text(job: dict) -> str:
+    company = job.get("company")
+    if isinstance(company, dict):
+        company = company.get("display_name")
+    return " ".join(str(v or "") for v in
+                    (job.get("title"), company, job.get("description")))
+
+
+_POUNDS = re.compile(r"\u00a3\s?(\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?\s?(k\b)?",
+                     re.IGNORECASE)
+
+
+def _pay(job: dict) -> str | None:
+    """Pay figures of an ad: the advertised salary (Adzuna's predicted
+    salaries don't count) plus every pound amount quoted in the text."""
+    amounts = set()
+    if str(job.get("salary_is_predicted", "0")) not in ("1", "True", "true"):
+        for v in (job.get("salary_min"), job.get("salary_max")):
+            if v not in (None, ""):
+                amounts.add(round(float(v)))
+    for num, k in _POUNDS.findall(_text(job)):
+        amount = int(num.replace(",", "")) * (1000 if k else 1)
+        if amount >= 1_000:                 # salaries, not perks / day rates
+            amounts.add(amount)
+    return ",".join(map(str, sorted(amounts))) or None
+
+
+def _pay_differs(a: str | None, b: str | None) -> bool:
+    return bool(a and b) and not set(a.split(",")) & set(b.split(","))
+
+
+def shingles(text: str, k: int = SHINGLE) -> np.ndarray:
+    """Word k-gram shingles → unique uint64 crc32 values (stable across runs)."""
+    words = _WORD.findall(text.lower())
+    grams = {" ".join(words[i:i + k])
+             for i in range(max(1, len(words) - k + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) & PRIME for g in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, sh: np.ndarray) -> np.ndarray:
+        if sh.size == 0:
+            return np.full(self.num_perm, PRIME, dtype=np.uint32)
+        return ((self.a * sh[None, :] + self.b) % PRIME).min(axis=1) \
+            .astype(np.uint32)
+
+
+def similarity(s1: np.ndarray, s2: np.ndarray) -> float:
+    """MinHash estimate of the Jaccard similarity."""
+    return float(np.mean(s1 == s2))
+
+
+def _candidates_sql(n: int) -> str:
+    """Ads sharing any of *n* (band, bucket) pairs.  One equality lookup
+    per band: a row-value ``IN (VALUES ...)`` is not served by the lsh
+    primary key and scans the whole table."""
+    hits = " UNION ALL ".join(
+        ["SELECT id FROM lsh WHERE band = ? AND bucket = ?"] * n)
+    return (f"SELECT a.id, a.canonical_id, a.pay, a.sig FROM ad a "
+            f"WHERE a.id IN ({hits})")
+
+
+class DupIndex:
+    def __init__(self, path: str | Path, *, num_perm: int = 128,
+                 bands: int = 16, threshold: float = 0.8, seed: int = SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = bands, num_perm // bands
+        self.threshold = threshold
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        params = f"{num_perm}/{bands}/{seed}/{SHINGLE}/{SCHEMA_VERSION}"
+        row = self._db.execute(
+            "SELECT v FROM meta WHERE k = 'params'").fetchone()
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('params', ?)", (params,))
+            self._db.commit()
+        elif row[0] != params:
+            raise RuntimeError(f"{self.path} was built with {row[0]}, "
+                               f"not {params} (num_perm/bands/seed/shingle/schema)")
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self) -> "DupIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM ad").fetchone()[0]
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def _buckets(self, sig: np.ndarray) -> list[tuple[int, int]]:
+        out = []
+        for band in range(self.bands):
+            chunk = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            h = hashlib.blake2b(chunk, digest_size=8).digest()
+            out.append((band, int.from_bytes(h, "little", signed=True)))
+        return out
+
+    def assign(self, job: dict) -> tuple[str, float]:
+        """(canonical id, similarity) for *job*; records it in the index.
+
+        Call ``commit()`` after a batch.
+        """
+        jid = str(job.get("id"))
+        known = self._db.execute(
+            "SELECT canonical_id, similarity FROM ad WHERE id = ?",
+            (jid,)).fetchone()
+        if known is not None:
+            return known[0], known[1]
+
+        sig = self.hasher.signature(shingles(_text(job)))
+        pay = _pay(job)
+        buckets = self._buckets(sig)
+        cands = self._db.execute(_candidates_sql(len(buckets)),
+                                 [v for b in buckets for v in b]).fetchall()
+
+        match, best = None, 0.0
+        for _, canon, cand_pay, blob in cands:
+            if _pay_differs(pay, cand_pay):
+                continue
+            sim = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if sim >= self.threshold and sim > best:
+                match, best = canon, sim
+        canonical, best = (match, best) if match else (jid, 1.0)
+
+        self._db.execute("INSERT INTO ad VALUES (?, ?, ?, ?, ?)",
+                         (jid, canonical, best, pay, sig.tobytes()))
+        self._db.executemany("INSERT OR IGNORE INTO lsh VALUES (?, ?, ?)",
+                             [(b, k, jid) for b, k in buckets])
+        return canonical, best
+
+    def alternates(self, canonical_id: str) -> list[str]:
+        return [r[0] for r in self._db.execute(
+            "SELECT id FROM ad WHERE canonical_id = ? AND id <> ? ORDER BY id",
+            (canonical_id, canonical_id))]
@@ -0,0 +1,295 @@
+# neo4j_writer.py – v0.1  (ASCII-only)
+"""
+Shared Neo4j write path for the ETL and pipeline scripts.
+
+• ``get_driver()``  – one pooled driver per process (NEO4J_URI / NEO4J_USER /
+                      NEO4J_PASSWORD), optionally with the DNS resolver the
+                      Aura scripts use; closed once via ``close_driver()``.
+• ``Neo4jWriter``   – bounded pool of concurrent write-transaction workers:
+    - adaptive batch size (grows while batches finish under
+      ``target_latency``, halves when slower; halves and splits on
+      transaction-memory errors);
+    - one retry policy: TransientError / ServiceUnavailable /
+      SessionExpired with full-jitter exponential back-off, on explicit
+      transactions (no driver-side ``execute_write`` retries underneath,
+      so memory errors reach the split logic at once);
+    - ``key=`` keeps rows with the same key in one batch (e.g. all register
+      rows of an organisation), so concurrent batches never share a node;
+    - ``on_batch(BatchStats)`` callback with rows / latency / counters;
+    - every batch, retry and split is also counted in ``metrics.METRICS``
+      under ``label=`` (default: the function name, or "write").
+
+    writer = Neo4jWriter(workers=4, on_batch=print)
+    stats = writer.write(CYPHER, rows)                  # $rows per batch
+    stats = writer.write(CYPHER, jobs, param="jobBatch")
+    writer.run(lambda tx: tx.run("RETURN 1").consume())  # one-off tx
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Callable, Iterable, Iterator
+
+from neo4j import GraphDatabase, exceptions
+
+from metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+RETRYABLE = (exceptions.TransientError, exceptions.ServiceUnavailable,
+             exceptions.SessionExpired)
+MEMORY_CODES = ("MemoryPoolOutOfMemoryError", "TransactionOutOfMemoryError",
+                "TransactionMemoryLimit")
+
+DRIVER_CFG = dict(max_connection_lifetime=3600,
+                  max_connection_pool_size=50,
+                  connection_timeout=30)
+
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def resolve_dns(address):
+    """Resolver for networks where the driver's own lookup fails (Aura)."""
+    host = getattr(address, "host", None) or getattr(address, "address", None)
+    return [(socket.gethostbyname(host), address.port)]
+
+
+def get_driver(*, resolver: bool = False, **cfg):
+    """Process-wide pooled driver; options apply to the first call only."""
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            uri = os.getenv("NEO4J_URI")
+            user = os.getenv("NEO4J_USER", "neo4j")
+            password = os.getenv("NEO4J_PASSWORD")
+            if not (uri and password):
+                raise RuntimeError("Set NEO4J_URI & NEO4J_PASSWORD")
+            opts = {**DRIVER_CFG, **cfg}
+            if resolver:
+                opts["resolver"] = resolve_dns
+            _driver = GraphDatabase.driver(uri, auth=(user, password), **opts)
+            _driver.verify_connectivity()
+        return _driver
+
+
+def close_driver() -> None:
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+@dataclass
+class BatchStats:
+    rows: int
+    seconds: float
+    batch_size: int                     # size target when it was cut
+    attempts: int
+    counters: dict = field(default_factory=dict)
+
+
+@dataclass
+class WriteStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    counters: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / max(self.seconds, 1e-9)
+
+    def add(self, b: BatchStats) -> None:
+        self.rows += b.rows
+        self.batches += 1
+        for k, v in b.counters.items():
+            self.counters[k] = self.counters.get(k, 0) + v
+
+
+def _is_memory_error(e: Exception) -> bool:
+    code = getattr(e, "code", "") or ""
+    return any(c in code for c in MEMORY_CODES)
+
+
+def _split_point(batch: list, key: Callable | None) -> int | None:
+    """Index nearest the middle that does not split a key group."""
+    if len(batch) < 2:
+        return None
+    half = len(batch) // 2
+    if key is None:
+        return half
+    cuts = [i for i in range(1, len(batch))
+            if key(batch[i]) != key(batch[i - 1])]
+    return min(cuts, key=lambda i: abs(i - half)) if cuts else None
+
+
+def _counters(summary) -> dict:
+    c = getattr(summary, "counters", None)
+    if c is None:
+        return {}
+    return {k: v for k, v in vars(c).items()
+            if isinstance(v, int) and not isinstance(v, bool) and v}
+
+
+class Neo4jWriter:
+    def __init__(self, driver=None, *, database: str = "neo4j",
+                 workers: int = 4, batch_size: int = 1_000,
+                 min_batch: int = 50, max_batch: int = 10_000,
+                 target_latency: float = 2.0, retries: int = 6,
+                 backoff: float = 0.2,
+                 on_batch: Callable[[BatchStats], Any] | None = None):
+        self.driver = driver if driver is not None else get_driver()
+        self.database = database
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff = backoff
+        self.on_batch = on_batch
+        self._lock = threading.Lock()
+
+    # ── single transaction with the shared retry policy ─────────────
+    def run(self, work: Callable) -> Any:
+        return self._run(work)[0]
+
+    def _run(self, work: Callable) -> tuple[Any, int]:
+        for attempt in range(1, self.retries + 1):
+            try:
+                # explicit transaction: execute_write would retry transient
+                # errors itself (max_transaction_retry_time) under this loop
+                with self.driver.session(database=self.database) as s, \
+                        s.begin_transaction() as tx:
+                    result = work(tx)
+                    tx.commit()
+                    return result, attempt
+            except RETRYABLE as e:
+                if attempt == self.retries or _is_memory_error(e):
+                    raise                       # memory: caller splits
+                wait_s = random.uniform(0, self.backoff * 2 ** attempt)
+                METRICS.inc("neo4j_retries_total", error=type(e).__name__)
+                log.warning("Neo4j %s – retry %d in %.2fs",
+                            type(e).__name__, attempt, wait_s)
+                time.sleep(wait_s)
+
+    # ── adaptive batch size (AIMD on observed latency) ───────────────
+    def _observe(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            if seconds > self.target_latency:
+                self.batch_size = max(self.min_batch, self.batch_size // 2)
+            elif seconds < self.target_latency / 2 and rows >= self.batch_size:
+                self.batch_size = min(self.max_batch,
+                                      int(self.batch_size * 1.25) + 1)
+
+    def _shrink(self) -> None:
+        with self._lock:
+            self.batch_size = max(self.min_batch, self.batch_size // 2)
+
+    def _batches(self, rows: Iterable, key: Callable | None) -> Iterator[list]:
+        """Cut batches at the *current* size; never split a key group."""
+        groups = ([r] for r in rows) if key is None else \
+                 (list(g) for _, g in groupby(rows, key=key))
+        batch: list = []
+        for g in groups:
+            if batch and len(batch) + len(g) > self.batch_size:
+                yield batch
+                batch = []
+            batch.extend(g)
+        if batch:
+            yield batch
+
+    # ── batched write ────────────────────────────────────────────────
+    def write(self, cypher: str | Callable, rows: Iterable, *,
+              param: str = "rows", key: Callable | None = None,
+              label: str | None = None, **params) -> WriteStats:
+        """Write *rows* in adaptive batches on ``workers`` sessions.
+
+        *cypher* is a statement receiving the batch as ``$<param>`` (plus
+        ``params``), or a ``fn(tx, batch)`` for multi-statement batches.
+        With *key*, rows must arrive grouped by that key.  *label* names
+        the statement in the metrics.
+        """
+        label = label or getattr(cypher, "__name__", None) or "write"
+        if callable(cypher):
+            def make(batch):
+                return lambda tx: cypher(tx, batch)
+        else:
+            def make(batch):
+                return lambda tx: tx.run(cypher, {param: batch, **params}).consume()
+
+        stats, t0 = WriteStats(), time.perf_counter()
+
+        def task(batch: list) -> BatchStats:
+            size = self.batch_size
+            start = time.perf_counter()
+            try:
+                summary, attempts = self._run(make(batch))
+            except exceptions.Neo4jError as e:
+                if not _is_memory_error(e):
+                    raise
+                self._shrink()
+                METRICS.inc("neo4j_splits_total", statement=label)
+                log.warning("Neo4j memory error on %d rows – splitting",
+                            len(batch))
+                half = _split_point(batch, key)
+                if half is None:
+                    raise
+                a, b = task(batch[:half]), task(batch[half:])
+                return BatchStats(a.rows + b.rows, a.seconds + b.seconds,
+                                  size, a.attempts + b.attempts,
+                                  {k: a.counters.get(k, 0) + b.counters.get(k, 0)
+                                   for k in a.counters.keys() | b.counters.keys()})
+            elapsed = time.perf_counter() - start
+            self._observe(len(batch), elapsed)
+            return BatchStats(len(batch), elapsed, size, attempts,
+                              _counters(summary))
+
+        def settle(done) -> None:
+            for fut in done:
+                b = fut.result()
+                stats.add(b)
+                METRICS.observe("neo4j_batch_seconds", b.seconds,
+                                statement=label)
+                METRICS.inc("neo4j_rows_total", b.rows, statement=label)
+                for k, v in b.counters.items():
+                    METRICS.inc("neo4j_counters_total", v, statement=label,
+                                counter=k)
+                if self.on_batch is not None:
+                    self.on_batch(b)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running: set = set()
+            for batch in self._batches(rows, key):
+                if len(running) >= self.workers * 2:    # bounded in-flight
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    settle(done)
+                running.add(pool.submit(task, batch))
+            done, _ = wait(running)
+            settle(done)
+
+        stats.seconds = time.perf_counter() - t0
+        return stats
+
+
+def progress(label: str = "rows", every: int = 10_000) -> Callable[[BatchStats], None]:
+    """on_batch callback printing a running total every *every* rows."""
+    state = {"rows": 0, "t0": time.perf_counter()}
+
+    def cb(b: BatchStats) -> None:
+        before = state["rows"]
+        state["rows"] += b.rows
+        if state["rows"] // every > before // every:
+            rate = state["rows"] / max(time.perf_counter() - state["t0"], 1e-9)
+            print(f"{state['rows']:,} {label} processed ({rate:,.0f} rows/s, "
+                  f"batch {b.batch_size})")
+    return cb
@@ -0,0 +1,553 @@
+# query_service.py – v0.1  (ASCII-only)
+"""
+Query layer between the Streamlit dashboard and Neo4j.
+
+• Materialised aggregates: after each register load (etl_neo4j_load.py)
+  a handful of GROUP BY queries are run once and written as parquet to
+  ``data/aggregates/`` with a ``meta.json`` stamped with the load
+  timestamp.  The job ad loaders (load_jobads, run_pipeline,
+  rematch_jobads) refresh the ``ads`` table alone after writing.  The
+  dashboard answers widget changes from these tables – dictionary-encoded
+  NumPy columns, grouped with ``np.bincount`` – so it needs no database
+  round trip and works while Aura is paused.
+    sponsors  (route, town, county, rating) -> organisations
+    orgs      (town, county, rating)        -> organisations (one row each,
+              whatever its route count – use it when route is not asked)
+    ads       (category, sponsored, band)   -> ads, salaried ads, salary sum
+• Parameterised lookups that are not materialised (one organisation's
+  ads, ...) go to Neo4j through ``QueryService.lookup`` and are kept in a
+  bounded LRU cache with a TTL.
+• Every cache entry belongs to a snapshot (load timestamp + build time);
+  a newer snapshot on disk is picked up within ``check_s`` seconds and
+  drops all entries computed against the old one.
+
+    svc = QueryService()                              # reads data/aggregates
+    svc.sponsor_counts(by=("town",), route="Skilled Worker")
+    svc.ad_counts(by=("category",), sponsored=True)
+    svc.salary_bands(category="IT Jobs")
+    svc.lookup(ORG_ADS_CYPHER, name="ACME LTD")       # cached live query
+
+Refresh by hand:
+    python etl/query_service.py refresh [--only ads] \
+        [--load_ts 2025-07-01T06:00:00Z]
+    python etl/query_service.py show --by town --route "Skilled Worker"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path("data") / "aggregates"
+HASHES = Path("data") / "sponsor_row_hashes.sqlite"
+
+# annual salary band edges (GBP, midpoint of salary_min / salary_max)
+BAND_EDGES = [20_000, 30_000, 40_000, 50_000, 60_000, 80_000, 100_000]
+BANDS = ["<20k", "20-30k", "30-40k", "40-50k", "50-60k", "60-80k",
+         "80-100k", "100k+"]
+NO_SALARY = "unknown"
+
+# ─── Aggregate queries ──────────────────────────────────────────────────────────
+SPONSORS_CYPHER = """
+MATCH (o:Organisation)-[:OFFERS_ROUTE]->(r:Route)
+WHERE coalesce(o.licence_revoked, false) = false
+RETURN r.name AS route, coalesce(o.town, '') AS town,
+       coalesce(o.county, '') AS county, coalesce(o.type_rating, '') AS rating,
+       count(DISTINCT o) AS orgs
+"""
+
+ORGS_CYPHER = """
+MATCH (o:Organisation)
+WHERE coalesce(o.licence_revoked, false) = false
+RETURN coalesce(o.town, '') AS town, coalesce(o.county, '') AS county,
+       coalesce(o.type_rating, '') AS rating, count(*) AS orgs
+"""
+
+ADS_CYPHER = """
+MATCH (j:JobAd)
+OPTIONAL MATCH (j)-[:POSTED_BY]->(o:Organisation)
+WITH j, o IS NOT NULL AND coalesce(o.licence_revoked, false) = false AS sponsored
+WITH j, sponsored,
+     (coalesce(j.salary_min, j.salary_max)
+      + coalesce(j.salary_max, j.salary_min)) / 2.0 AS salary
+RETURN coalesce(j.category, '') AS category, sponsored,
+       CASE WHEN salary IS NULL THEN -1
+            ELSE size([e IN $edges WHERE e <= salary]) END AS band,
+       count(*) AS ads, count(salary) AS salaried,
+       coalesce(sum(salary), 0.0) AS salary_sum
+"""
+
+AGGREGATES = {"sponsors": SPONSORS_CYPHER, "orgs": ORGS_CYPHER,
+              "ads": ADS_CYPHER}
+
+# a typical lookup: one organisation's ads (not materialised)
+ORG_ADS_CYPHER = """
+MATCH (j:JobAd)-[:POSTED_BY]->(o:Organisation {name: $name})
+RETURN j.id AS id, j.title AS title, j.location AS location,
+       j.salary_min AS salary_min, j.salary_max AS salary_max,
+       j.created AS created
+ORDER BY j.created DESC
+LIMIT $limit
+"""
+
+
+def _band_label(band: int) -> str:
+    return NO_SALARY if band < 0 else BANDS[band]
+
+
+# ─── Materialise ────────────────────────────────────────────────────────────────
+def compute(driver, names: Iterable[str] | None = None
+            ) -> dict[str, pa.Table]:
+    """Run the aggregate queries -> one Arrow table each."""
+    out = {}
+    for name in names or AGGREGATES:
+        cy = AGGREGATES[name]
+        with METRICS.timer("query_seconds", query=f"aggregate_{name}"):
+            records, _, _ = driver.execute_query(
+                cy, edges=BAND_EDGES, database_="neo4j", routing_="r")
+        rows = [r.data() for r in records]
+        if name == "ads":
+            for r in rows:
+                r["band"] = _band_label(r["band"])
+        out[name] = pa.Table.from_pylist(rows) if rows else _empty(name)
+    return out
+
+
+def _empty(name: str) -> pa.Table:
+    cols = {"sponsors": dict(route=pa.string(), town=pa.string(),
+                             county=pa.string(), rating=pa.string(),
+                             orgs=pa.int64()),
+            "orgs": dict(town=pa.string(), county=pa.string(),
+                         rating=pa.string(), orgs=pa.int64()),
+            "ads": dict(category=pa.string(), sponsored=pa.bool_(),
+                        band=pa.string(), ads=pa.int64(), salaried=pa.int64(),
+                        salary_sum=pa.float64())}[name]
+    return pa.table({c: pa.array([], t) for c, t in cols.items()})
+
+
+def read_meta(outdir: str | Path = DEFAULT_DIR) -> dict | None:
+    path = Path(outdir) / "meta.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_snapshot(tables: dict[str, pa.Table], load_ts: str,
+                   outdir: str | Path = DEFAULT_DIR) -> dict:
+    """Write the tables, then ``meta.json`` last (atomically) – a reader
+    that sees the new stamp also sees the new tables.  Tables not passed
+    are kept from the previous snapshot."""
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    built_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    prev = read_meta(outdir) or {}
+    meta = dict(load_ts=load_ts, built_at=built_at,
+                tables=dict(prev.get("tables", {})),
+                refreshed=dict(prev.get("refreshed", {})))
+    for name, table in tables.items():
+        tmp = outdir / f"{name}.parquet.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, outdir / f"{name}.parquet")
+        meta["tables"][name] = table.num_rows
+        meta["refreshed"][name] = built_at
+    tmp = outdir / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp, outdir / "meta.json")
+    return meta
+
+
+def refresh(driver, load_ts: str | None = None,
+            outdir: str | Path = DEFAULT_DIR,
+            names: Iterable[str] | None = None) -> dict:
+    """Recompute the aggregates *names* (default: all) and publish them as
+    the new snapshot.  A partial refresh – ``names=("ads",)`` after a job
+    ad load – keeps the other tables and the register load timestamp; its
+    new ``built_at`` still invalidates the dashboard cache."""
+    prev = read_meta(outdir)
+    names = list(AGGREGATES if names is None or prev is None else names)
+    load_ts = (load_ts or (prev or {}).get("load_ts")
+               or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    with METRICS.stage("aggregates") as st:
+        tables = compute(driver, names)
+        meta = write_snapshot(tables, load_ts, outdir)
+        st.rows_out = sum(t.num_rows for t in tables.values())
+    log.info("Aggregates for load %s: %s", load_ts,
+             ", ".join(f"{k} {t.num_rows:,}" for k, t in tables.items()))
+    return meta
+
+
+def after_load(driver, outdir: str | Path | None, load_ts: str | None = None,
+               names: Iterable[str] | None = None) -> dict | None:
+    """``refresh`` at the end of a loader; a failure is logged, not raised –
+    the load itself is committed.  No-op when *outdir* is empty."""
+    if not outdir:
+        return None
+    try:
+        return refresh(driver, load_ts, outdir, names)
+    except Exception as e:
+        log.warning("Dashboard aggregates not refreshed: %s", e)
+        return None
+
+
+def add_aggregates_cli(p: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """``--aggregates DIR`` for loaders that refresh them after a load."""
+    p.add_argument("--aggregates", default=str(DEFAULT_DIR),
+                   help="dashboard aggregates refreshed after the load "
+                        "(\"\" to skip)")
+    return p
+
+
+# ─── In-memory tables ───────────────────────────────────────────────────────────
+class Aggregate:
+    """An aggregate table as dictionary-encoded NumPy columns.
+
+    Key columns become (labels, codes); measures stay float arrays.
+    ``group`` filters on key values and sums measures per group with one
+    ``np.bincount`` per measure – sub-millisecond at register size.
+    """
+
+    def __init__(self, table: pa.Table, keys: list[str]):
+        self.keys = keys
+        self.labels: dict[str, np.ndarray] = {}
+        self.codes: dict[str, np.ndarray] = {}
+        for k in keys:
+            labels, codes = np.unique(
+                table.column(k).to_numpy(zero_copy_only=False),
+                return_inverse=True)
+            self.labels[k], self.codes[k] = labels, codes.astype(np.int64)
+        self.measures = {c: table.column(c).to_numpy(zero_copy_only=False)
+                                          .astype(np.float64)
+                         for c in table.column_names if c not in keys}
+        self.integer = {c for c in self.measures
+                        if pa.types.is_integer(table.schema.field(c).type)}
+        self.rows = table.num_rows
+
+    def values(self, key: str) -> list:
+        return self.labels[key].tolist()
+
+    def _mask(self, where: dict[str, Any]) -> np.ndarray:
+        mask = None
+        for k, v in where.items():
+            if v is None:
+                continue
+            wanted = v if isinstance(v, (list, tuple, set)) else [v]
+            pos = np.flatnonzero(np.isin(self.labels[k], list(wanted)))
+            m = np.isin(self.codes[k], pos)
+            mask = m if mask is None else mask & m
+        return np.ones(self.rows, dtype=bool) if mask is None else mask
+
+    def group(self, by: tuple[str, ...] = (), **where) -> pd.DataFrame:
+        """Sum of every measure per *by* group, rows filtered by *where*
+        (column=value or column=[values]); groups without rows are left
+        out."""
+        unknown = (set(by) | set(where)) - set(self.keys)
+        if unknown:
+            raise KeyError(f"Not a key column: {', '.join(sorted(unknown))}")
+        rows = np.arange(self.rows)[self._mask(where)]
+        shape = tuple(len(self.labels[k]) for k in by)
+        key = (np.ravel_multi_index([self.codes[k][rows] for k in by], shape)
+               if by else np.zeros(len(rows), dtype=np.int64))
+        size = int(np.prod(shape)) if by else 1
+        sums = {c: np.bincount(key, weights=v[rows], minlength=size)
+                for c, v in self.measures.items()}
+        present = np.flatnonzero(np.bincount(key, minlength=size))
+        out = {k: self.labels[k][idx] for k, idx in
+               zip(by, np.unravel_index(present, shape))} if by else {}
+        for c, s in sums.items():
+            out[c] = s[present].astype(np.int64) if c in self.integer else s[present]
+        return pd.DataFrame(out)
+
+
+# ─── Cache ──────────────────────────────────────────────────────────────────────
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after *ttl* seconds and
+    carry the snapshot version they were computed against."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data: OrderedDict[Hashable, tuple[str, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, version: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version \
+                    or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, version: str, value) -> None:
+        with self._lock:
+            self._data[key] = (version, time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_MISSING = object()
+
+
+def _frozen(params: dict, ordered: bool = False) -> tuple:
+    """Hashable, order-independent form of *params* for a cache key.
+
+    Lists / sets (a multiselect's ``route=[...]``) become sorted tuples –
+    filters are sets of values; with *ordered* (Cypher parameters) list
+    order is kept."""
+    def freeze(v):
+        if isinstance(v, dict):
+            return _frozen(v, ordered)
+        if isinstance(v, (set, frozenset)) or \
+                (isinstance(v, (list, tuple)) and not ordered):
+            return tuple(sorted((freeze(x) for x in v), key=repr))
+        if isinstance(v, (list, tuple)):
+            return tuple(freeze(x) for x in v)
+        return v
+    return tuple(sorted(((k, freeze(v)) for k, v in params.items()),
+                        key=lambda kv: kv[0]))
+
+
+# ─── Service ────────────────────────────────────────────────────────────────────
+class QueryService:
+    """Dashboard queries, answered from the snapshot in *path* and the
+    cache; *driver* (optional) serves ``lookup``.  Thread-safe – one
+    instance per process (``st.cache_resource``)."""
+
+    KEYS = {"sponsors": ["route", "town", "county", "rating"],
+            "orgs": ["town", "county", "rating"],
+            "ads": ["category", "sponsored", "band"]}
+
+    def __init__(self, path: str | Path = DEFAULT_DIR, driver=None, *,
+                 maxsize: int = 256, ttl: float = 600, check_s: float = 5):
+        self.path = Path(path)
+        self.driver = driver
+        self.cache = TTLCache(maxsize, ttl)
+        self.check_s = check_s
+        self.meta: dict = {}
+        self.tables: dict[str, Aggregate] = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._sync(force=True)
+
+    # ── snapshot ──
+    @property
+    def version(self) -> str:
+        return f"{self.meta.get('load_ts')}/{self.meta.get('built_at')}"
+
+    @property
+    def load_ts(self) -> str | None:
+        return self.meta.get("load_ts")
+
+    def _sync(self, force: bool = False) -> None:
+        """Reload the tables if ``meta.json`` changed; at most one stat
+        per ``check_s`` seconds."""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_s:
+            return
+        with self._lock:
+            self._checked = now
+            meta_path = self.path / "meta.json"
+            try:
+                mtime = meta_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                if force:
+                    log.warning("No aggregates at %s – run "
+                                "etl/query_service.py refresh", self.path)
+                return
+            if mtime == self._mtime:
+                return
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            tables = {name: Aggregate(pq.read_table(self.path / f"{name}.parquet"),
+                                      keys)
+                      for name, keys in self.KEYS.items()
+                      if (self.path / f"{name}.parquet").exists()}
+            old = self.load_ts
+            self.meta, self.tables, self._mtime = meta, tables, mtime
+            self.cache.clear()
+            if old is not None:
+                log.info("Aggregates reloaded: load %s -> %s", old, self.load_ts)
+
+    def _table(self, name: str) -> Aggregate:
+        self._sync()
+        if name not in self.tables:
+            raise RuntimeError(f"Aggregate {name!r} not materialised – run "
+                               f"etl/query_service.py refresh")
+        return self.tables[name]
+
+    def cached(self, key: Hashable, fn: Callable[[], Any]):
+        """*fn()* through the cache under *key* for the current snapshot."""
+        self._sync()
+        version = self.version
+        value = self.cache.get(key, version, _MISSING)
+        METRICS.inc("query_cache_total",
+                    result="miss" if value is _MISSING else "hit")
+        if value is _MISSING:
+            value = fn()
+            self.cache.put(key, version, value)
+        return value
+
+    # ── aggregates ──
+    def sponsor_counts(self, by: tuple[str, ...] = ("route",), **where
+                       ) -> pd.DataFrame:
+        """Licensed organisations per *by* group (route, town, county,
+        rating).  Without route in *by* / *where* each organisation counts
+        once; with it, once per route it offers."""
+        by = tuple(by)
+        name = "sponsors" if "route" in by or where.get("route") is not None \
+            else "orgs"
+        where = {k: v for k, v in where.items() if k != "route" or name == "sponsors"}
+        key = ("sponsor_counts", by, _frozen(where))
+        return self.cached(key, lambda: self._table(name).group(by, **where)
+                           .sort_values("orgs", ascending=False,
+                                        ignore_index=True))
+
+    def ad_counts(self, by: tuple[str, ...] = ("category",),
+                  sponsored: bool | None = None, **where) -> pd.DataFrame:
+        """Ads per *by* group; *sponsored* True / False keeps only ads
+        posted / not posted by a licensed sponsor."""
+        by = tuple(by)
+        key = ("ad_counts", by, sponsored, _frozen(where))
+
+        def run():
+            df = self._table("ads").group(by, sponsored=sponsored, **where)
+            df["avg_salary"] = (df["salary_sum"]
+                                / df["salaried"].where(df["salaried"] > 0))
+            return (df.drop(columns="salary_sum")
+                      .sort_values("ads", ascending=False, ignore_index=True))
+        return self.cached(key, run)
+
+    def salary_bands(self, sponsored: bool | None = True, **where
+                     ) -> pd.DataFrame:
+        """Ads per salary band, in band order (``unknown`` last)."""
+        key = ("salary_bands", sponsored, _frozen(where))
+
+        def run():
+            df = self._table("ads").group(("band",), sponsored=sponsored,
+                                          **where)
+            order = {b: i for i, b in enumerate(BANDS + [NO_SALARY])}
+            return (df.assign(_o=df["band"].map(order))
+                      .sort_values("_o", ignore_index=True)
+                      .drop(columns=["_o", "salaried", "salary_sum"]))
+        return self.cached(key, run)
+
+    def values(self, table: str, key: str) -> list:
+        """Distinct values of a key column – for select boxes."""
+        return self.cached(("values", table, key),
+                           lambda: self._table(table).values(key))
+
+    # ── live lookups ──
+    def lookup(self, cypher: str, **params) -> list[dict]:
+        """A parameterised read query, cached per (query, params)."""
+        if self.driver is None:
+            raise RuntimeError("QueryService has no driver – lookups need Neo4j")
+
+        def run():
+            with METRICS.timer("query_seconds", query="lookup"):
+                records, _, _ = self.driver.execute_query(
+                    cypher, params, database_="neo4j", routing_="r")
+            return [r.data() for r in records]
+        key = ("lookup", cypher, _frozen(params, ordered=True))
+        return self.cached(key, run)
+
+
+# ─── CLI ────────────────────────────────────────────────────────────────────────
+def last_load_ts(hash_index: str | Path = HASHES) -> str | None:
+    """Load timestamp of the last committed etl_neo4j_load.py run."""
+    if not Path(hash_index).exists():
+        return None
+    from row_hashes import RowHashIndex
+    with RowHashIndex(hash_index) as idx:
+        return idx.load_ts()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Dashboard aggregates and cache")
+    p.add_argument("--dir", default=str(DEFAULT_DIR))
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("refresh", help="recompute the aggregates from Neo4j")
+    r.add_argument("--load_ts", default="",
+                   help="stamp for the snapshot (default: last register "
+                        "load in --hash_index, else now)")
+    r.add_argument("--hash_index", default=str(HASHES))
+    r.add_argument("--only", default="",
+                   help="comma-separated aggregates: " + ",".join(AGGREGATES))
+    s = sub.add_parser("show", help="query the snapshot (no database)")
+    s.add_argument("--table", choices=("sponsors", "ads", "bands"),
+                   default="sponsors")
+    s.add_argument("--by", default="route", help="comma-separated key columns")
+    s.add_argument("--route")
+    s.add_argument("--town")
+    s.add_argument("--category")
+    s.add_argument("--top", type=int, default=20)
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    if args.cmd == "refresh":
+        from dotenv import load_dotenv
+        from neo4j_writer import close_driver, get_driver
+        load_dotenv()
+        names = [n.strip() for n in args.only.split(",") if n.strip()] or None
+        unknown = set(names or ()) - set(AGGREGATES)
+        if unknown:
+            sys.exit(f"  Unknown aggregates: {', '.join(sorted(unknown))}")
+        try:
+            meta = refresh(get_driver(),
+                           args.load_ts or last_load_ts(args.hash_index),
+                           args.dir, names)
+        finally:
+            close_driver()
+        print(f"  Snapshot {meta['load_ts']} ({meta['built_at']}) -> {args.dir}")
+        return 0
+
+    svc = QueryService(args.dir)
+    if not svc.tables:
+        sys.exit(f"  No aggregates in {args.dir} – run refresh first")
+    by = tuple(b.strip() for b in args.by.split(",") if b.strip())
+    timings = []
+    for _ in range(2):                          # second pass: from the cache
+        t0 = time.perf_counter()
+        if args.table == "sponsors":
+            df = svc.sponsor_counts(by, route=args.route, town=args.town)
+        elif args.table == "ads":
+            df = svc.ad_counts(by, sponsored=True, category=args.category)
+        else:
+            df = svc.salary_bands(category=args.category)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(df.head(args.top).to_string(index=False))
+    print(f"  load {svc.load_ts}: {len(df):,} groups, "
+          f"{timings[0]:.2f} ms computed, {timings[1]:.3f} ms cached")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
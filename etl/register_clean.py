@@ -0,0 +1,40 @@
+# register_clean.py – v0.1  (ASCII-only)
+"""
+Raw GOV.UK sponsor register -> cleaned DataFrame.
+
+Used by etl_sponsor_register.py (and the offline benchmarks in bench/):
+
+    df = clean_register(read_raw("data/sponsor_register_raw_2025-07-25.csv"))
+
+• headers stripped and snake_cased ("Type & Rating" -> ``type_rating``);
+• rows without organisation or town dropped, exact duplicates dropped;
+• canonical ``name_clean`` / ``trading_name_clean`` (name_canon.py) joined
+  on – same rules as Adzuna company names, written to Neo4j by
+  etl_neo4j_load.py, no post-load APOC pass needed.
+"""
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+from name_canon import canonicalize
+
+
+def read_raw(path: str | os.PathLike) -> pd.DataFrame:
+    """Raw register download (.csv or .xlsx), every cell a string."""
+    if str(path).lower().endswith(".csv"):
+        return pd.read_csv(path, dtype=str)
+    try:                                # Rust reader, much faster than openpyxl
+        return pd.read_excel(path, engine="calamine", dtype=str)
+    except ImportError:
+        return pd.read_excel(path, engine="openpyxl", dtype=str)
+
+
+def clean_register(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns=str.strip)
+    df.columns = (df.columns.str.lower()
+                            .str.replace(r"[^\w]+", "_", regex=True)
+                            .str.strip("_"))
+    df = df.dropna(subset=["organisation_name", "town_city"]).drop_duplicates()
+    return df.join(canonicalize(df["organisation_name"]))
@@ -0,0 +1,187 @@
+# register_fetch.py – v0.1  (ASCII-only)
+"""
+Conditional, resumable download of the sponsor register file.
+
+What was fetched last lives in a small JSON state file next to the
+downloads: url, etag, last_modified, sha256, path, fetched / changed day.
+
+• the GET carries If-None-Match / If-Modified-Since from the last download
+  of the same URL; 304 Not Modified costs one round trip and no body;
+• the body streams into ``<state>.part``; an interrupted transfer resumes
+  with ``Range: bytes=<size>-`` guarded by ``If-Range`` (a file changed in
+  the meantime answers 200 and restarts from zero; 416 Range Not
+  Satisfiable drops the partial body and downloads again without Range);
+• before the rename the size is checked against Content-Length /
+  Content-Range and the sha256 against a ``Digest`` / ``Repr-Digest``
+  header when the server sends one – a mismatch drops the partial body;
+• the finished body is sha256-hashed, so a re-published but identical
+  register (new URL / ETag, same bytes) is recognised and not kept twice;
+• transfer time, status code and bytes go to ``metrics.METRICS``
+  (service="govuk_register").
+
+    got = fetch(url, "data/sponsor_register_raw_2025-07-25.csv",
+                state="data/sponsor_register_fetch.json")
+    got.changed, got.path, got.sha256
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+
+from metrics import METRICS
+
+CHUNK = 1 << 16
+
+
+class Fetched(NamedTuple):
+    path: Path
+    sha256: str
+    changed: bool
+    status: str                 # "not-modified" | "same-content" | "downloaded"
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_state(path: str | Path) -> dict:
+    path = Path(path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def _save_state(path: Path, state: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _validator(headers) -> str | None:
+    """If-Range needs a strong ETag or a Last-Modified date."""
+    etag = headers.get("ETag")
+    return etag if etag and not etag.startswith("W/") \
+        else headers.get("Last-Modified")
+
+
+def _sha256_header(headers) -> str | None:
+    """Hex sha256 from ``Repr-Digest: sha-256=:<b64>:`` or
+    ``Digest: SHA-256=<b64>``; None when the server sends neither."""
+    for name in ("Repr-Digest", "Digest"):
+        m = re.search(r"sha-256=:?([A-Za-z0-9+/=]+):?",
+                      headers.get(name, ""), re.I)
+        if m:
+            try:
+                return base64.b64decode(m.group(1)).hex()
+            except ValueError:
+                return None
+    return None
+
+
+def _drop_part(part: Path, state_path: Path, st: dict) -> None:
+    part.unlink(missing_ok=True)
+    st.pop("part_url", None)
+    st.pop("part_validator", None)
+    _save_state(state_path, st)
+
+
+def fetch(url: str, dest: str | Path, *, state: str | Path,
+          headers: dict | None = None, timeout: float = 120,
+          session=requests) -> Fetched:
+    """Download *url* to *dest* unless it is unchanged since the last call.
+
+    When unchanged, ``path`` is the previous download.  Network errors
+    propagate with the partial body kept for the next call to resume.
+    """
+    state_path = Path(state)
+    st = load_state(state_path)
+    part = state_path.with_name(state_path.stem + ".part")
+    prev = Path(st["path"]) if st.get("path") else None
+    have_prev = prev is not None and prev.exists()
+
+    hdrs = dict(headers or {})
+    offset = part.stat().st_size if part.exists() else 0
+    if offset and st.get("part_url") == url and st.get("part_validator"):
+        hdrs["Range"] = f"bytes={offset}-"
+        hdrs["If-Range"] = st["part_validator"]
+    else:
+        offset = 0
+        if have_prev and st.get("url") == url:
+            if st.get("etag"):
+                hdrs["If-None-Match"] = st["etag"]
+            if st.get("last_modified"):
+                hdrs["If-Modified-Since"] = st["last_modified"]
+
+    today = date.today().isoformat()
+    with METRICS.timer("http_request_seconds", service="govuk_register"), \
+            session.get(url, headers=hdrs, stream=True, timeout=timeout) as r:
+        METRICS.inc("http_requests_total", service="govuk_register",
+                    code=r.status_code)
+        if r.status_code == 304 and have_prev:
+            st["fetched"] = today
+            _save_state(state_path, st)
+            return Fetched(prev, st["sha256"], False, "not-modified")
+        if r.status_code == 416 and "Range" in hdrs:
+            # partial body longer than (or stale against) the file: restart
+            _drop_part(part, state_path, st)
+            return fetch(url, dest, state=state, headers=headers,
+                         timeout=timeout, session=session)
+        r.raise_for_status()
+        resumed = r.status_code == 206
+        if resumed and not r.headers.get("Content-Range", "") \
+                .startswith(f"bytes {offset}-"):
+            part.unlink(missing_ok=True)
+            raise RuntimeError(f"Unexpected Content-Range from {url}: "
+                               f"{r.headers.get('Content-Range')!r}")
+        if not resumed:
+            offset = 0
+        st.update(part_url=url, part_validator=_validator(r.headers))
+        _save_state(state_path, st)
+        with open(part, "ab" if resumed else "wb") as f:
+            for chunk in r.iter_content(CHUNK):
+                f.write(chunk)
+                METRICS.inc("http_bytes_total", len(chunk),
+                            service="govuk_register")
+        size = part.stat().st_size
+        length = r.headers.get("Content-Length")
+        if length and size != offset + int(length):
+            raise RuntimeError(f"Incomplete download of {url} "
+                               f"({size:,} bytes); run again to resume")
+        total = r.headers.get("Content-Range", "").rpartition("/")[2]
+        if resumed and total.isdigit() and size != int(total):
+            _drop_part(part, state_path, st)
+            raise RuntimeError(f"Resumed download of {url} is {size:,} "
+                               f"bytes, expected {int(total):,}; partial "
+                               f"body dropped")
+        expected = _sha256_header(r.headers)
+        etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+    digest = file_sha256(part)
+    if expected and digest != expected:
+        _drop_part(part, state_path, st)
+        raise RuntimeError(f"sha256 mismatch for {url}: got {digest}, "
+                           f"server sent {expected}; partial body dropped")
+    st.pop("part_url", None)
+    st.pop("part_validator", None)
+    st.update(url=url, etag=etag, last_modified=last_modified, fetched=today)
+    if have_prev and digest == st.get("sha256"):
+        part.unlink()
+        _save_state(state_path, st)
+        return Fetched(prev, digest, False, "same-content")
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(part, dest)
+    st.update(sha256=digest, path=str(dest), changed=today)
+    _save_state(state_path, st)
+    return Fetched(dest, digest, True, "downloaded")
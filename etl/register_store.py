@@ -0,0 +1,291 @@
+# register_store.py – v0.1  (ASCII-only)
+"""
+Columnar, versioned snapshot store for the cleaned sponsor register.
+
+Instead of four full copies per day, each day is one entry of a manifest:
+
+  • base   – full snapshot, Parquet (zstd) with dictionary-encoded
+             ``town_city`` / ``county`` / ``type_rating`` / ``route``;
+  • delta  – only the rows added / removed since the previous day
+             (a rating or route change is one removal + one addition),
+             appended to the base's change log ``log_<base date>.parquet``
+             with the day in ``_date``.
+
+"As of date X" reads one base and one log, keeps the log rows up to X and
+applies the last operation per row.  A new base (and log) is started every
+``rebase_every`` deltas, or once the log exceeds ``rebase_ratio`` of the
+base's rows.  Identical days (same content hash) cost one manifest line.
+
+    store = RegisterStore("data/register_store")
+    store.put("2025-07-25", df)               # cleaned DataFrame
+    df = store.as_of("2025-07-20")            # latest snapshot <= date
+    store.export("2025-07-25", "xlsx", path)  # Excel / CSV on demand
+
+CLI:  python register_store.py list
+      python register_store.py export --date 2025-07-25 --format excel_csv
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:                                    # optional at import, needed to store
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:                     # pragma: no cover
+    pa = pq = None
+
+DICT_COLUMNS = ("town_city", "county", "type_rating", "route")
+EXPORT_FORMATS = ("csv", "excel_csv", "xlsx")
+KEY = "_row"                            # per-row content hash (uint64)
+LOG_COLUMNS = ("_op", "_date")          # change-log only: "+" / "-", day
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("The register store needs pyarrow (pip install pyarrow)")
+
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """uint64 content hash per row (column order independent)."""
+    return pd.util.hash_pandas_object(df[sorted(df.columns)],
+                                      index=False).to_numpy()
+
+
+def content_hash(keys: np.ndarray) -> str:
+    """Order-independent hash of a whole snapshot."""
+    return hashlib.blake2b(np.sort(keys).tobytes(), digest_size=16).hexdigest()
+
+
+def _append(df: pd.DataFrame, add: pd.DataFrame) -> pd.DataFrame:
+    """Row-concat keeping dictionary columns categorical (pd.concat would
+    fall back to object columns when the categories differ)."""
+    if not len(add):
+        return df.reset_index(drop=True)
+    cols = {}
+    for c in df.columns:
+        a, b = df[c], add[c]
+        if isinstance(a.dtype, pd.CategoricalDtype) \
+                and isinstance(b.dtype, pd.CategoricalDtype):
+            cols[c] = pd.Series(union_categoricals([a, b]))
+        else:
+            cols[c] = pd.concat([a, b], ignore_index=True)
+    return pd.DataFrame(cols)
+
+
+def export_frame(df: pd.DataFrame, fmt: str, path: str | os.PathLike) -> Path:
+    """Write *df* in one of the legacy layouts of etl_sponsor_register.py."""
+    path = Path(path)
+    if fmt == "csv":                    # comma, BOM – pipelines / Neo4j
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write("sep=,\n")
+            df.to_csv(f, index=False)
+    elif fmt == "excel_csv":            # semicolon, BOM – Excel preview
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write("sep=;\n")
+            df.to_csv(f, sep=";", index=False)
+    elif fmt == "xlsx":
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False, sheet_name="AllRoutes")
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return path
+
+
+class RegisterStore:
+    def __init__(self, root: str | os.PathLike, *, rebase_every: int = 30,
+                 rebase_ratio: float = 0.25):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.rebase_every = rebase_every
+        self.rebase_ratio = rebase_ratio
+        self._manifest_path = self.root / "manifest.json"
+        self.entries: list[dict] = (
+            json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            if self._manifest_path.exists() else [])
+        self._cache: tuple[str, pd.DataFrame] | None = None   # as_of result
+        self._base: tuple | None = None         # (file, base frame, its log)
+
+    # ── manifest ────────────────────────────────────────────────────
+    def _save_manifest(self) -> None:
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2), encoding="utf-8")
+        os.replace(tmp, self._manifest_path)
+
+    def dates(self) -> list[str]:
+        return [e["date"] for e in self.entries]
+
+    def latest(self) -> dict | None:
+        return self.entries[-1] if self.entries else None
+
+    def _entry(self, date: str) -> int:
+        """Index of the latest entry on or before *date*."""
+        idx = [i for i, e in enumerate(self.entries) if e["date"] <= date]
+        if not idx:
+            raise KeyError(f"No register snapshot on or before {date}")
+        return idx[-1]
+
+    # ── files ───────────────────────────────────────────────────────
+    def _write(self, df: pd.DataFrame, name: str) -> str:
+        _require_pyarrow()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, self.root / name, compression="zstd",
+                       use_dictionary=[c for c in DICT_COLUMNS
+                                       if c in df.columns])
+        return name
+
+    def _read(self, name: str) -> pd.DataFrame:
+        _require_pyarrow()
+        return pq.read_table(self.root / name,
+                             read_dictionary=list(DICT_COLUMNS)).to_pandas()
+
+    def _write_log(self, log: pd.DataFrame, name: str) -> None:
+        """Replace the change log atomically (rows are only ever appended)."""
+        tmp = f"{name}.tmp"
+        self._write(log, tmp)
+        os.replace(self.root / tmp, self.root / name)
+
+    def _log_name(self, base_i: int) -> str:
+        return f"log_{self.entries[base_i]['date']}.parquet"
+
+    # ── write ───────────────────────────────────────────────────────
+    def put(self, date: str, df: pd.DataFrame) -> dict:
+        """Store the cleaned register of *date*; returns its manifest entry.
+
+        Re-putting the last date replaces it; earlier dates are immutable.
+        """
+        df = df.fillna("").astype(str).reset_index(drop=True)
+        keys = row_keys(df)
+        digest = content_hash(keys)
+        if self.entries and date < self.entries[-1]["date"]:
+            raise ValueError(f"{date} is older than the latest snapshot "
+                             f"({self.entries[-1]['date']})")
+        if self.entries and self.entries[-1]["date"] == date:
+            if self.entries[-1]["hash"] == digest:
+                return self.entries[-1]
+            self._drop_last()
+
+        prev = self.latest()
+        entry = dict(date=date, hash=digest, rows=len(df))
+        if prev is not None and prev["hash"] == digest:
+            entry.update(kind="same", file=None, added=0, removed=0)
+        else:
+            base_i = max((i for i, e in enumerate(self.entries)
+                          if e["kind"] == "base"), default=None)
+            since = self.entries[base_i + 1:] if base_i is not None else []
+            churn = sum(e["added"] + e["removed"] for e in since
+                        if e["kind"] == "delta")
+            if prev is None or len(since) >= self.rebase_every \
+                    or churn > self.rebase_ratio * self.entries[base_i]["rows"]:
+                self._write(df.assign(**{KEY: keys}), f"base_{date}.parquet")
+                entry.update(kind="base", file=f"base_{date}.parquet",
+                             added=len(df), removed=0)
+            else:
+                entry.update(self._write_delta(date, df, keys, base_i))
+        self.entries.append(entry)
+        self._save_manifest()
+        self._cache = self._base = None
+        return entry
+
+    def _write_delta(self, date: str, df: pd.DataFrame, keys: np.ndarray,
+                     base_i: int) -> dict:
+        old = self.as_of(self.entries[-1]["date"], keys=True)
+        new = ~pd.Series(keys).isin(old[KEY]).to_numpy()
+        added = df[new].assign(**{KEY: keys[new], "_op": "+"})
+        removed = old[~old[KEY].isin(keys)].assign(_op="-")
+        delta = pd.concat([added, removed[added.columns]], ignore_index=True)
+        name = self._log_name(base_i)
+        log = self._read_log(name)
+        self._write_log(pd.concat([log, delta.assign(_date=date)],
+                                  ignore_index=True), name)
+        return dict(kind="delta", file=name,
+                    added=len(added), removed=len(removed))
+
+    def _read_log(self, name: str) -> pd.DataFrame | None:
+        return self._read(name) if (self.root / name).exists() else None
+
+    def _drop_last(self) -> None:
+        last = self.entries.pop()
+        if last["kind"] == "base":
+            (self.root / last["file"]).unlink(missing_ok=True)
+        elif last["kind"] == "delta":
+            log = self._read(last["file"])
+            self._write_log(log[log["_date"] != last["date"]], last["file"])
+        self._cache = self._base = None
+
+    # ── read ────────────────────────────────────────────────────────
+    def as_of(self, date: str, *, keys: bool = False) -> pd.DataFrame:
+        """The register as it was on *date* (latest snapshot <= date)."""
+        i = self._entry(date)
+        target = self.entries[i]["date"]
+        if self._cache is None or self._cache[0] != target:
+            base_i = max(j for j in range(i + 1)
+                         if self.entries[j]["kind"] == "base")
+            name = self.entries[base_i]["file"]
+            if self._base is None or self._base[0] != name:
+                log = self._read_log(self._log_name(base_i))
+                self._base = (name, self._read(name), log)
+            _, df, log = self._base
+            if log is not None:
+                net = log[log["_date"] <= target] \
+                        .drop_duplicates(KEY, keep="last")
+                if len(net):
+                    df = _append(df[~df[KEY].isin(net[KEY])],
+                                 net[net["_op"] == "+"])
+            self._cache = (target, df)
+        df = self._cache[1]
+        return df.copy() if keys else df.drop(columns=KEY)
+
+    def export(self, date: str, fmt: str,
+               path: str | os.PathLike | None = None) -> Path:
+        """On-demand CSV / semicolon CSV / XLSX of the register on *date*."""
+        df = self.as_of(date)
+        date = self.entries[self._entry(date)]["date"]
+        suffix = {"csv": ".csv", "excel_csv": ".csv", "xlsx": ".xlsx"}[fmt]
+        stem = "sponsor_register_clean_excel" if fmt == "excel_csv" \
+            else "sponsor_register_clean"
+        return export_frame(df.astype(str), fmt,
+                            path or self.root / f"{stem}_{date}{suffix}")
+
+    def disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*.parquet"))
+
+
+# ─────────────────────────── CLI ──────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Sponsor register snapshot store")
+    p.add_argument("--store", default="data/register_store")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="snapshots with their kind and churn")
+    ex = sub.add_parser("export", help="write a snapshot as CSV / XLSX")
+    ex.add_argument("--date", default="9999-12-31",
+                    help="YYYY-MM-DD (default: latest)")
+    ex.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    ex.add_argument("--out", default="")
+    args = p.parse_args(argv)
+
+    store = RegisterStore(args.store)
+    if args.cmd == "list":
+        for e in store.entries:
+            print(f"{e['date']}  {e['kind']:<5}  {e['rows']:>7,} rows  "
+                  f"+{e['added']:,} / -{e['removed']:,}  {e['hash'][:12]}")
+        print(f"{len(store.entries)} snapshots, "
+              f"{store.disk_bytes() / 2**20:.1f} MiB on disk")
+    else:
+        try:
+            print(store.export(args.date, args.format, args.out or None))
+        except KeyError as e:
+            sys.exit(f" {e.args[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# row_hashes.py – v0.1  (ASCII-only)
+"""
+Per-organisation content hashes of the sponsor register (SQLite).
+
+An organisation spans one register row per route; its hash covers all of
+its rows (order-independent), so any change in rating, town, county or
+route set changes the hash.
+
+    idx = RowHashIndex("data/sponsor_row_hashes.sqlite")
+    added, changed, removed = idx.diff(org_hashes(df))
+    ... load the delta ...
+    idx.commit(current, load_ts, source=file_sha256(csv))   # after the load
+
+``source()`` is the digest of the register file behind the last load, so
+an unchanged file can be skipped without reading it; ``load_ts()`` is that
+load's timestamp (query_service.py stamps dashboard aggregates with it).
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+CREATE TABLE IF NOT EXISTS org_hash (
+    name     TEXT PRIMARY KEY,
+    hash     TEXT NOT NULL,
+    load_ts  TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def org_hashes(df: pd.DataFrame, key: str = "organisation_name") -> dict[str, str]:
+    """organisation name → 16-hex digest over all of its register rows."""
+    cols = sorted(c for c in df.columns if c != key)
+    row_h = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    names = df[key].str.strip().to_numpy()
+    order = np.lexsort((row_h, names))              # by name, then row hash
+    names, row_h = names[order], row_h[order]
+    cuts = np.flatnonzero(names[1:] != names[:-1]) + 1
+    out: dict[str, str] = {}
+    for name, block in zip(names[np.r_[0, cuts]] if len(names) else [],
+                           np.split(row_h, cuts)):
+        if name:
+            out[name] = hashlib.blake2b(block.tobytes(),
+                                        digest_size=8).hexdigest()
+    return out
+
+
+class RowHashIndex:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "RowHashIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def previous(self) -> dict[str, str]:
+        return dict(self._db.execute("SELECT name, hash FROM org_hash"))
+
+    def source(self) -> str | None:
+        """Digest of the register file of the last committed load."""
+        row = self._db.execute(
+            "SELECT v FROM meta WHERE k = 'source'").fetchone()
+        return row[0] if row else None
+
+    def load_ts(self) -> str | None:
+        """Timestamp of the last committed load."""
+        row = self._db.execute(
+            "SELECT v FROM meta WHERE k = 'load_ts'").fetchone()
+        return row[0] if row else None
+
+    def diff(self, current: dict[str, str]
+             ) -> tuple[set[str], set[str], set[str]]:
+        """(added, changed, removed) organisation names vs the last load."""
+        prev = self.previous()
+        added = current.keys() - prev.keys()
+        removed = prev.keys() - current.keys()
+        changed = {n for n in current.keys() & prev.keys()
+                   if current[n] != prev[n]}
+        return set(added), changed, set(removed)
+
+    def commit(self, current: dict[str, str], load_ts: str,
+               source: str | None = None) -> None:
+        """Replace the stored snapshot with *current*."""
+        with self._db:
+            self._db.execute("DELETE FROM org_hash")
+            self._db.executemany(
+                "INSERT INTO org_hash VALUES (?, ?, ?)",
+                ((n, h, load_ts) for n, h in current.items()))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)",
+                             (source,))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('load_ts', ?)",
+                             (load_ts,))
@@ -0,0 +1,122 @@
+# run_checkpoint.py – v0.1  (ASCII-only)
+"""
+Resumable-run checkpoints for the streaming pipeline (SQLite).
+
+A run is its id plus the arguments that define its work (search terms,
+cities, pages).  The write stage marks each term/city page once its ads
+are in Neo4j; a crashed run is resumed from the page after the last one
+marked per pair, and pairs whose final page is marked are skipped.
+
+    cp = Checkpoint("data/pipeline_checkpoint.sqlite")
+    run = cp.start({"search": ..., "city": ..., "pages": 5})
+    cp.mark(run, [(term, city, page, last, rows), ...])
+    ...
+    run, args = cp.unfinished()          # after a crash
+    start = cp.next_pages(run)           # {(term, city): first page}
+    done = cp.done_pairs(run)
+    cp.finish(run)
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run (
+    id        TEXT PRIMARY KEY,
+    args      TEXT NOT NULL,
+    started   TEXT NOT NULL,
+    finished  TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS page (
+    run    TEXT NOT NULL,
+    term   TEXT NOT NULL,
+    city   TEXT NOT NULL,
+    page   INTEGER NOT NULL,
+    last   INTEGER NOT NULL,
+    rows   INTEGER NOT NULL,
+    PRIMARY KEY (run, term, city, page)
+) WITHOUT ROWID;
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Checkpoint:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── runs ─────────────────────────────────────────────────────────
+    def start(self, args: dict, run_id: str | None = None) -> str:
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO run VALUES (?, ?, ?, NULL)",
+                             (run_id, json.dumps(args), _now()))
+        return run_id
+
+    def unfinished(self, run_id: str | None = None) -> tuple[str, dict] | None:
+        """(id, args) of *run_id*, or of the latest run never finished."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, args FROM run WHERE id = ?", (run_id,)).fetchone() \
+                if run_id else self._db.execute(
+                "SELECT id, args FROM run WHERE finished IS NULL "
+                "ORDER BY started DESC, id DESC LIMIT 1").fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def finish(self, run_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE run SET finished = ? WHERE id = ?",
+                             (_now(), run_id))
+
+    # ── pages ────────────────────────────────────────────────────────
+    def mark(self, run_id: str,
+             pages: Iterable[tuple[str, str, int, bool, int]]) -> None:
+        """Record (term, city, page, last, rows) as written."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, t, c, p, int(last), n) for t, c, p, last, n in pages])
+
+    def next_pages(self, run_id: str) -> dict[tuple[str, str], int]:
+        """First page still to fetch per term/city pair with progress."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT term, city, max(page) FROM page WHERE run = ? "
+                "GROUP BY term, city", (run_id,)).fetchall()
+        return {(t, c): p + 1 for t, c, p in rows}
+
+    def done_pairs(self, run_id: str) -> set[tuple[str, str]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT term, city FROM page WHERE run = ? AND last = 1",
+                (run_id,)).fetchall()
+        return {(t, c) for t, c in rows}
+
+    def totals(self, run_id: str) -> tuple[int, int]:
+        """(pages, ads) written so far in *run_id*."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT count(*), coalesce(sum(rows), 0) FROM page "
+                "WHERE run = ?", (run_id,)).fetchone()
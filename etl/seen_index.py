@@ -0,0 +1,107 @@
+# seen_index.py – v0.1  (ASCII-only)
+"""
+Persistent index of Adzuna ads already crawled (SQLite, one row per id).
+
+• ``fresh(jobs)``     → only ads that are new, or whose ``created`` stamp /
+                        content digest changed since they were last seen.
+• ``all_known(jobs)`` → True when a page holds nothing new; the crawler uses
+                        it to stop paginating that term/city early.
+• ``record(jobs)``    → upsert ids with ``created``, digest and run stamps.
+
+Thread-safe: fetch workers may call ``all_known`` while the main thread
+records pages.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+DIGEST_FIELDS = ("created", "title", "description",
+                 "salary_min", "salary_max", "contract_type")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    id          TEXT PRIMARY KEY,
+    created     TEXT,
+    digest      TEXT NOT NULL,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def job_digest(job: dict) -> str:
+    """Short content hash over the fields that make an ad 'changed'."""
+    parts = [str(job.get(f, "")) for f in DIGEST_FIELDS]
+    parts.append(str((job.get("company") or {}).get("display_name", "")))
+    parts.append(str((job.get("location") or {}).get("display_name", "")))
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"),
+                           digest_size=12).hexdigest()
+
+
+class SeenIndex:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self) -> "SeenIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM seen").fetchone()[0]
+
+    # ── lookups ──────────────────────────────────────────────────────
+    def _known(self, ids: list[str]) -> dict[str, str]:
+        """id → stored digest, for the ids already in the index."""
+        out: dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), 900):           # SQLite var limit
+                chunk = ids[i:i + 900]
+                marks = ",".join("?" * len(chunk))
+                out.update(self._db.execute(
+                    f"SELECT id, digest FROM seen WHERE id IN ({marks})",
+                    chunk).fetchall())
+        return out
+
+    def fresh(self, jobs: Iterable[dict]) -> list[dict]:
+        jobs = list(jobs)
+        known = self._known([str(j.get("id")) for j in jobs])
+        return [j for j in jobs
+                if known.get(str(j.get("id"))) != job_digest(j)]
+
+    def all_known(self, jobs: Iterable[dict]) -> bool:
+        jobs = list(jobs)
+        return bool(jobs) and not self.fresh(jobs)
+
+    # ── writes ───────────────────────────────────────────────────────
+    def record(self, jobs: Iterable[dict], run_ts: str | None = None) -> None:
+        run_ts = run_ts or datetime.now(timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%SZ")
+        rows = [(str(j.get("id")), j.get("created"), job_digest(j),
+                 run_ts, run_ts) for j in jobs if j.get("id") is not None]
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO seen (id, created, digest, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET created = excluded.created, "
+                "digest = excluded.digest, last_seen = excluded.last_seen",
+                rows)
+            self._db.commit()
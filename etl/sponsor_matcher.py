@@ -0,0 +1,281 @@
+# sponsor_matcher.py – v0.1  (ASCII-only)
+"""
+In-process company → sponsor Organisation matcher.
+
+Replaces the per-row ``db.index.fulltext.queryNodes`` + ``apoc.text.
+jaroWinklerDistance`` round trip (scripts/neo4j/match_criteria.groovy):
+
+  1. register names and companies go through the same canonical form
+     (name_canon.py: accents, punctuation, legal suffixes, "T/A" trading
+     names – each trading name is indexed as an alias of its sponsor);
+  2. candidates come from a character-trigram inverted index (CSR NumPy
+     postings; trigrams present in > ``stop_df`` of names are skipped for
+     candidate generation only);
+  3. the top-k candidates are scored in one vectorised Jaro-Winkler pass;
+  4. the trigram Dice coefficient stands in for the Lucene score, and the
+     groovy thresholds apply unchanged:  ft >= 0.60 OR jw >= 0.85,
+     score = max(ft, jw).
+
+    m = SponsorMatcher.from_register_csv("data/sponsor_register_clean.csv")
+    m.match_many(["IBM UK LTD", "Barclays"])   # -> [Match | None, ...]
+"""
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+
+from name_canon import CANON_VERSION, canonical_name, split_trading_names
+
+MATCHER_VERSION = f"2.{CANON_VERSION}"  # bump when scoring changes
+
+FT_MIN = 0.60                   # match_criteria.groovy thresholds
+JW_MIN = 0.85
+NGRAM = 3
+JW_MAXLEN = 96                  # longer names are truncated for JW only
+
+
+class Match(NamedTuple):
+    org: str                    # Organisation.name
+    score: float                # max(ft, jw)
+    ft: float                   # trigram Dice (Lucene stand-in)
+    jw: float                   # Jaro-Winkler similarity
+
+
+def ngrams(text: str, n: int = NGRAM) -> set[str]:
+    padded = f"#{text}#"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def jaro_winkler(a: str, b: str, p: float = 0.1) -> float:
+    """Scalar reference implementation (same maths as ``jw_batch``)."""
+    if a == b:
+        return 1.0 if a else 0.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+    window = max(max(la, lb) // 2 - 1, 0)
+    used = [False] * lb
+    a_hits = []
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(lb, i + window + 1)):
+            if not used[j] and b[j] == ch:
+                used[j] = True
+                a_hits.append(ch)
+                break
+    m = len(a_hits)
+    if not m:
+        return 0.0
+    b_hits = [b[j] for j in range(lb) if used[j]]
+    t = sum(x != y for x, y in zip(a_hits, b_hits)) / 2
+    jaro = (m / la + m / lb + (m - t) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * p * (1 - jaro)
+
+
+def _codes(text: str, width: int) -> np.ndarray:
+    out = np.zeros(width, dtype=np.uint32)
+    raw = np.frombuffer(text[:width].encode("utf-32-le"), dtype=np.uint32)
+    out[:len(raw)] = raw
+    return out
+
+
+def jw_batch(query: str, cands: np.ndarray, lens: np.ndarray,
+             p: float = 0.1) -> np.ndarray:
+    """Jaro-Winkler of *query* against every row of *cands* at once.
+
+    *cands* is a (k, L) uint32 code-point matrix (0-padded), *lens* the
+    true lengths.  Matching is greedy left-to-right per query character,
+    exactly like the scalar version, but each step runs over all k rows.
+    """
+    k, width = cands.shape
+    q = _codes(query, min(len(query), JW_MAXLEN))
+    lq = len(q)
+    if not k or not lq:
+        return np.zeros(k)
+    lens = np.minimum(lens, width)
+    window = np.maximum(np.maximum(lens, lq) // 2 - 1, 0)          # (k,)
+    pos = np.arange(width)
+    valid = pos[None, :] < lens[:, None]
+    used = np.zeros((k, width), dtype=bool)
+    q_hit = np.zeros((k, lq), dtype=bool)
+    rows = np.arange(k)
+
+    for i in range(lq):
+        in_win = (pos[None, :] >= i - window[:, None]) & \
+                 (pos[None, :] <= i + window[:, None])
+        ok = (cands == q[i]) & ~used & valid & in_win
+        has = ok.any(axis=1)
+        first = ok.argmax(axis=1)
+        used[rows[has], first[has]] = True
+        q_hit[:, i] = has
+
+    m = q_hit.sum(axis=1)
+    # k-th matched query char vs k-th matched candidate char
+    q_seq = np.full((k, lq), -1, dtype=np.int64)
+    c_seq = np.full((k, lq), -2, dtype=np.int64)
+    qr, qc = np.nonzero(q_hit)
+    q_seq[qr, (np.cumsum(q_hit, axis=1) - 1)[qr, qc]] = q[qc]
+    cr, cc = np.nonzero(used)
+    c_seq[cr, (np.cumsum(used, axis=1) - 1)[cr, cc]] = cands[cr, cc]
+    t = ((q_seq != c_seq) & (q_seq >= 0)).sum(axis=1) / 2
+
+    safe_m = np.maximum(m, 1)
+    jaro = np.where(m > 0,
+                    (m / lq + m / np.maximum(lens, 1) + (safe_m - t) / safe_m) / 3,
+                    0.0)
+    lim = min(4, lq, width)
+    same = cands[:, :lim] == q[None, :lim]
+    prefix = np.cumprod(same, axis=1).sum(axis=1)
+    prefix = np.minimum(prefix, lens)
+    return jaro + prefix * p * (1 - jaro)
+
+
+class SponsorMatcher:
+    def __init__(self, names: Iterable[str], *, top_k: int = 25,
+                 stop_df: float = 0.05):
+        # one index entry per canonical key (legal name or trading name);
+        # the first sponsor to claim a key keeps it
+        entries: dict[str, str] = {}
+        for n in names:
+            n = (n or "").strip()
+            if not n:
+                continue
+            legal, aliases = split_trading_names(n)
+            for key in (legal, *aliases):
+                if key:
+                    entries.setdefault(key, n)
+        self.clean: list[str] = list(entries)
+        self.names: list[str] = list(entries.values())
+        self.top_k = top_k
+        self.exact = {c: i for i, c in enumerate(self.clean)}
+
+        # ── trigram vocabulary + CSR postings (gram → name ids) ──────────
+        vocab: dict[str, int] = {}
+        name_grams: list[np.ndarray] = []
+        for c in self.clean:
+            ids = sorted({vocab.setdefault(g, len(vocab)) for g in ngrams(c)})
+            name_grams.append(np.asarray(ids, dtype=np.int32))
+        self.vocab = vocab
+        self.gram_count = np.array([len(g) for g in name_grams],
+                                   dtype=np.int32)
+        self.name_ptr = np.concatenate(
+            [[0], np.cumsum(self.gram_count)]).astype(np.int64)
+        self.name_idx = (np.concatenate(name_grams) if name_grams
+                         else np.zeros(0, dtype=np.int32))
+
+        order = np.argsort(self.name_idx, kind="stable")
+        owner = np.repeat(np.arange(len(self.names), dtype=np.int32),
+                          self.gram_count)
+        self.post_idx = owner[order]
+        df = np.bincount(self.name_idx, minlength=len(vocab))
+        self.post_ptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self.stop = df > max(50, stop_df * len(self.names))
+
+        # ── padded code-point matrix for batched Jaro-Winkler ───────────
+        self.lens = np.array([len(c) for c in self.clean], dtype=np.int64)
+        width = int(min(JW_MAXLEN, self.lens.max(initial=1)))
+        self.codes = np.zeros((len(self.names), max(width, 1)),
+                              dtype=np.uint32)
+        for i, c in enumerate(self.clean):
+            self.codes[i] = _codes(c, self.codes.shape[1])
+
+    @classmethod
+    def from_register_csv(cls, path: str | Path, **kw) -> "SponsorMatcher":
+        """Cleaned register CSV from etl_sponsor_register.py (``sep=,``)."""
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            first = f.readline()
+            if not first.startswith("sep="):
+                f.seek(0)
+            names = (r.get("organisation_name") for r in csv.DictReader(f))
+            return cls(names, **kw)
+
+    def __len__(self) -> int:
+        return len(set(self.names))
+
+    # ── candidate generation ────────────────────────────────────────
+    def _gram_ids(self, text: str) -> np.ndarray:
+        ids = [self.vocab[g] for g in ngrams(text) if g in self.vocab]
+        return np.asarray(sorted(ids), dtype=np.int32)
+
+    def candidates(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k name ids for cleaned *text* and their trigram Dice."""
+        q_ids = self._gram_ids(text)
+        if not len(q_ids):
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        probe = q_ids[~self.stop[q_ids]]
+        if not len(probe):                      # only very common grams
+            probe = q_ids
+        hits = np.concatenate([self.post_idx[self.post_ptr[g]:
+                                             self.post_ptr[g + 1]]
+                               for g in probe])
+        if not len(hits):
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        ids, shared = np.unique(hits, return_counts=True)
+        rank = shared / np.sqrt(self.gram_count[ids])
+        if len(ids) > self.top_k:
+            keep = np.argpartition(-rank, self.top_k)[:self.top_k]
+            ids = ids[keep]
+
+        # exact Dice over all grams of the k candidates in one pass
+        starts, stops = self.name_ptr[ids], self.name_ptr[ids + 1]
+        grams = np.concatenate([self.name_idx[a:b]
+                                for a, b in zip(starts, stops)])
+        hit = np.isin(grams, q_ids, assume_unique=False)
+        offsets = np.concatenate([[0], np.cumsum(stops - starts)[:-1]])
+        common = np.add.reduceat(hit, offsets)
+        dice = 2 * common / (len(ngrams(text)) + self.gram_count[ids])
+        return ids, dice
+
+    # ── matching ────────────────────────────────────────────────────
+    def match_clean(self, text: str) -> Match | None:
+        """Match an already canonical name."""
+        if text in self.exact:                          # fast path
+            return Match(self.names[self.exact[text]], 1.0, 1.0, 1.0)
+        ids, ft = self.candidates(text)
+        if not len(ids):
+            return None
+        jw = jw_batch(text, self.codes[ids], self.lens[ids])
+        score = np.maximum(ft, jw)
+        ok = (ft >= FT_MIN) | (jw >= JW_MIN)
+        if not ok.any():
+            return None
+        best = int(np.argmax(np.where(ok, score, -1.0)))
+        i = int(ids[best])
+        return Match(self.names[i], float(score[best]),
+                     float(ft[best]), float(jw[best]))
+
+    def similar(self, text: str) -> list[Match]:
+        """Every indexed name within the thresholds of canonical *text*,
+        best first (``match_clean`` keeps only the first)."""
+        ids, ft = self.candidates(text)
+        if not len(ids):
+            return []
+        jw = jw_batch(text, self.codes[ids], self.lens[ids])
+        ok = (ft >= FT_MIN) | (jw >= JW_MIN)
+        score = np.maximum(ft, jw)
+        out = [Match(self.names[i], float(s), float(f), float(j))
+               for i, s, f, j in zip(ids[ok], score[ok], ft[ok], jw[ok])]
+        return sorted(out, key=lambda m: -m.score)
+
+    def match(self, company: str | None) -> Match | None:
+        return self.match_clean(canonical_name(company))
+
+    def match_many(self, companies: Sequence[str | None]) -> list[Match | None]:
+        """Match a batch; identical cleaned names are scored once."""
+        memo: dict[str, Match | None] = {}
+        out = []
+        for c in companies:
+            key = canonical_name(c)
+            if key not in memo:
+                memo[key] = self.match_clean(key) if key else None
+            out.append(memo[key])
+        return out
@@ -0,0 +1,132 @@
+# sponsorship_signal.py – v0.1  (ASCII-only)
+"""
+Single-pass visa-sponsorship signal scanner for job ads.
+
+Every phrase of the dictionary below is compiled into ONE alternation, so a
+description is scanned once (``finditer``) instead of once per keyword.
+Negations are listed first: at a given position the regex engine tries them
+before the positives, so "visa sponsorship is not available" or "no visa
+sponsorship" never count as the positive "visa sponsorship".
+
+    score = sum of the weights of every signal found in title + description
+            (> 0 sponsorship likely, < 0 explicitly ruled out, 0 no signal)
+
+``annotate(jobs)`` stores ``sponsorship_score`` and ``sponsorship_signals``
+on each ad of a page; ``--visa_only`` keeps ads with a positive score.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, NamedTuple
+
+SIGNAL_VERSION = "2"
+
+_NEG_VERB = (r"(?:cannot|can\s*not|can['\u2019]t|unable\s+to|not\s+able\s+to|"
+             r"do\s+not|don['\u2019]t|does\s+not|doesn['\u2019]t|will\s+not|won['\u2019]t|"
+             r"are\s+not\s+able\s+to|is\s+not\s+able\s+to)")
+
+# what a negation may name: "visa", "work visa", "Skilled Worker (visa)",
+# "Tier 2 (visa)" – so the route name is consumed by the negation, not
+# scored as a positive
+_SPONSORED = (r"(?:(?:work\s+|skilled\s+worker\s+|tier\s*2\s+)?visas?\s+|"
+              r"skilled\s+worker\s+|tier\s*2\s+)")
+
+# (name, weight, pattern) – negations first, longer phrases before shorter
+SIGNALS: list[tuple[str, int, str]] = [
+    # negations
+    ("cannot_sponsor", -4,
+     _NEG_VERB + r"\s+(?:sponsor(?:\s+(?:work\s+)?visas?)?|"
+                 r"(?:offer|provide|support)\s+(?:any\s+)?" + _SPONSORED +
+                 r"?(?:sponsorship|visas?))"),
+    ("sponsorship_unavailable", -4,
+     _SPONSORED + r"?sponsorship\s+(?:(?:is\s+|will\s+)?not\s+(?:be\s+)?"
+     r"(?:available|offered|provided|possible|considered)|"
+     r"(?:is\s+|will\s+be\s+)?unavailable)"),
+    ("not_eligible", -4, r"not\s+eligible\s+for\s+(?:visa\s+)?sponsorship"),
+    ("without_sponsorship", -4,
+     r"without\s+(?:the\s+)?(?:need|requirement)\s+(?:for|of)\s+"
+     r"(?:visa\s+)?sponsorship|without\s+(?:visa\s+)?sponsorship"),
+    ("no_sponsorship", -4, r"no\s+(?:visa\s+)?sponsorship"),
+    ("right_to_work_required", -3,
+     r"(?:must|need\s+to|required\s+to|should)\s+(?:already\s+)?"
+     r"(?:have|hold)\s+(?:the\s+|full\s+|an?\s+|existing\s+)?"
+     r"(?:unrestricted\s+)?right\s+to\s+work"),
+    ("nationals_only", -3, r"(?:uk|british)\s+(?:citizens|nationals)\s+only"),
+    # positives
+    ("sponsorship_available", 3,
+     r"(?:visa\s+)?sponsorship\s+(?:is\s+|can\s+be\s+)?(?:available|offered|provided)"),
+    ("offers_sponsorship", 3,
+     r"(?:we|will|can|able\s+to)\s+(?:offer|provide|support)\s+"
+     r"(?:visa\s+)?sponsorship"),
+    ("certificate_of_sponsorship", 3, r"certificate\s+of\s+sponsorship"),
+    ("skilled_worker_visa", 3,
+     r"skilled\s+worker\s+(?:visa|route|sponsorship|licen[cs]e)"),
+    ("health_care_visa", 2, r"health\s+and\s+care\s+(?:worker\s+)?visa"),
+    ("licensed_sponsor", 2,
+     r"licen[cs]ed\s+sponsor|sponsor\s+licen[cs]e"),
+    ("visa_sponsorship", 2, r"visa\s+sponsorship"),
+    ("sponsor_visa", 2, r"sponsor\s+(?:your\s+|a\s+|the\s+)?(?:work\s+)?visas?"),
+    ("skilled_worker", 2, r"skilled\s+worker"),
+    ("tier_2", 2, r"tier\s*2"),
+    ("global_talent_visa", 1, r"global\s+talent\s+visa"),
+    ("graduate_visa", 1, r"graduate\s+visa"),
+]
+
+WEIGHTS = {name: w for name, w, _ in SIGNALS}
+
+# the leading \b is outside the alternation: phrases are only tried at
+# word starts, not at every character
+SCANNER = re.compile(
+    r"\b(?:" + "|".join(rf"(?P<{name}>{pat})" for name, _, pat in SIGNALS)
+    + r")\b", re.IGNORECASE)
+SEP = "\x00"                           # never inside a phrase
+
+# every phrase contains one of these; texts without any skip the full scan
+ANCHORS = re.compile(r"sponsor|visa|skilled|right\s+to\s+work|tier\s*2|"
+                     r"nationals|citizens", re.IGNORECASE)
+
+
+class Signal(NamedTuple):
+    score: int
+    signals: tuple[str, ...]
+
+
+def scan(text: str | None) -> Signal:
+    """One pass over *text*; each signal counts once."""
+    if not text:
+        return Signal(0, ())
+    found = tuple(dict.fromkeys(m.lastgroup for m in SCANNER.finditer(text)))
+    return Signal(sum(WEIGHTS[n] for n in found), found)
+
+
+def job_text(job: dict) -> str:
+    return f"{job.get('title') or ''}\n{job.get('description') or ''}"
+
+
+def scan_many(texts: Iterable[str]) -> list[Signal]:
+    """Scan a whole page: one anchor pass over the joined texts, then the
+    full phrase scan only for the texts that contain an anchor."""
+    texts = [t.replace(SEP, " ") for t in texts]
+    ends = list(accumulate(len(t) + 1 for t in texts))
+    hit = {bisect_right(ends, m.start())
+           for m in ANCHORS.finditer(SEP.join(texts))}
+    return [scan(t) if i in hit else Signal(0, ())
+            for i, t in enumerate(texts)]
+
+
+def annotate(jobs: Iterable[dict]) -> list[dict]:
+    """Store ``sponsorship_score`` / ``sponsorship_signals`` on a page."""
+    jobs = list(jobs)
+    for j, sig in zip(jobs, scan_many(job_text(j) for j in jobs)):
+        j["sponsorship_score"] = sig.score
+        j["sponsorship_signals"] = list(sig.signals)
+    return jobs
+
+
+def sponsor_positive(jobs: Iterable[dict], min_score: int = 1) -> list[dict]:
+    """Ads whose (already annotated) score reaches *min_score*."""
+    return [j for j in jobs
+            if (j["sponsorship_score"] if "sponsorship_score" in j
+                else scan(job_text(j)).score) >= min_score]
@@ -0,0 +1,131 @@
+# streaming.py – v0.1  (ASCII-only)
+"""
+Bounded-queue stage runner for in-process pipelines.
+
+Each stage is a generator function ``stage(items) -> items`` running in its
+own thread; consecutive stages are joined by a ``queue.Queue(maxsize)``.
+A slow stage fills its inbox and blocks the stage before it on ``put`` –
+backpressure travels up to the source instead of memory growing – so the
+wall-clock time of a run tends to the busiest stage, not the sum.
+
+    stats = run_stages([("fetch", fetch), ("match", match),
+                        ("write", write)], maxsize=8)
+
+The first stage is called with None (it is the source); whatever the last
+stage yields is only counted.  An error in any stage stops the others and
+is re-raised in the caller.  ``StageStats.waited`` is the time a stage sat
+blocked on an empty inbox or a full outbox, ``busy`` the rest.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Sequence
+
+Stage = Callable[[Iterator | None], Iterable]
+
+_DONE = object()                        # end-of-stream marker
+POLL = 0.1                              # seconds between stop checks
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0                      # items yielded
+    seconds: float = 0.0                # wall time of the stage thread
+    waited: float = 0.0                 # blocked on its queues
+
+    @property
+    def busy(self) -> float:
+        return self.seconds - self.waited
+
+
+class _Stopped(Exception):
+    """Another stage failed; unwind quietly."""
+
+
+def _get(q: queue.Queue, stop: threading.Event, st: StageStats):
+    t0 = perf_counter()
+    while True:
+        try:
+            item = q.get(timeout=POLL)
+            break
+        except queue.Empty:
+            if stop.is_set():
+                raise _Stopped
+    st.waited += perf_counter() - t0
+    return item
+
+
+def _put(q: queue.Queue, item, stop: threading.Event, st: StageStats) -> None:
+    t0 = perf_counter()
+    while True:
+        try:
+            q.put(item, timeout=POLL)
+            break
+        except queue.Full:
+            if stop.is_set():
+                raise _Stopped
+    st.waited += perf_counter() - t0
+
+
+def _drain(q: queue.Queue, stop: threading.Event,
+           st: StageStats) -> Iterator:
+    while (item := _get(q, stop, st)) is not _DONE:
+        yield item
+
+
+def run_stages(stages: Sequence[tuple[str, Stage]], *,
+               maxsize: int = 8) -> list[StageStats]:
+    """Run *stages* concurrently until the source is exhausted."""
+    queues = [queue.Queue(maxsize) for _ in stages[1:]]
+    stats = [StageStats(name) for name, _ in stages]
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def work(i: int, fn: Stage) -> None:
+        st, t0 = stats[i], perf_counter()
+        inbox = queues[i - 1] if i else None
+        outbox = queues[i] if i < len(queues) else None
+        try:
+            for out in fn(_drain(inbox, stop, st) if inbox else None):
+                st.items += 1
+                if outbox is not None:
+                    _put(outbox, out, stop, st)
+            if outbox is not None:
+                _put(outbox, _DONE, stop, st)
+        except _Stopped:
+            pass
+        except BaseException as e:      # noqa: BLE001 – re-raised below
+            errors.append(e)
+            stop.set()
+        finally:
+            st.seconds = perf_counter() - t0
+
+    threads = [threading.Thread(target=work, args=(i, fn), daemon=True,
+                                name=f"stage-{name}")
+               for i, (name, fn) in enumerate(stages)]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(POLL)
+    except KeyboardInterrupt:
+        stop.set()
+        raise
+    if errors:
+        raise errors[0]
+    return stats
+
+
+def report(stats: Sequence[StageStats], wall: float) -> str:
+    """Per-stage table: items, busy and blocked seconds vs the wall time."""
+    lines = [f"{'stage':<10} {'items':>8} {'busy s':>8} {'waited s':>9}"]
+    lines += [f"{s.name:<10} {s.items:>8,} {s.busy:>8.1f} {s.waited:>9.1f}"
+              for s in stats]
+    lines.append(f"wall {wall:.1f}s  (sum of busy {sum(s.busy for s in stats):.1f}s, "
+                 f"slowest stage {max((s.busy for s in stats), default=0):.1f}s)")
+    return "\n".join(lines)
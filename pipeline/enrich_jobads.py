@@ -1,29 +1,17 @@
 #!/usr/bin/env python3
 import os
-import json
 import sys
 import logging
-import socket
-from neo4j import GraphDatabase
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from job_io import iter_jobs  # noqa: E402
+from load_jobads import typed_rows  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver  # noqa: E402
 
 # ─── Config from ENV ────────────────────────────────────────────────────────────
-URI  = os.getenv('NEO4J_URI')   # e.g., bolt+s://<your-db>.databases.neo4j.io:7687
-USER = os.getenv('NEO4J_USER')  # e.g., neo4j
-PASSWORD  = os.getenv('NEO4J_PASSWORD')   
-
-if not all([URI, USER, PWD]):
-    raise RuntimeError("Please set NEO4J_URI, NEO4J_USER, and NEO4J_PWD in your environment")
-
-# ─── Custom DNS Resolver ────────────────────────────────────────────────────────
-def my_resolver(address):
-    """
-    Neo4j passes an Address-like object with .host and .port attributes.
-    We extract host, DNS-resolve it, and return a list of (ip, port) tuples.
-    """
-    host = getattr(address, "host", None) or getattr(address, "address", None)
-    port = address.port
-    ip = socket.gethostbyname(host)
-    return [(ip, port)]
+# NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD are read by neo4j_writer.get_driver();
+# the Aura DNS resolver is neo4j_writer.resolve_dns (resolver=True).
 
 # ─── MATCH_CRITERIA ─────────────────────────────────────────────────────────────
 MATCH_CRITERIA = """
@@ -39,8 +27,8 @@ RETURN value.org       AS org,
 ENRICH_CYPHER = """
 UNWIND $rows AS job
 WITH job,
-     apoc.text.clean(job.company)  AS clean,
-     job.company + '~'            AS lucene
+     job.company_clean             AS clean,   // name_canon.canonical_name
+     job.company_clean + '~'       AS lucene
 
 """ + MATCH_CRITERIA + """
 
@@ -65,38 +53,30 @@ WITH j, collect(DISTINCT rt.name) AS routesList
 SET j.route = routesList
 """
 
-def run_file(json_path, batch_size=500):
-    # Load JSON ads
-    with open(json_path, encoding='utf-8') as f:
-        ads = json.load(f)
-    logging.info("Matching %s (%d ads)…", os.path.basename(json_path), len(ads))
-
-    # Create driver with custom resolver
-    driver = GraphDatabase.driver(
-        URI,
-        auth=(USER, PWD),
-        resolver=my_resolver
-    )
-
-    # Fast-fail connectivity check
-    driver.verify_connectivity()
-    logging.info(" Connected to Neo4j")
+def log_batch(b):
+    logging.info("  %d ads in %.2fs (batch %d, %d attempt(s))",
+                 b.rows, b.seconds, b.batch_size, b.attempts)
 
-    # Execute enrichment in batches
-    with driver.session() as sess:
-        for i in range(0, len(ads), batch_size):
-            batch = ads[i:i+batch_size]
-            sess.execute_write(lambda tx: tx.run(
-                ENRICH_CYPHER,
-                rows=batch
-            ))
+def run_file(json_path, batch_size=500, workers=4):
+    # Ads are streamed (json / jsonl / csv / parquet); batch size adapts
+    logging.info("Matching %s …", os.path.basename(json_path))
+
+    writer = Neo4jWriter(get_driver(resolver=True), workers=workers,
+                         batch_size=batch_size, on_batch=log_batch)
+    logging.info(" Connected to Neo4j")
 
-    driver.close()
-    logging.info("Enrichment complete.")
+    # typed like load_jobads – `SET j += job` must not turn created back
+    # into a string
+    stats = writer.write(ENRICH_CYPHER, typed_rows(iter_jobs(json_path)))
+    logging.info("Enrichment complete (%d ads, %.0f ads/s).",
+                 stats.rows, stats.rows_per_s)
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
     if len(sys.argv) != 2:
-        print("Usage: python enrich_jobads.py <path_to_json>")
+        print("Usage: python enrich_jobads.py <path_to_json|jsonl|csv|parquet>")
         sys.exit(1)
-    run_file(sys.argv[1])
+    try:
+        run_file(sys.argv[1])
+    finally:
+        close_driver()
@@ -0,0 +1,261 @@
+# pipeline/geo_points.py – v0.1
+"""
+Radius queries over sponsors and job ads – in Neo4j or offline.
+
+  write   give every Location a ``point`` (etl/gazetteer.py: town, else
+          county centroid; ``geo_precision`` says which), backfill
+          ``JobAd.point`` from latitude / longitude (new ads get it in
+          load_jobads.UPSERT_CYPHER), and create the POINT indexes
+          ``location_point`` / ``jobad_point`` so ``point.distance``
+          filters use the index instead of scanning every node.
+  near    "sponsoring employers with live ads within 15 km of Manchester":
+            --by ads       ads within the radius, POSTED_BY a sponsor;
+            --by sponsors  sponsors located within the radius, with their
+                           ad count.
+          --offline answers the same from the clean register CSV and
+          Adzuna files with the in-memory index (etl/geo_index.py) and
+          the sponsor matcher – no Neo4j needed.
+
+Usage:
+    python pipeline/geo_points.py write [--all] [--dry_run]
+    python pipeline/geo_points.py near Manchester --radius_km 15 --days 30
+    python pipeline/geo_points.py near "53.48,-2.24" --by sponsors \
+        --offline --register data/sponsor_register_clean.csv --ads data/*.json
+"""
+import argparse, logging, sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from etl_neo4j_load import read_register  # noqa: E402
+from gazetteer import DEFAULT, Gazetteer  # noqa: E402
+from geo_index import GeoIndex  # noqa: E402
+from job_io import iter_job_chunks, to_datetime  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver  # noqa: E402
+from sponsor_matcher import SponsorMatcher  # noqa: E402
+
+INDEXES = [
+    "CREATE POINT INDEX location_point IF NOT EXISTS "
+    "FOR (l:Location) ON (l.point)",
+    "CREATE POINT INDEX jobad_point IF NOT EXISTS "
+    "FOR (j:JobAd) ON (j.point)",
+]
+
+LOCATIONS_CYPHER = """
+MATCH (l:Location)
+WHERE $all OR l.point IS NULL
+RETURN l.town AS town, l.county AS county
+"""
+
+LOCATION_POINT_CYPHER = """
+UNWIND $rows AS row
+MATCH (l:Location {town: row.town, county: row.county})
+SET l.point         = point({latitude: row.lat, longitude: row.lon}),
+    l.geo_precision = row.precision
+"""
+
+# auto-commit: CALL ... IN TRANSACTIONS keeps each server transaction small
+JOBAD_POINT_CYPHER = """
+MATCH (j:JobAd)
+WHERE j.point IS NULL AND j.latitude IS NOT NULL AND j.longitude IS NOT NULL
+CALL { WITH j
+  SET j.point = point({latitude: j.latitude, longitude: j.longitude})
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+NEAR_ADS_CYPHER = """
+WITH point({latitude: $lat, longitude: $lon}) AS here
+MATCH (j:JobAd)
+WHERE point.distance(j.point, here) <= $metres
+  AND ($since IS NULL OR j.created >= $since)
+MATCH (j)-[:POSTED_BY]->(o:Organisation)
+WHERE coalesce(o.licence_revoked, false) = false
+RETURN o.name AS org, o.town AS town, count(j) AS ads,
+       min(point.distance(j.point, here)) / 1000.0 AS km
+ORDER BY km, ads DESC
+LIMIT $limit
+"""
+
+NEAR_SPONSORS_CYPHER = """
+WITH point({latitude: $lat, longitude: $lon}) AS here
+MATCH (l:Location)
+WHERE point.distance(l.point, here) <= $metres
+MATCH (o:Organisation)-[:LOCATED_IN]->(l)
+WHERE coalesce(o.licence_revoked, false) = false
+OPTIONAL MATCH (j:JobAd)-[:POSTED_BY]->(o)
+WHERE $since IS NULL OR j.created >= $since
+WITH o, l, here, count(j) AS ads
+WHERE ads > 0 OR $all
+RETURN o.name AS org, l.town AS town, ads,
+       point.distance(l.point, here) / 1000.0 AS km
+ORDER BY km, ads DESC
+LIMIT $limit
+"""
+
+
+def locate(gaz, place):
+    """"lat,lon" or a gazetteer place name -> (lat, lon)."""
+    try:
+        lat, lon = (float(v) for v in place.split(","))
+        return lat, lon
+    except ValueError:
+        pass
+    found = gaz.resolve(place)
+    if found.lat is None:
+        sys.exit(f"  Unknown place {place!r} – pass \"lat,lon\" or build the "
+                 f"gazetteer (etl/gazetteer.py build)")
+    logging.info("%s -> %s (%.4f, %.4f, %s)", place, found.name, found.lat,
+                 found.lon, found.precision)
+    return found.lat, found.lon
+
+
+# ─── write ──────────────────────────────────────────────────────────────────────
+def write_points(gaz, refresh_all, dry_run, workers):
+    drv = get_driver()
+    try:
+        records, _, _ = drv.execute_query(LOCATIONS_CYPHER, all=refresh_all,
+                                          database_="neo4j", routing_="r")
+        rows, unresolved = [], 0
+        for r in records:
+            p = gaz.resolve(r["town"], r["county"])
+            if p.lat is None:
+                unresolved += 1
+                continue
+            rows.append(dict(town=r["town"], county=r["county"], lat=p.lat,
+                             lon=p.lon, precision=p.precision))
+        by_town = sum(r["precision"] == "town" for r in rows)
+        logging.info("%d locations: %d by town, %d by county, %d unresolved",
+                     len(records), by_town, len(rows) - by_town, unresolved)
+        if dry_run:
+            return
+        for cy in INDEXES:
+            drv.execute_query(cy, database_="neo4j")
+        stats = Neo4jWriter(drv, workers=workers).write(
+            LOCATION_POINT_CYPHER, rows, label="location_point")
+        logging.info("Location points written: %d", stats.rows)
+        with drv.session(database="neo4j") as s:
+            c = s.run(JOBAD_POINT_CYPHER).consume().counters
+        logging.info("JobAd points backfilled: %d", c.properties_set)
+    finally:
+        close_driver()
+
+
+# ─── near ───────────────────────────────────────────────────────────────────────
+def near_graph(lat, lon, km, since, by, limit, show_all):
+    drv = get_driver()
+    try:
+        records, _, _ = drv.execute_query(
+            NEAR_ADS_CYPHER if by == "ads" else NEAR_SPONSORS_CYPHER,
+            lat=lat, lon=lon, metres=km * 1000, since=since, limit=limit,
+            all=show_all, database_="neo4j", routing_="r")
+    finally:
+        close_driver()
+    return [dict(r) for r in records]
+
+
+def _ads(files, since):
+    for path in files:
+        for chunk in iter_job_chunks(path, 5_000):
+            for row in chunk:
+                created = row.get("created")
+                if isinstance(created, str):        # parquet is typed already
+                    created = to_datetime(created)
+                if since is None or (created is not None and created >= since):
+                    yield row
+
+
+def near_offline(gaz, lat, lon, km, since, by, limit, show_all, register,
+                 files):
+    ads = list(_ads(files, since))
+    matcher = SponsorMatcher.from_register_csv(register)
+    reg = read_register(register)
+    if by == "ads":
+        idx = GeoIndex([a["latitude"] for a in ads],
+                       [a["longitude"] for a in ads])
+        (hits, dist), = idx.within(lat, lon, km, return_distance=True)
+        found = matcher.match_many([ads[i]["company"] for i in hits])
+        town = dict(zip(reg["organisation_name"], reg["town_city"]))
+        out = {}
+        for m, d in zip(found, dist):
+            if m is None:
+                continue
+            r = out.setdefault(m.org, dict(org=m.org, town=town.get(m.org),
+                                           ads=0, km=d))
+            r["ads"] += 1
+        rows = list(out.values())
+    else:
+        geo = gaz.resolve_frame(reg)
+        idx = GeoIndex(geo["lat"].astype(float), geo["lon"].astype(float))
+        (hits, dist), = idx.within(lat, lon, km, return_distance=True)
+        counts = defaultdict(int)
+        for m in matcher.match_many([a["company"] for a in ads]):
+            if m is not None:
+                counts[m.org] += 1
+        out = {}
+        for i, d in zip(hits, dist):
+            org = reg["organisation_name"].iat[i]
+            if org not in out and (counts[org] or show_all):
+                out[org] = dict(org=org, town=reg["town_city"].iat[i],
+                                ads=counts[org], km=d)
+        rows = list(out.values())
+    rows.sort(key=lambda r: (r["km"], -r["ads"]))
+    return rows[:limit]
+
+
+# ─── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Neo4j points and radius queries")
+    p.add_argument("--gazetteer", default=str(DEFAULT),
+                   help="built gazetteer (etl/gazetteer.py); seed only if absent")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("write", help="Location / JobAd points + POINT indexes")
+    w.add_argument("--all", action="store_true",
+                   help="recompute every Location, not only those without a point")
+    w.add_argument("--workers", type=int, default=4)
+    w.add_argument("--dry_run", action="store_true",
+                   help="report gazetteer coverage, write nothing")
+    n = sub.add_parser("near", help="sponsors with ads near a place")
+    n.add_argument("place", help='town / county name, or "lat,lon"')
+    n.add_argument("--radius_km", type=float, default=15)
+    n.add_argument("--by", choices=("ads", "sponsors"), default="ads",
+                   help="where the radius applies: the ad or the sponsor")
+    n.add_argument("--days", type=int, default=0,
+                   help="only ads created in the last N days (0 = all)")
+    n.add_argument("--all", action="store_true",
+                   help="--by sponsors: include sponsors without ads")
+    n.add_argument("--limit", type=int, default=50)
+    n.add_argument("--offline", action="store_true",
+                   help="in-memory index over --register and --ads")
+    n.add_argument("--register", default="data/sponsor_register_clean.csv")
+    n.add_argument("--ads", nargs="*", default=[])
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    load_dotenv()
+
+    gaz = Gazetteer.load(args.gazetteer)
+    if args.cmd == "write":
+        write_points(gaz, args.all, args.dry_run, args.workers)
+        return 0
+
+    lat, lon = locate(gaz, args.place)
+    since = (datetime.now(timezone.utc) - timedelta(days=args.days)
+             if args.days else None)
+    if args.offline:
+        if not args.ads:
+            sys.exit("  --offline needs --ads files")
+        rows = near_offline(gaz, lat, lon, args.radius_km, since, args.by,
+                            args.limit, args.all, args.register, args.ads)
+    else:
+        rows = near_graph(lat, lon, args.radius_km, since, args.by,
+                          args.limit, args.all)
+    for r in rows:
+        print(f"{r['km']:>6.1f} km  {r['ads']:>4} ads  {r['org']:<50} "
+              f"{r['town'] or ''}")
+    print(f"  {len(rows)} sponsors within {args.radius_km:g} km")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,118 @@
-# pipeline/load_jobads.py – v0.2
-import sys, pathlib, os
-from neo4j import GraphDatabase
+# pipeline/load_jobads.py – v0.3
+"""
+Client-side JobAd loader (no server import/ directory needed – works on Aura).
+
+Usage: python pipeline/load_jobads.py data/*.csv data/*.jsonl [--force]
+
+• Streams the CSV / JSONL / JSON / parquet written by adzuna_job_loader.py
+  in --chunk sized pieces (job_io.iter_job_chunks) – memory stays flat.
+• Types are fixed on the client: salary_min/max, latitude/longitude are
+  floats, ``created`` is a Neo4j DateTime (was: every column a string).
+• Each ad carries a ``content_hash``; ads whose hash already matches the
+  stored JobAd are skipped (--force re-sends everything).
+• Writes go through neo4j_writer.Neo4jWriter as UNWIND batches instead of
+  one implicit LOAD CSV transaction per file.
+• Ads with coordinates get a ``point`` property (the ``jobad_point`` index,
+  pipeline/geo_points.py) in the same write.
+• Rows read / written per file are a metrics.py stage ("load"); see
+  --metrics_dir, --profile, --trace_memory.
+• The dashboard's ``ads`` aggregate (query_service.py) is refreshed after
+  the load; --aggregates "" skips it.
+"""
+import argparse, sys, pathlib
 from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "etl"))
+from job_io import content_hash, iter_job_chunks, to_datetime  # noqa: E402
+from metrics import METRICS, add_cli  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver, progress  # noqa: E402
+from query_service import add_aggregates_cli, after_load  # noqa: E402
+
+CONSTRAINT = ("CREATE CONSTRAINT jobad_id IF NOT EXISTS "
+              "FOR (j:JobAd) REQUIRE j.id IS UNIQUE")
+
+KNOWN_CYPHER = """
+UNWIND $ids AS id
+MATCH (j:JobAd {id: id})
+RETURN j.id AS id, j.content_hash AS hash
+"""
+
+UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (j:JobAd {id: row.id})
+SET j += row,
+    j.point = CASE WHEN row.latitude IS NULL OR row.longitude IS NULL THEN null
+                   ELSE point({latitude: row.latitude, longitude: row.longitude})
+              END
+"""
+
+
+def typed_rows(chunk):
+    """Flat job_io rows → JobAd property maps (hash over the flat row)."""
+    for row in chunk:
+        if not row["id"]:
+            continue
+        row["content_hash"] = content_hash(row)
+        row["created"] = to_datetime(row["created"])
+        yield row
+
+
+def known_hashes(drv, ids):
+    records, _, _ = drv.execute_query(KNOWN_CYPHER, ids=ids,
+                                      database_="neo4j", routing_="r")
+    return {r["id"]: r["hash"] for r in records}
+
+
+def changed_rows(drv, path, chunk, force, skipped):
+    """Stream the rows of *path* that are new or whose content changed."""
+    for batch in iter_job_chunks(path, chunk):
+        METRICS.rows("load", rows_in=len(batch))
+        rows = list(typed_rows(batch))
+        if not force:
+            known = known_hashes(drv, [r["id"] for r in rows])
+            fresh = [r for r in rows if known.get(r["id"]) != r["content_hash"]]
+            skipped[0] += len(rows) - len(fresh)
+            rows = fresh
+        yield from rows
+
+
+def load_one(writer, path: pathlib.Path, chunk: int, force: bool):
+    skipped = [0]
+    with METRICS.stage("load") as st:
+        stats = writer.write(UPSERT_CYPHER,
+                             changed_rows(writer.driver, path, chunk, force,
+                                          skipped),
+                             label="jobad_upsert")
+        st.rows_out = stats.rows
+    print(f"✓ imported {path.name}: {stats.rows:,} ads written, "
+          f"{skipped[0]:,} unchanged ({stats.rows_per_s:,.0f} ads/s)")
 
-URI = os.getenv("NEO4J_URI")
-USER = os.getenv("NEO4J_USER")
-PWD = os.getenv("NEO4J_PASSWORD")
-drv = GraphDatabase.driver(URI, auth=(USER, PWD))
 
-csv_files = [pathlib.Path(p) for p in sys.argv[1:]]
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Load Adzuna job ads into Neo4j")
+    cli.add_argument("files", nargs="+", type=pathlib.Path)
+    cli.add_argument("--chunk", type=int, default=1_000,
+                     help="ads read (and hash-checked) per round trip")
+    cli.add_argument("--workers", type=int, default=4)
+    cli.add_argument("--force", action="store_true",
+                     help="write every ad, ignoring stored content hashes")
+    add_cli(cli)
+    add_aggregates_cli(cli)
+    args = cli.parse_args(argv)
 
-def load_one(path: pathlib.Path):
-    filename = path.name  # just the base filename
-    query = f"""
-    LOAD CSV WITH HEADERS FROM 'file:///{filename}' AS row
-    WITH row WHERE row.id IS NOT NULL
-    MERGE (j:JobAd {{id: row.id}})
-    SET j += row
-    """
-    with drv.session() as session:
-        session.run(query)
-    print(f"✓ imported {filename}")
+    load_dotenv()
+    with METRICS.run("load_jobads", args):
+        drv = get_driver()
+        try:
+            writer = Neo4jWriter(drv, workers=args.workers, batch_size=args.chunk,
+                                 on_batch=progress("ads"))
+            writer.run(lambda tx: tx.run(CONSTRAINT).consume())
+            for f in args.files:
+                load_one(writer, f, args.chunk, args.force)
+            after_load(drv, args.aggregates, names=("ads",))
+        finally:
+            close_driver()
 
-for f in csv_files:
-    load_one(f)
 
-drv.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+match_jobads_local.py – v0.1
+Match job-ad companies to sponsors in-process, write only resolved pairs.
+
+The sponsor register is indexed locally (etl/sponsor_matcher.py: trigram
+candidates + batched Jaro-Winkler, same 0.60 / 0.85 thresholds as
+scripts/neo4j/match_criteria.groovy).  Neo4j receives just the matched
+(job, org_name, score) rows – no per-row full-text or APOC calls – through
+the shared pooled driver and retry policy (etl/neo4j_writer.py).
+Results (misses included) are memoised per register version in
+--memo (etl/match_memo.py); the index is only built if something is new.
+
+Usage:
+    python pipeline/match_jobads_local.py --register data/sponsor_register_clean.csv \
+        etl/data/data_analyst_London_*.json
+"""
+import argparse, logging, sys, time
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from job_io import iter_job_chunks                 # noqa: E402
+from load_jobads import typed_rows  # noqa: E402
+from match_memo import MatchMemo, MemoMatcher, register_version  # noqa: E402
+from name_canon import canonical_name  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver, progress  # noqa: E402
+from sponsor_matcher import SponsorMatcher  # noqa: E402
+
+load_dotenv()
+
+WRITE_MATCHES = """
+UNWIND $rows AS row
+MATCH (org:Organisation {name: row.org})
+MERGE (j:JobAd {id: row.job.id})
+SET   j += row.job,
+      j.company_clean    = row.clean,
+      j.sponsor_possible = true,
+      j.match_score      = row.score,
+      j.last_matched_ts  = datetime()
+MERGE (j)-[r:POSTED_BY]->(org)
+SET   r.match_score = row.score
+WITH  j, org
+MATCH (org)-[:OFFERS_ROUTE]->(rt:Route)
+WITH  j, collect(DISTINCT rt.name) AS routes
+SET   j.routes = routes
+"""
+
+
+def resolve(matcher, jobs):
+    """Flat job rows → write rows for the ads that matched a sponsor."""
+    out = []
+    for job, m in zip(jobs, matcher.match_many([j.get("company") for j in jobs])):
+        if m is not None:
+            out.append(dict(job=job, org=m.org, score=m.score,
+                            clean=job.get("company_clean")
+                                  or canonical_name(job.get("company"))))
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    p.add_argument("files", nargs="+", help="job files (json/jsonl/csv/parquet)")
+    p.add_argument("--register", required=True,
+                   help="cleaned sponsor register CSV")
+    p.add_argument("--memo", default="data/match_memo.sqlite",
+                   help="company → sponsor memo (empty string disables)")
+    p.add_argument("--batch", type=int, default=1_000)
+    p.add_argument("--workers", type=int, default=4,
+                   help="concurrent Neo4j write sessions")
+    p.add_argument("--dry_run", action="store_true",
+                   help="match and report only, no Neo4j writes")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    def load_matcher():
+        t0 = time.perf_counter()
+        m = SponsorMatcher.from_register_csv(args.register)
+        logging.info("Indexed %d sponsors in %.1fs", len(m),
+                     time.perf_counter() - t0)
+        return m
+
+    memo = None
+    if args.memo:
+        memo = MatchMemo(args.memo, register_version(args.register))
+        matcher = MemoMatcher(memo, load_matcher)
+    else:
+        matcher = load_matcher()
+
+    writer = None
+    if not args.dry_run:
+        writer = Neo4jWriter(get_driver(), workers=args.workers,
+                             batch_size=args.batch, on_batch=progress("matches"))
+
+    try:
+        for path in args.files:
+            seen = matched = 0
+            t0 = time.perf_counter()
+            for chunk in iter_job_chunks(path, args.batch):
+                # typed like load_jobads: `SET j += row.job` keeps created
+                # a DateTime
+                rows = resolve(matcher, list(typed_rows(chunk)))
+                seen += len(chunk)
+                matched += len(rows)
+                if writer is not None and rows:
+                    writer.write(WRITE_MATCHES, rows, label="jobad_match")
+            dt = time.perf_counter() - t0
+            logging.info("%s: %d/%d ads matched (%.0f ads/s)",
+                         Path(path).name, matched, seen, seen / max(dt, 1e-9))
+    finally:
+        if writer is not None:
+            close_driver()
+        if memo is not None:
+            logging.info("Match memo: %d hits, %d computed (%d entries)",
+                         matcher.hits, matcher.misses, len(memo))
+            memo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# pipeline/rematch_jobads.py – v0.1
+"""
+Incremental re-match of existing JobAd nodes after a register change.
+
+Usage: python pipeline/rematch_jobads.py [--since 2025-07-24] [--dry_run]
+
+• The organisation delta (added / changed / removed) is the difference
+  between two snapshots of the register store (register_store.py,
+  row_hashes.org_hashes) – by default the latest one and the one before.
+• Only plausibly affected companies are re-scored:
+    – ads currently POSTED_BY a changed or removed organisation, and
+    – ad companies that the name index puts within the match thresholds
+      of an added or changed organisation (SponsorMatcher.similar,
+      queried per organisation).  The companies it indexes are only those
+      the JobAd full-text index ``jobadCompanyFT`` returns for a fuzzy
+      query on the organisation's name tokens, so a run reads the
+      neighbourhood of the changed names instead of every JobAd company;
+      ``--full_scan`` indexes all distinct JobAd.company_clean values.
+• Each of them is re-matched against the whole current register:
+    – a match (re)links the ads: POSTED_BY, sponsor_possible, match_score,
+      routes – stale POSTED_BY edges are dropped;
+    – no match: ads of a sponsor removed in this delta keep their edge
+      and get ``sponsor_revoked = true``; other links are removed.  Either
+      way ``sponsor_possible`` becomes false.  "Removed" comes from the
+      snapshot delta itself, not from ``Organisation.licence_revoked``,
+      so it does not depend on a delta load having run first.
+• Stages delta / candidates / match / write are timed by etl/metrics.py
+  (--metrics_dir, --profile, --trace_memory).
+• Links change which ads count as sponsored, so the dashboard's ``ads``
+  aggregate (query_service.py) is refreshed after the write.
+"""
+import argparse, logging, re, sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from metrics import METRICS, add_cli  # noqa: E402
+from name_canon import split_trading_names  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver, progress  # noqa: E402
+from query_service import add_aggregates_cli, after_load  # noqa: E402
+from register_store import RegisterStore  # noqa: E402
+from row_hashes import org_hashes  # noqa: E402
+from sponsor_matcher import SponsorMatcher  # noqa: E402
+
+INDEXES = [
+    "CREATE INDEX jobad_company_clean IF NOT EXISTS "
+    "FOR (j:JobAd) ON (j.company_clean)",
+    "CREATE FULLTEXT INDEX jobadCompanyFT IF NOT EXISTS "
+    "FOR (j:JobAd) ON EACH [j.company_clean]",
+]
+FT_LIMIT = 2_000                # JobAd hits per organisation query
+
+COMPANIES_CYPHER = """
+MATCH (j:JobAd)
+WHERE j.company_clean IS NOT NULL AND j.company_clean <> ''
+RETURN DISTINCT j.company_clean AS clean
+"""
+
+NEAR_CYPHER = """
+UNWIND $queries AS q
+CALL db.index.fulltext.queryNodes('jobadCompanyFT', q, {limit: $limit})
+YIELD node
+RETURN DISTINCT node.company_clean AS clean
+"""
+
+LINKED_CYPHER = """
+UNWIND $names AS name
+MATCH (:Organisation {name: name})<-[:POSTED_BY]-(j:JobAd)
+WHERE j.company_clean IS NOT NULL
+RETURN DISTINCT j.company_clean AS clean
+"""
+
+LINK_CYPHER = """
+UNWIND $rows AS row
+MATCH (org:Organisation {name: row.org})
+MATCH (j:JobAd {company_clean: row.clean})
+OPTIONAL MATCH (j)-[old:POSTED_BY]->(prev:Organisation)
+WHERE prev <> org
+DELETE old
+WITH DISTINCT j, org, row
+MERGE (j)-[r:POSTED_BY]->(org)
+SET   r.match_score      = row.score,
+      j.sponsor_possible = true,
+      j.sponsor_revoked  = false,
+      j.match_score      = row.score,
+      j.last_matched_ts  = datetime()
+WITH  j, org
+OPTIONAL MATCH (org)-[:OFFERS_ROUTE]->(rt:Route)
+WITH  j, collect(DISTINCT rt.name) AS routes
+SET   j.routes = routes
+"""
+
+UNLINK_CYPHER = """
+UNWIND $rows AS clean
+MATCH (j:JobAd {company_clean: clean})-[e:POSTED_BY]->(prev:Organisation)
+WITH  j, collect(e) AS edges,
+      any(p IN collect(prev) WHERE p.name IN $removed) AS revoked
+FOREACH (e IN CASE WHEN revoked THEN [] ELSE edges END | DELETE e)
+SET   j.sponsor_possible = false,
+      j.sponsor_revoked  = revoked,
+      j.match_score      = null,
+      j.routes           = [],
+      j.last_matched_ts  = datetime()
+"""
+
+
+def org_delta(store, since=None):
+    """(current register frame, added, changed, removed organisation names)
+    between the snapshot on/before *since* (default: the previous one)
+    and the latest snapshot."""
+    if len(store.entries) < 2 and since is None:
+        raise RuntimeError(f"{store.root}: need two snapshots for a delta")
+    latest = store.latest()["date"]
+    since = since or store.entries[-2]["date"]
+    old = org_hashes(store.as_of(since))
+    df = store.as_of(latest)
+    new = org_hashes(df)
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = {n for n in new.keys() & old.keys() if new[n] != old[n]}
+    return df, set(added), changed, set(removed)
+
+
+def fuzzy_queries(org_names):
+    """One Lucene query per organisation: every legal / trading name token
+    of 3+ characters, fuzzy (edit distance 1 below six characters, else
+    2) – the neighbourhood the matcher thresholds can accept from."""
+    queries = []
+    for name in org_names:
+        legal, aliases = split_trading_names(name)
+        tokens = {t for key in (legal, *aliases)
+                  for t in re.findall(r"[a-z0-9]{3,}", key)}
+        if tokens:
+            queries.append(" OR ".join(f"{t}~{1 if len(t) < 6 else 2}"
+                                       for t in sorted(tokens)))
+    return queries
+
+
+def plausible_companies(companies, org_names):
+    """Companies within the match thresholds of any of *org_names*
+    (legal or trading name), found through a trigram index of the
+    companies – one query per organisation, not one per company."""
+    if not companies or not org_names:
+        return set()
+    index = SponsorMatcher(companies, top_k=200)
+    hits = set()
+    for name in org_names:
+        legal, aliases = split_trading_names(name)
+        for key in (legal, *aliases):
+            if key:
+                hits.update(m.org for m in index.similar(key))
+    return hits
+
+
+def rematch(matcher, companies):
+    """company_clean → Match | None against the whole register."""
+    return {c: matcher.match_clean(c) for c in sorted(companies)}
+
+
+def read_column(drv, cypher, **params):
+    records, _, _ = drv.execute_query(cypher, database_="neo4j",
+                                      routing_="r", **params)
+    return [r["clean"] for r in records]
+
+
+def run(args):
+    with METRICS.stage("delta"):
+        df, added, changed, removed = org_delta(RegisterStore(args.store),
+                                                args.since)
+    logging.info("Register delta: %d added, %d changed, %d removed",
+                 len(added), len(changed), len(removed))
+    if not (added or changed or removed):
+        logging.info("Nothing to re-match.")
+        return 0
+
+    drv = get_driver()
+    try:
+        with METRICS.stage("candidates") as st:
+            for cy in INDEXES:
+                drv.execute_query(cy, database_="neo4j")
+            drv.execute_query("CALL db.awaitIndexes()", database_="neo4j")
+            linked = set(read_column(drv, LINKED_CYPHER,
+                                     names=sorted(changed | removed)))
+            if args.full_scan:
+                companies = read_column(drv, COMPANIES_CYPHER)
+            else:
+                companies = read_column(
+                    drv, NEAR_CYPHER, limit=FT_LIMIT,
+                    queries=fuzzy_queries(sorted(added | changed)))
+            near = plausible_companies(companies, sorted(added | changed))
+            todo = linked | near
+            st.rows_in, st.rows_out = len(companies), len(todo)
+        logging.info("%d of %d companies affected (%d linked, %d by name) "
+                     "in %.1fs", len(todo), len(companies), len(linked),
+                     len(near), st.seconds)
+
+        with METRICS.stage("match", rows_in=len(todo)) as st:
+            matcher = SponsorMatcher(df["organisation_name"].tolist())
+            results = rematch(matcher, todo)
+            st.rows_out = sum(m is not None for m in results.values())
+        link = sorted((dict(clean=c, org=m.org, score=m.score)
+                       for c, m in results.items() if m is not None),
+                      key=lambda r: r["org"])
+        unlink = [c for c, m in results.items() if m is None]
+        logging.info("%d companies matched, %d without a sponsor",
+                     len(link), len(unlink))
+        if args.dry_run:
+            for c, m in results.items():
+                print(f"{c:<50} -> {m.org if m else '-'}")
+            return 0
+
+        writer = Neo4jWriter(drv, workers=args.workers,
+                             on_batch=progress("companies"))
+        with METRICS.stage("write", rows_in=len(link) + len(unlink)) as st:
+            st.rows_out = writer.write(LINK_CYPHER, link, key=lambda r: r["org"],
+                                       label="jobad_link").rows
+            st.rows_out += writer.write(UNLINK_CYPHER, unlink,
+                                        label="jobad_unlink",
+                                        removed=sorted(removed)).rows
+        after_load(drv, args.aggregates, names=("ads",))
+    finally:
+        close_driver()
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Re-match JobAds after a register change")
+    p.add_argument("--store", default="data/register_store",
+                   help="register snapshot store (etl_sponsor_register.py)")
+    p.add_argument("--since", default=None,
+                   help="compare with the snapshot on/before this day "
+                        "(default: the previous snapshot)")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--full_scan", action="store_true",
+                   help="index every JobAd company, not only the full-text "
+                        "neighbourhood of the added / changed names")
+    p.add_argument("--dry_run", action="store_true",
+                   help="report the re-matched companies, no Neo4j writes")
+    add_cli(p)
+    add_aggregates_cli(p)
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    load_dotenv()
+    with METRICS.run("rematch_jobads", args):
+        return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,28 @@
 """
 Run after every Adzuna fetch.
 Usage: python pipeline/run_match_jobads.py data/adzuna_data_*.json
+       (also .jsonl / .csv / .parquet – streamed in adaptive batches from CHUNK)
 """
-import json, sys
+import sys
 from pathlib import Path
-from neo4j import GraphDatabase
 from dotenv import load_dotenv; load_dotenv()
 
-URI  = os.getenv("NEO4J_URI")
-USER = os.getenv("NEO4J_USER", "neo4j")
-PWD  = os.getenv("NEO4J_PASSWORD")
-cypher = Path("scripts/match_jobads_to_sponsors_v2.cypher").read_text()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from job_io import iter_jobs  # noqa: E402
+from load_jobads import typed_rows  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver  # noqa: E402
 
-driver = GraphDatabase.driver(URI, auth=(USER, PWD))
-for jfile in sys.argv[1:]:
-    batch = json.loads(Path(jfile).read_text())
-    with driver.session() as s:
-        summary = s.execute_write(lambda tx: tx.run(cypher, jobBatch=batch).consume())
-        print(f"{jfile} → {summary.counters.properties_set} properties set")
-driver.close()
+CHUNK = 1_000
+
+cypher = (Path(__file__).resolve().parents[1] / "scripts" / "neo4j"
+          / "match_jobads_to_sponsors.cypher").read_text(encoding="utf-8")
+
+writer = Neo4jWriter(batch_size=CHUNK)
+try:
+    for jfile in sys.argv[1:]:
+        stats = writer.write(cypher, typed_rows(iter_jobs(jfile)),
+                             param="jobBatch")
+        props = stats.counters.get("properties_set", 0)
+        print(f"{jfile} → {props} properties set ({stats.rows_per_s:,.0f} ads/s)")
+finally:
+    close_driver()
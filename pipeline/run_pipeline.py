@@ -0,0 +1,295 @@
+# pipeline/run_pipeline.py – v0.1
+"""
+One streaming run: fetch -> filter -> dedup -> match -> write.
+
+Replaces the file hand-offs between adzuna_job_loader.py, load_jobads.py
+and run_match_jobads.py with one process and one Neo4j driver.  Each stage
+runs in its own thread behind a bounded queue (etl/streaming.py):
+
+  fetch   AdzunaClient.stream_pages (concurrent, rate-limited)
+  filter  seen-id index (--incremental), sponsorship signals, --visa_only
+  dedup   near-duplicate groups (near_dupes.DupIndex) -> canonical id
+  match   in-process sponsor matcher behind the match memo
+  write   JobAd upserts + POSTED_BY links via Neo4jWriter, in --chunk rows
+
+When Neo4j is slow the write stage stops draining its queue and every stage
+before it blocks in turn – the crawler pauses instead of buffering.  Pages
+are checkpointed (etl/run_checkpoint.py) after their ads are written, and
+only then recorded in the seen-id index, so ``--resume`` continues a
+crashed run from the next page of each term/city.  A --dry_run stores
+nothing, so it records neither seen ids nor checkpointed pages.
+
+Ads in / out of each stage, busy and blocked seconds, HTTP and Neo4j
+latency go to etl/metrics.py; --metrics_dir writes the Prometheus textfile
+and JSON run report, --profile match (cProfile of one stage thread) or
+--trace_memory hook into chosen stages.  After a run that wrote, the
+dashboard's ``ads`` aggregate (etl/query_service.py) is refreshed.
+
+Usage:
+    python pipeline/run_pipeline.py -s "data analyst, nurse" -c London,Leeds \
+        --pages 5 --register data/sponsor_register_clean.csv --incremental
+    python pipeline/run_pipeline.py --resume            # after a crash
+"""
+import argparse, itertools, logging, sys, time
+from pathlib import Path
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "etl"))
+from adzuna_client import AdzunaClient  # noqa: E402
+from http_cache import ResponseCache  # noqa: E402
+from job_io import flatten  # noqa: E402
+from load_jobads import CONSTRAINT, UPSERT_CYPHER, typed_rows  # noqa: E402
+from match_memo import MatchMemo, MemoMatcher, register_version  # noqa: E402
+from metrics import METRICS, add_cli  # noqa: E402
+from near_dupes import DupIndex  # noqa: E402
+from neo4j_writer import Neo4jWriter, close_driver, get_driver  # noqa: E402
+from query_service import add_aggregates_cli, after_load  # noqa: E402
+from run_checkpoint import Checkpoint  # noqa: E402
+from seen_index import SeenIndex  # noqa: E402
+from sponsor_matcher import SponsorMatcher  # noqa: E402
+from sponsorship_signal import annotate, sponsor_positive  # noqa: E402
+from streaming import report, run_stages  # noqa: E402
+
+# arguments that define a run's work – restored by --resume
+RUN_ARGS = ("search", "city", "pages", "country", "radius_km",
+            "visa_only", "min_signal")
+
+LINK_CYPHER = """
+UNWIND $rows AS row
+MATCH (org:Organisation {name: row.org})
+MATCH (j:JobAd {id: row.id})
+SET   j.sponsor_possible = true,
+      j.match_score      = row.score,
+      j.last_matched_ts  = datetime()
+MERGE (j)-[r:POSTED_BY]->(org)
+SET   r.match_score = row.score
+WITH  j, org
+MATCH (org)-[:OFFERS_ROUTE]->(rt:Route)
+WITH  j, collect(DISTINCT rt.name) AS routes
+SET   j.routes = routes
+"""
+
+
+@dataclass
+class Page:
+    term: str
+    city: str
+    page: int
+    last: bool
+    raw: list                               # as fetched (seen-id index)
+    jobs: list = field(default_factory=list)
+    rows: list = field(default_factory=list)        # flat JobAd rows
+    matches: list = field(default_factory=list)     # {id, org, score}
+
+
+def _parse_csv(arg):
+    return [t.strip() for t in arg.split(",") if t.strip()]
+
+
+# ─── Stages ─────────────────────────────────────────────────────────────────────
+def fetch_stage(client, pairs, pages, workers, seen, start):
+    def run(_):
+        for term, city, page, jobs, last in client.stream_pages(
+                pairs, pages, workers=workers, start=start,
+                stop_early=seen.all_known if seen is not None else None):
+            METRICS.rows("fetch", rows_out=len(jobs))
+            yield Page(term, city, page, last, raw=jobs)
+    return run
+
+
+def filter_stage(seen, visa_only, min_signal):
+    def run(pages):
+        for p in pages:
+            jobs = seen.fresh(p.raw) if seen is not None else p.raw
+            jobs = annotate(jobs)
+            p.jobs = sponsor_positive(jobs, min_signal) if visa_only else jobs
+            METRICS.rows("filter", len(p.raw), len(p.jobs))
+            yield p
+    return run
+
+
+def dedup_stage(index_path, threshold):
+    def run(pages):
+        # SQLite connections stay in the thread that opened them
+        with DupIndex(index_path, threshold=threshold) as idx:
+            for p in pages:
+                groups = {}
+                for job in p.jobs:
+                    if not job.get("id"):
+                        continue
+                    canonical, _ = idx.assign(job)
+                    kept = groups.get(canonical)
+                    if kept is None or (job.get("created") or "") >= \
+                            (kept.get("created") or ""):
+                        groups[canonical] = job
+                idx.commit()
+                METRICS.rows("dedup", len(p.jobs), len(groups))
+                p.jobs = [{**job, "id": canonical,
+                           "alt_ids": idx.alternates(canonical)}
+                          for canonical, job in groups.items()]
+                yield p
+    return run
+
+
+def match_stage(register, memo_path):
+    def load_matcher():
+        t0 = time.perf_counter()
+        m = SponsorMatcher.from_register_csv(register)
+        logging.info("Indexed %d sponsors in %.1fs", len(m),
+                     time.perf_counter() - t0)
+        return m
+
+    def run(pages):
+        with MatchMemo(memo_path, register_version(register)) as memo:
+            matcher = MemoMatcher(memo, load_matcher)
+            for p in pages:
+                p.rows = [flatten(j) for j in p.jobs]
+                found = matcher.match_many([r["company"] for r in p.rows])
+                p.matches = [dict(id=r["id"], org=m.org, score=m.score)
+                             for r, m in zip(p.rows, found) if m is not None]
+                METRICS.rows("match", len(p.rows), len(p.matches))
+                yield p
+            logging.info("Match memo: %d hits, %d computed",
+                         matcher.hits, matcher.misses)
+    return run
+
+
+def write_stage(writer, seen, checkpoint, run_id, chunk):
+    def flush(buf):
+        rows = list(typed_rows(r for p in buf for r in p.rows))
+        if writer is not None:
+            writer.write(UPSERT_CYPHER, rows, label="jobad_upsert")
+            writer.write(LINK_CYPHER, [m for p in buf for m in p.matches],
+                         label="jobad_link")
+        METRICS.rows("write", len(rows), len(rows) if writer is not None else 0)
+        if writer is None:                  # --dry_run: nothing is stored
+            return
+        if seen is not None:                # only once the ads are stored
+            seen.record(j for p in buf for j in p.raw)
+        checkpoint.mark(run_id, [(p.term, p.city, p.page, p.last, len(p.rows))
+                                 for p in buf])
+
+    def run(pages):
+        buf, rows = [], 0
+        for p in pages:
+            buf.append(p)
+            rows += len(p.rows)
+            if rows >= chunk:
+                flush(buf)
+                yield from buf
+                buf, rows = [], 0
+        if buf:
+            flush(buf)
+            yield from buf
+    return run
+
+
+# ─── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Streaming fetch -> Neo4j pipeline")
+    p.add_argument("-s", "--search", default="software engineer")
+    p.add_argument("-c", "--city", default="London")
+    p.add_argument("--pages", type=int, default=3)
+    p.add_argument("--country", default="gb")
+    p.add_argument("--radius_km", type=int, default=25)
+    p.add_argument("--visa_only", action="store_true")
+    p.add_argument("--min_signal", type=int, default=1)
+    p.add_argument("--workers", type=int, default=8,
+                   help="concurrent Adzuna requests")
+    p.add_argument("--rate", type=float, default=2.0,
+                   help="max Adzuna requests per second")
+    p.add_argument("--cache_dir", default="",
+                   help="Adzuna response cache (off when empty)")
+    p.add_argument("--incremental", action="store_true",
+                   help="skip ads already seen (data/seen_jobs.sqlite)")
+    p.add_argument("--seen_db", default="data/seen_jobs.sqlite")
+    p.add_argument("--dedup_index", default="data/near_dupes.sqlite")
+    p.add_argument("--threshold", type=float, default=0.8)
+    p.add_argument("--register", default="data/sponsor_register_clean.csv")
+    p.add_argument("--memo", default="data/match_memo.sqlite")
+    p.add_argument("--neo4j_workers", type=int, default=4)
+    p.add_argument("--chunk", type=int, default=1_000,
+                   help="ads per Neo4j write round (and checkpoint)")
+    p.add_argument("--queue", type=int, default=8,
+                   help="pages buffered between two stages")
+    p.add_argument("--checkpoint", default="data/pipeline_checkpoint.sqlite")
+    p.add_argument("--resume", nargs="?", const="", default=None,
+                   metavar="RUN_ID", help="continue a run (default: the "
+                                          "latest unfinished one)")
+    p.add_argument("--dry_run", action="store_true",
+                   help="run every stage but write nothing to Neo4j")
+    add_cli(p)
+    add_aggregates_cli(p)
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s | %(levelname)s | %(message)s")
+    load_dotenv()
+    if args.dry_run and args.resume is not None:
+        p.error("--dry_run cannot --resume: it would finish the run unwritten")
+
+    checkpoint = Checkpoint(args.checkpoint)
+    start, done = {}, set()
+    if args.resume is not None:
+        found = checkpoint.unfinished(args.resume or None)
+        if found is None:
+            sys.exit(f"  No run to resume in {args.checkpoint}")
+        run_id, saved = found
+        vars(args).update(saved)
+        start, done = checkpoint.next_pages(run_id), checkpoint.done_pairs(run_id)
+        pages, ads = checkpoint.totals(run_id)
+        logging.info("Resuming run %s: %d pages / %d ads already written, "
+                     "%d pairs done", run_id, pages, ads, len(done))
+    else:
+        run_id = checkpoint.start({k: getattr(args, k) for k in RUN_ARGS})
+    pairs = [pc for pc in itertools.product(_parse_csv(args.search),
+                                            _parse_csv(args.city))
+             if pc not in done]
+
+    cache = ResponseCache(args.cache_dir) if args.cache_dir else None
+    try:
+        client = AdzunaClient(country=args.country, radius_km=args.radius_km,
+                              rate=args.rate, pool_size=max(1, args.workers),
+                              cache=cache)
+    except RuntimeError:
+        sys.exit("  Set ADZUNA_APP_ID and ADZUNA_APP_KEY in .env or env vars")
+    seen = SeenIndex(args.seen_db) if args.incremental else None
+
+    writer = None
+    if not args.dry_run:
+        writer = Neo4jWriter(get_driver(), workers=args.neo4j_workers)
+        writer.run(lambda tx: tx.run(CONSTRAINT).consume())
+
+    stages = [
+        ("fetch", fetch_stage(client, pairs, args.pages, args.workers,
+                              seen, start)),
+        ("filter", filter_stage(seen, args.visa_only, args.min_signal)),
+        ("dedup", dedup_stage(args.dedup_index, args.threshold)),
+        ("match", match_stage(args.register, args.memo)),
+        ("write", write_stage(writer, seen, checkpoint, run_id, args.chunk)),
+    ]
+    with METRICS.run("run_pipeline", args):
+        t0 = time.perf_counter()
+        try:
+            with client:
+                stats = run_stages([(name, METRICS.staged(name, fn))
+                                    for name, fn in stages], maxsize=args.queue)
+            checkpoint.finish(run_id)
+            if writer is not None:
+                after_load(writer.driver, args.aggregates, names=("ads",))
+        finally:
+            if writer is not None:
+                close_driver()
+            if seen is not None:
+                seen.close()
+            pages, ads = checkpoint.totals(run_id)
+            checkpoint.close()
+        METRICS.stage_stats(stats)
+
+    print(report(stats, time.perf_counter() - t0))
+    print(f"  Run {run_id}: {pages:,} pages, {ads:,} ads written.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,5 @@
+// name_clean / trading_name_clean are written by etl/etl_neo4j_load.py
+// (canonical form from etl/name_canon.py)
+DROP INDEX orgNameFT IF EXISTS;            // re-create with both properties
 CREATE FULLTEXT INDEX orgNameFT IF NOT EXISTS
-FOR (o:Organisation) ON EACH [o.name_clean];
+FOR (o:Organisation) ON EACH [o.name_clean, o.trading_name_clean];
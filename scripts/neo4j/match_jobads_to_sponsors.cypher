@@ -2,7 +2,11 @@
 match_job_ads_to_sponsors.cypher
 -----------------------------------------------------------------
    Enrich :JobAd nodes with sponsor information
-   • Expects    $jobBatch = [ {id:'123', company:'IBM UK LTD', …}, … ]
+   • Expects    $jobBatch = [ {id:'123', company:'IBM UK LTD',
+                               company_clean:'ibm uk', …}, … ]
+                 typed like pipeline/load_jobads.typed_rows (created a
+                 DateTime) – `SET j += job` overwrites what the loader
+                 stored
    • Adds / updates:
        j.sponsor_possible = true
        j.routes           = [...]
@@ -16,8 +20,9 @@ CALL apoc.periodic.iterate(
   RETURN job
 ",
 "
-  /* 1 ▸ normalise advert company once */
-  WITH job, apoc.text.clean(job.company) AS comp_clean
+  /* 1 ▸ advert company, canonicalised client-side (etl/name_canon.py)
+         exactly like Organisation.name_clean */
+  WITH job, job.company_clean AS comp_clean
 
   /* 2 ▸ find best matching sponsor (inline logic) */
   CALL {